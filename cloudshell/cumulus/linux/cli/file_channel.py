@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+import posixpath
+import time
+import uuid
+from threading import Lock
+from typing import TYPE_CHECKING
+
+import paramiko
+
+from cloudshell.cumulus.linux.cli.session_pool import get_resource_key
+
+if TYPE_CHECKING:
+    from cloudshell.shell.standards.networking.resource_config import (
+        NetworkingResourceConfig,
+    )
+
+SSH_PORT = 22
+CONNECT_TIMEOUT = 30
+STAGING_DIR = "/tmp"
+# seconds
+MAX_IDLE_TIME = 300
+
+_registry_lock = Lock()
+_file_channels: dict[tuple[str, ...], SftpFileChannel] = {}
+# channels of other resources are swept without their loggers
+_logger = logging.getLogger(__name__)
+
+
+class SftpFileChannel:
+    """Reads and writes files of the device over SFTP.
+
+    Uses SSH credentials of the CLI, the connection is opened on first use
+    and reopened if it was closed. Root-owned files are staged by the CLI.
+    Unknown host keys are accepted with a warning, known ones are checked.
+    The channel is unused when it wasn't used for max idle time, the registry
+    closes and drops such channels.
+    """
+
+    def __init__(
+        self,
+        resource_config: NetworkingResourceConfig,
+        sftp: paramiko.SFTPClient | None = None,
+        max_idle_time: float = MAX_IDLE_TIME,
+    ):
+        self._resource_config = resource_config
+        self._lock = Lock()
+        self._client: paramiko.SSHClient | None = None
+        self._sftp = sftp
+        self.max_idle_time = max_idle_time
+        self._used_at = time.monotonic()
+
+    @property
+    def user(self) -> str:
+        return self._resource_config.user
+
+    def touch(self) -> None:
+        self._used_at = time.monotonic()
+
+    def is_unused(self, now: float) -> bool:
+        return not self._lock.locked() and now - self._used_at > self.max_idle_time
+
+    def _get_port(self) -> int:
+        """CLI port is the SSH port only if the CLI connects over SSH."""
+        r_conf = self._resource_config
+        if str(r_conf.cli_connection_type).upper() == "SSH" and r_conf.cli_tcp_port:
+            return int(r_conf.cli_tcp_port)
+        return SSH_PORT
+
+    def _connect(self) -> paramiko.SFTPClient:
+        r_conf = self._resource_config
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        client.set_missing_host_key_policy(paramiko.WarningPolicy())
+        client.connect(
+            r_conf.address,
+            self._get_port(),
+            r_conf.user,
+            r_conf.password,
+            timeout=CONNECT_TIMEOUT,
+            allow_agent=False,
+            look_for_keys=False,
+        )
+        self._client = client
+        return client.open_sftp()
+
+    def _get_sftp(self) -> paramiko.SFTPClient:
+        if self._client is not None:
+            transport = self._client.get_transport()
+            if transport is None or not transport.is_active():
+                self._close()
+        if self._sftp is None:
+            self._sftp = self._connect()
+        self.touch()
+        return self._sftp
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._sftp is not None:
+            self._sftp.close()
+            self._sftp = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def read_file(self, file_path: str) -> str:
+        """Read the file, raises PermissionError if the user can't read it."""
+        with self._lock:
+            with self._get_sftp().open(file_path, "r") as file_obj:
+                return file_obj.read().decode()
+
+    def write_file(self, file_path: str, text: str, mode: int = 0o600) -> None:
+        """Write the file, its mode is set before the content is written."""
+        with self._lock:
+            sftp = self._get_sftp()
+            with sftp.open(file_path, "w") as file_obj:
+                sftp.chmod(file_path, mode)
+                file_obj.write(text.encode())
+
+    def remove_file(self, file_path: str) -> None:
+        with self._lock:
+            self._get_sftp().remove(file_path)
+
+    @staticmethod
+    def get_staging_path(file_path: str) -> str:
+        name = posixpath.basename(file_path)
+        return posixpath.join(STAGING_DIR, f".cs_{uuid.uuid4().hex[:12]}_{name}")
+
+
+def get_file_channel(resource_config: NetworkingResourceConfig) -> SftpFileChannel:
+    """Return the channel of the process shared by the resources with same access.
+
+    Unused channels of the other resources are dropped and closed, so
+    resources that are no longer used don't keep SSH connections open.
+    """
+    key = get_resource_key(resource_config)
+    now = time.monotonic()
+    unused_channels = []
+    with _registry_lock:
+        for channel_key, file_channel in list(_file_channels.items()):
+            if channel_key != key and file_channel.is_unused(now):
+                unused_channels.append(_file_channels.pop(channel_key))
+        try:
+            file_channel = _file_channels[key]
+        except KeyError:
+            file_channel = _file_channels[key] = SftpFileChannel(resource_config)
+        # the channel isn't dropped while the caller starts using it
+        file_channel.touch()
+    # connections are closed outside of the lock, it can take a while
+    for unused_channel in unused_channels:
+        try:
+            unused_channel.close()
+        except Exception as e:
+            _logger.debug(f"Failed to close the file channel: {e}")
+    return file_channel
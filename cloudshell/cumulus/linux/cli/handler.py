@@ -9,12 +9,15 @@ from cloudshell.cli.service.command_mode_helper import CommandModeHelper
 from cloudshell.cli.service.session_pool_context_manager import (
     SessionPoolContextManager,
 )
-from cloudshell.cli.service.session_pool_manager import SessionPoolManager
 
 from cloudshell.cumulus.linux.cli.command_modes import (
     DefaultCommandMode,
     RootCommandMode,
 )
+from cloudshell.cumulus.linux.cli.session_pool import (
+    CumulusSessionPool,
+    get_session_pool,
+)
 
 if TYPE_CHECKING:
     from cloudshell.shell.standards.networking.resource_config import (
@@ -22,25 +25,48 @@ if TYPE_CHECKING:
     )
 
 
-def get_cli(resource_config: NetworkingResourceConfig) -> CLI:
-    session_pool_size = int(resource_config.sessions_concurrency_limit)
-    session_pool = SessionPoolManager(max_pool_size=session_pool_size)
+def get_cli(resource_config: NetworkingResourceConfig, shared_pool: bool = True) -> CLI:
+    """Create CLI for the resource.
+
+    :param shared_pool: reuse sessions of the process-wide pool of the resource
+        instead of opening new ones for every CLI
+    """
+    if shared_pool:
+        session_pool = get_session_pool(resource_config)
+    else:
+        session_pool_size = int(resource_config.sessions_concurrency_limit)
+        session_pool = CumulusSessionPool(max_pool_size=session_pool_size)
     return CLI(session_pool=session_pool)
 
 
 class CumulusCliConfigurator(AbstractModeConfigurator):
     def __init__(
-        self, cli: CLI, resource_config: NetworkingResourceConfig, logger: Logger
+        self,
+        cli: CLI,
+        resource_config: NetworkingResourceConfig,
+        logger: Logger,
+        park_in_root_mode: bool = False,
     ):
+        """CLI configurator.
+
+        :param park_in_root_mode: use root mode for all services, so pooled
+            sessions stay in it and are only checked by prompt when reused
+            instead of leaving it and entering it again with sudo
+        """
         super().__init__(resource_config, logger, cli)
         self.modes = CommandModeHelper.create_command_mode(resource_config)
+        self.park_in_root_mode = park_in_root_mode
 
     @property
-    def enable_mode(self) -> DefaultCommandMode:
+    def enable_mode(self) -> DefaultCommandMode | RootCommandMode:
+        if self.park_in_root_mode:
+            return self.root_mode
         return self.modes[DefaultCommandMode]
 
     @property
-    def config_mode(self) -> DefaultCommandMode:
+    def config_mode(self) -> DefaultCommandMode | RootCommandMode:
+        if self.park_in_root_mode:
+            return self.root_mode
         return self.modes[DefaultCommandMode]
 
     @property
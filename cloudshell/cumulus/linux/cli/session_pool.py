@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from logging import Logger
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from cloudshell.cli.service.session_manager_impl import SessionManagerImpl
+from cloudshell.cli.service.session_pool_manager import SessionPoolManager
+
+if TYPE_CHECKING:
+    from cloudshell.cli.session.session import Session
+    from cloudshell.shell.standards.networking.resource_config import (
+        NetworkingResourceConfig,
+    )
+
+# seconds
+MAX_IDLE_TIME = 300
+MAX_SESSION_AGE = 3600
+
+_registry_lock = Lock()
+_session_pools: dict[tuple[str, ...], CumulusSessionPool] = {}
+# pools of other resources are swept without their loggers
+_logger = logging.getLogger(__name__)
+
+
+class CumulusSessionPool(SessionPoolManager):
+    """Session pool that closes sessions idle or alive for too long.
+
+    The pool itself is unused when it has no sessions and wasn't used for
+    max idle time, the registry drops such pools.
+    """
+
+    def __init__(
+        self,
+        max_pool_size: int = SessionPoolManager.MAX_POOL_SIZE,
+        max_idle_time: float = MAX_IDLE_TIME,
+        max_session_age: float = MAX_SESSION_AGE,
+    ):
+        # default session manager of SessionPoolManager is shared by all pools
+        super().__init__(
+            session_manager=SessionManagerImpl(), max_pool_size=max_pool_size
+        )
+        self.max_idle_time = max_idle_time
+        self.max_session_age = max_session_age
+        # by id of the session
+        self._created_at: dict[int, float] = {}
+        self._returned_at: dict[int, float] = {}
+        self._used_at = time.monotonic()
+
+    def touch(self) -> None:
+        self._used_at = time.monotonic()
+
+    def is_unused(self, now: float) -> bool:
+        with self._session_condition:
+            return (
+                self._session_manager.existing_sessions_count() == 0
+                and now - self._used_at > self.max_idle_time
+            )
+
+    def _is_expired(self, session: Session, now: float) -> bool:
+        session_id = id(session)
+        return (
+            now - self._returned_at.get(session_id, now) > self.max_idle_time
+            or now - self._created_at.get(session_id, now) > self.max_session_age
+        )
+
+    def _close_session(self, session: Session, logger: Logger) -> None:
+        self.remove_session(session, logger)
+        try:
+            session.disconnect()
+        except Exception as e:
+            logger.debug(f"Failed to disconnect the session: {e}")
+
+    def evict_expired(self, logger: Logger) -> int:
+        """Close expired sessions waiting in the pool, returns their number."""
+        evicted = 0
+        with self._session_condition:
+            now = time.monotonic()
+            for _ in range(self._pool.qsize()):
+                session = self._pool.get(False)
+                if self._is_expired(session, now):
+                    self._close_session(session, logger)
+                    evicted += 1
+                else:
+                    self._pool.put(session)
+        if evicted:
+            logger.debug(f"Closed {evicted} expired sessions")
+        return evicted
+
+    def get_session(self, defined_sessions, prompt, logger):
+        self.touch()
+        self.evict_expired(logger)
+        return super().get_session(defined_sessions, prompt, logger)
+
+    def return_session(self, session, logger):
+        with self._session_condition:
+            self._used_at = self._returned_at[id(session)] = time.monotonic()
+        super().return_session(session, logger)
+
+    def remove_session(self, session, logger):
+        with self._session_condition:
+            self._created_at.pop(id(session), None)
+            self._returned_at.pop(id(session), None)
+        super().remove_session(session, logger)
+
+    def _new_session(self, new_sessions, prompt, logger):
+        session = super()._new_session(new_sessions, prompt, logger)
+        self._created_at[id(session)] = time.monotonic()
+        return session
+
+
+def get_resource_key(resource_config: NetworkingResourceConfig) -> tuple[str, ...]:
+    # passwords are not kept in the registry as is
+    secret = f"{resource_config.password}\n{resource_config.enable_password}"
+    return (
+        resource_config.address,
+        str(resource_config.cli_connection_type),
+        str(resource_config.cli_tcp_port),
+        resource_config.user,
+        hashlib.sha256(secret.encode()).hexdigest(),
+        str(resource_config.sessions_concurrency_limit),
+    )
+
+
+def get_session_pool(resource_config: NetworkingResourceConfig) -> CumulusSessionPool:
+    """Return the pool of the process shared by the resources with same access.
+
+    Expired sessions of the other pools are closed and unused pools are
+    dropped, so resources that are no longer used don't keep sessions open.
+    """
+    key = get_resource_key(resource_config)
+    with _registry_lock:
+        other_pools = [item for item in _session_pools.items() if item[0] != key]
+    # sessions are closed outside of the lock, it can take a while
+    for _, session_pool in other_pools:
+        session_pool.evict_expired(_logger)
+
+    now = time.monotonic()
+    with _registry_lock:
+        for pool_key, session_pool in other_pools:
+            is_registered = _session_pools.get(pool_key) is session_pool
+            if is_registered and session_pool.is_unused(now):
+                del _session_pools[pool_key]
+        try:
+            session_pool = _session_pools[key]
+        except KeyError:
+            max_pool_size = int(resource_config.sessions_concurrency_limit)
+            session_pool = _session_pools[key] = CumulusSessionPool(max_pool_size)
+        # the pool isn't dropped while the caller starts using it
+        session_pool.touch()
+    return session_pool
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+
+from cloudshell.cli.command_template.command_template import CommandTemplate
+from cloudshell.cli.command_template.command_template_executor import (
+    CommandTemplateExecutor,
+)
+
+from cloudshell.cumulus.linux.utils.metrics import get_metrics_sink
+
+
+def get_template_name(command_template: CommandTemplate) -> str:
+    # the command with placeholders identifies the template
+    return command_template._command
+
+
+class InstrumentedExecutor(CommandTemplateExecutor):
+    """Records duration, bytes and errors of the command to the metrics sink."""
+
+    def execute_command(self, **command_kwargs) -> str:
+        metrics_sink = get_metrics_sink()
+        if not metrics_sink.enabled:
+            return super().execute_command(**command_kwargs)
+
+        command = self._command_template.prepare_command(**command_kwargs)
+        output, error = "", None
+        start = time.monotonic()
+        try:
+            output = super().execute_command(**command_kwargs)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            metrics_sink.record_command(
+                get_template_name(self._command_template),
+                time.monotonic() - start,
+                len(command.encode()) + 1,
+                len(output.encode()),
+                error,
+            )
+        return output
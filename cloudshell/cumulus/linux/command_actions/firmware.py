@@ -2,11 +2,9 @@ from logging import Logger
 
 import attr
 
-from cloudshell.cli.command_template.command_template_executor import (
-    CommandTemplateExecutor,
-)
 from cloudshell.cli.service.cli_service import CliService
 
+from cloudshell.cumulus.linux.command_actions.executor import InstrumentedExecutor
 from cloudshell.cumulus.linux.command_templates import firmware
 
 
@@ -16,6 +14,6 @@ class FirmwareActions:
     _logger: Logger
 
     def load_firmware(self, image_path: str, timeout) -> str:
-        return CommandTemplateExecutor(
+        return InstrumentedExecutor(
             self._cli_service, firmware.LOAD_FIRMWARE, timeout=timeout
         ).execute_command(image_path=image_path)
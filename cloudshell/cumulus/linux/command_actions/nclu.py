@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+import attr
+
+from cloudshell.cumulus.linux.command_actions.transaction import (
+    Command,
+    TransactionVlanActions,
+)
+from cloudshell.cumulus.linux.command_templates import QinQNotSupported, nclu
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class NcluVlanActions(TransactionVlanActions):
+    """VLAN changes via NCLU, they are pending until commit."""
+
+    BRIDGE_NAME: ClassVar[str] = "bridge"
+    COMMIT: ClassVar = nclu.COMMIT
+    ABORT: ClassVar = nclu.ABORT
+
+    def prepare_bridge(self, qinq: bool) -> None:
+        if qinq:
+            raise QinQNotSupported("NCLU")
+
+    def add_access_vlan(self, port_name: str, vlan_id: str, qinq: bool) -> None:
+        self.prepare_bridge(qinq)
+        self._stage(
+            [
+                (nclu.ADD_ACCESS_VLAN, {"port_name": port_name, "vlan_id": vlan_id}),
+                *self._get_bridge_commands(port_name, vlan_id),
+            ]
+        )
+        self._add_vlans(port_name, VlanSet.from_ids([vlan_id]))
+
+    def add_trunk_vlan(self, port_name: str, vlans: list[str], qinq: bool) -> None:
+        self.prepare_bridge(qinq)
+        vlan_set = VlanSet.from_values(vlans)
+        vlans = ",".join(vlan_set.to_values())
+        self._stage(
+            [
+                (nclu.ADD_TRUNK_VLANS, {"port_name": port_name, "vlans": vlans}),
+                *self._get_bridge_commands(port_name, vlans),
+            ]
+        )
+        self._add_vlans(port_name, vlan_set)
+
+    @staticmethod
+    def _get_bridge_commands(port_name: str, vlans: str) -> list[Command]:
+        return [
+            (nclu.ADD_BRIDGE_VLANS, {"vlans": vlans}),
+            (nclu.ADD_BRIDGE_PORT, {"port_name": port_name}),
+        ]
+
+    def _get_remove_commands(self, port_name: str, vlans: str | None) -> list[Command]:
+        commands = [
+            (nclu.DEL_ACCESS_VLAN, {"port_name": port_name}),
+            (nclu.DEL_TRUNK_VLANS, {"port_name": port_name}),
+            (nclu.DEL_BRIDGE_PORT, {"port_name": port_name}),
+        ]
+        if vlans:
+            commands.append((nclu.DEL_BRIDGE_VLANS, {"vlans": vlans}))
+        return commands
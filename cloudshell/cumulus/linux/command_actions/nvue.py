@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+import attr
+
+from cloudshell.cumulus.linux.command_actions.transaction import (
+    Command,
+    TransactionVlanActions,
+)
+from cloudshell.cumulus.linux.command_templates import QinQNotSupported, nvue
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class NvueVlanActions(TransactionVlanActions):
+    """VLAN changes via NVUE, they are pending until commit."""
+
+    BRIDGE_NAME: ClassVar[str] = "br_default"
+    COMMIT: ClassVar = nvue.APPLY_CONFIG
+    ABORT: ClassVar = nvue.DETACH_CONFIG
+
+    def prepare_bridge(self, qinq: bool) -> None:
+        if qinq:
+            raise QinQNotSupported("NVUE")
+
+    def add_access_vlan(self, port_name: str, vlan_id: str, qinq: bool) -> None:
+        self.prepare_bridge(qinq)
+        self._stage(
+            [
+                (nvue.SET_BRIDGE_VLANS, {"vlans": vlan_id}),
+                (nvue.SET_ACCESS_VLAN, {"port_name": port_name, "vlan_id": vlan_id}),
+            ]
+        )
+        self._add_vlans(port_name, VlanSet.from_ids([vlan_id]))
+
+    def add_trunk_vlan(self, port_name: str, vlans: list[str], qinq: bool) -> None:
+        self.prepare_bridge(qinq)
+        vlan_set = VlanSet.from_values(vlans)
+        vlans = ",".join(vlan_set.to_values())
+        self._stage(
+            [
+                (nvue.SET_BRIDGE_VLANS, {"vlans": vlans}),
+                (nvue.SET_TRUNK_VLANS, {"port_name": port_name, "vlans": vlans}),
+            ]
+        )
+        self._add_vlans(port_name, vlan_set)
+
+    def _get_remove_commands(self, port_name: str, vlans: str | None) -> list[Command]:
+        commands = [(nvue.UNSET_BRIDGE_PORT, {"port_name": port_name})]
+        if vlans:
+            commands.append((nvue.UNSET_BRIDGE_VLANS, {"vlans": vlans}))
+        return commands
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import re
+import uuid
+from typing import Iterable, Iterator
+
+import attr
+
+from cloudshell.cli.command_template.command_template import CommandTemplate
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
+
+# terminal line discipline drops input lines longer than 4095 bytes
+MAX_LINE_LENGTH = 3000
+
+
+class PipelineCommandFailed(CommandExecutionException):
+    def __init__(self, exit_status: int, output: str):
+        super().__init__(f"Command exited with status {exit_status}: '{output}'")
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class PipelineCommand:
+    command_template: CommandTemplate
+    kwargs: dict[str, str] = attr.ib(factory=dict)
+
+    @property
+    def command(self) -> str:
+        return self.command_template.prepare_command(**self.kwargs)
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class PipelineResult:
+    output: str
+    exit_status: int
+
+
+def create_sentinel() -> str:
+    return f"__cs_{uuid.uuid4().hex[:12]}__"
+
+
+def join_commands(commands: Iterable[str], sentinel: str) -> str:
+    """Join the commands into one line, each one followed by its exit status.
+
+    Commands are run one after another even if some of them fail.
+    """
+    return " ; ".join(f'{command} ; echo "{sentinel} $?"' for command in commands)
+
+
+def split_output(output: str, sentinel: str, count: int) -> list[PipelineResult]:
+    """Split the output of the joined commands by their sentinels."""
+    pattern = re.compile(rf"^{re.escape(sentinel)} (\d+)\s*$", re.MULTILINE)
+    results = []
+    start = 0
+    for match in pattern.finditer(output):
+        results.append(
+            PipelineResult(output[start : match.start()].strip(), int(match.group(1)))
+        )
+        start = match.end()
+    if len(results) != count:
+        raise CommandExecutionException(
+            f"Expected outputs of {count} commands, got {len(results)}"
+        )
+    return results
+
+
+def check_errors(result: PipelineResult, error_map: dict) -> None:
+    """Raise the error of the first pattern found in the output, as CLI does.
+
+    A command that failed without a known error in the output, or without
+    any output, fails by its exit status.
+    """
+    for error_pattern, error in error_map.items():
+        if re.search(error_pattern, result.output, re.DOTALL):
+            if isinstance(error, CommandExecutionException):
+                raise error
+            raise CommandExecutionException(f"Session returned '{error}'")
+    if result.exit_status != 0:
+        raise PipelineCommandFailed(result.exit_status, result.output)
+
+
+def iter_batches(
+    commands: Iterable[PipelineCommand], max_line_length: int = MAX_LINE_LENGTH
+) -> Iterator[list[PipelineCommand]]:
+    """Group the commands so the joined line isn't longer than max_line_length.
+
+    A command that is longer by itself is sent in a batch of its own.
+    """
+    batch: list[PipelineCommand] = []
+    length = 0
+    for command in commands:
+        # sentinel echo adds about 40 chars
+        command_length = len(command.command) + 40
+        if batch and length + command_length > max_line_length:
+            yield batch
+            batch, length = [], 0
+        batch.append(command)
+        length += command_length
+    if batch:
+        yield batch
@@ -1,14 +1,14 @@
 import re
 from logging import Logger
+from typing import Optional
 
 import attr
 
-from cloudshell.cli.command_template.command_template_executor import (
-    CommandTemplateExecutor,
-)
 from cloudshell.cli.service.cli_service import CliService
 
+from cloudshell.cumulus.linux.command_actions.executor import InstrumentedExecutor
 from cloudshell.cumulus.linux.command_templates import enable_disable_snmp
+from cloudshell.cumulus.linux.utils.read_cache import ReadCache, ReadCacheKey
 
 SNMP_ACTIVE_PATTERN = re.compile(r"current[\s]+status[\s]+active", flags=re.I | re.M)
 
@@ -17,9 +17,27 @@ SNMP_ACTIVE_PATTERN = re.compile(r"current[\s]+status[\s]+active", flags=re.I |
 class BaseSnmpActions:
     _cli_service: CliService
     _logger: Logger
+    # if both are set the status is cached
+    _address: Optional[str] = None
+    _read_cache: Optional[ReadCache] = None
 
-    def is_snmp_running(self) -> bool:
-        snmp_status = CommandTemplateExecutor(
+    def _get_snmp_status(self) -> str:
+        return InstrumentedExecutor(
             self._cli_service, enable_disable_snmp.SHOW_SNMP_STATUS
         ).execute_command()
+
+    def is_snmp_running(self, cached: bool = True) -> bool:
+        """Check the SNMP server status.
+
+        :param cached: use the cached status if it's still valid
+        """
+        if self._read_cache is None or self._address is None:
+            snmp_status = self._get_snmp_status()
+        else:
+            snmp_status = self._read_cache.read(
+                self._address,
+                ReadCacheKey.SNMP_STATUS,
+                self._get_snmp_status,
+                refresh=not cached,
+            )
         return bool(SNMP_ACTIVE_PATTERN.search(snmp_status))
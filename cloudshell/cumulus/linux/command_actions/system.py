@@ -1,41 +1,142 @@
 from __future__ import annotations
 
+import base64
+import gzip
+import hashlib
+import io
+import re
+import time
 from logging import Logger
+from typing import Callable, Iterable, Iterator, Sequence, TypeVar
 
 import attr
 
-from cloudshell.cli.command_template.command_template_executor import (
-    CommandTemplateExecutor,
-)
+from cloudshell.cli.command_template.command_template import CommandTemplate
 from cloudshell.cli.service.cli_service import CliService
 
-from cloudshell.cumulus.linux.command_templates import system
+from cloudshell.cumulus.linux.cli.file_channel import SftpFileChannel
+from cloudshell.cumulus.linux.command_actions.executor import InstrumentedExecutor
+from cloudshell.cumulus.linux.command_actions.pipeline import (
+    PipelineCommand,
+    PipelineResult,
+    check_errors,
+    create_sentinel,
+    iter_batches,
+    join_commands,
+    split_output,
+)
+from cloudshell.cumulus.linux.command_templates import (
+    CumulusCommandError,
+    ResourceBusy,
+    system,
+)
 from cloudshell.cumulus.linux.const import (
     IFACE_CONF_PATH,
+    JOURNAL_DIR,
     SNMP_CONF_PATH,
     SNMP_SERVICE_NAME,
 )
+from cloudshell.cumulus.linux.utils.counters import CounterName, counters
+from cloudshell.cumulus.linux.utils.latency_history import get_latency_history
+from cloudshell.cumulus.linux.utils.metrics import get_metrics_sink
+from cloudshell.cumulus.linux.utils.read_cache import ReadCache, ReadCacheKey
+
+MD5_PATTERN = re.compile(r"\b[0-9a-f]{32}\b")
+RECOVERED_PATTERN = re.compile(r"^recovered\s*$", re.MULTILINE)
+FILE_HEADER_PATTERN = re.compile(r"^==> (.+) <==$", re.MULTILINE)
+SIZE_PATTERN = re.compile(r"^\d+$", re.MULTILINE)
+FILE_PATH_PATTERN = re.compile(r"^/.+$", re.MULTILINE)
+# bytes of the file content in one round trip
+READ_CHUNK_SIZE = 65536
+WRITE_CHUNK_SIZE = 16384
+HEREDOC_EOF = "CS_EOF"
+PIPELINE_METRICS_NAME = "pipeline"
+# read cache keys of the files
+FILE_CACHE_KEYS = {
+    IFACE_CONF_PATH: ReadCacheKey.IFACE_CONF,
+    SNMP_CONF_PATH: ReadCacheKey.SNMP_CONF,
+}
+
+
+T = TypeVar("T")
+
+
+class FileMd5NotFound(CumulusCommandError):
+    def __init__(self, file_path: str):
+        super().__init__(f"Failed to get MD5 sum of the file {file_path}")
+
+
+class FileSizeNotFound(CumulusCommandError):
+    def __init__(self, file_path: str):
+        super().__init__(f"Failed to get size of the file {file_path}")
+
+
+class FileChunkNotFound(CumulusCommandError):
+    def __init__(self, file_path: str, index: int):
+        super().__init__(f"Failed to read chunk {index} of the file {file_path}")
+
+
+class FileChecksumMismatch(CumulusCommandError):
+    def __init__(self, file_path: str):
+        super().__init__(f"MD5 sum of the file {file_path} doesn't match")
+
+
+def get_chunks_count(size: int, chunk_size: int) -> int:
+    """Round trips to transfer the file by chunks, an empty file takes one."""
+    return max(-(-size // chunk_size), 1)
+
+
+def _gzip(data: bytes) -> bytes:
+    # without timestamp the same data is always compressed the same way
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gzip_file:
+        gzip_file.write(data)
+    return buffer.getvalue()
 
 
 @attr.s(auto_attribs=True, slots=True, frozen=True)
 class SystemActions:
     _cli_service: CliService
     _logger: Logger
+    # if set, durations of the slow commands are kept in the device history
+    _address: str | None = None
+    # if set, config files are read and written over it instead of the CLI
+    _file_channel: SftpFileChannel | None = None
+    # if set with the address, config files are cached, writes invalidate them
+    _read_cache: ReadCache | None = None
+    # if set, files are read and written over the CLI by base64 chunks with
+    # MD5 check instead of cat and printf, the file channel takes precedence
+    _chunked_transfer: bool = False
+
+    def _cached(self, key: str, read: Callable[[], T], refresh: bool = False) -> T:
+        if self._read_cache is None or self._address is None:
+            return read()
+        return self._read_cache.read(self._address, key, read, refresh)
+
+    def _invalidate(self, *keys: str) -> None:
+        """Drop cached results of the device, all of them if keys are not set."""
+        if self._read_cache is not None and self._address is not None:
+            self._read_cache.invalidate(self._address, *keys)
+
+    def _invalidate_file(self, file_path: str) -> None:
+        key = FILE_CACHE_KEYS.get(file_path)
+        if key is not None:
+            self._invalidate(key)
 
     def create_tmp_file(self) -> str:
-        tmp_file = CommandTemplateExecutor(
+        tmp_file = InstrumentedExecutor(
             self._cli_service, system.CREATE_TEMP_FILE, remove_prompt=True
         ).execute_command()
         return tmp_file.rstrip()
 
     def create_tmp_dir(self) -> str:
-        tmp_dir = CommandTemplateExecutor(
+        tmp_dir = InstrumentedExecutor(
             self._cli_service, system.CREATE_TEMP_DIR, remove_prompt=True
         ).execute_command()
         return tmp_dir.rstrip()
 
     def create_folder(self, folder_path: str) -> str:
-        return CommandTemplateExecutor(
+        return InstrumentedExecutor(
             self._cli_service, system.CREATE_FOLDER
         ).execute_command(folder_path=folder_path)
 
@@ -44,90 +145,441 @@ class SystemActions:
         src_folder: str,
         dst_folder: str,
     ) -> str:
-        return CommandTemplateExecutor(
+        return InstrumentedExecutor(
             self._cli_service, system.COPY_FOLDER
         ).execute_command(src_folder=src_folder, dst_folder=dst_folder)
 
     def copy_file(self, src_file: str, dst_folder: str) -> str:
-        return CommandTemplateExecutor(
+        return InstrumentedExecutor(
             self._cli_service, system.COPY_FILE
         ).execute_command(src_file=src_file, dst_folder=dst_folder)
 
+    def _send_pipeline_line(self, line: str) -> str:
+        metrics_sink = get_metrics_sink()
+        if not metrics_sink.enabled:
+            return self._cli_service.send_command(line, remove_prompt=True)
+
+        start = time.monotonic()
+        output = self._cli_service.send_command(line, remove_prompt=True)
+        metrics_sink.record_command(
+            PIPELINE_METRICS_NAME,
+            time.monotonic() - start,
+            len(line.encode()) + 1,
+            len(output.encode()),
+        )
+        return output
+
+    def execute_pipeline(
+        self, commands: Iterable[PipelineCommand]
+    ) -> list[PipelineResult]:
+        """Send the commands in one line instead of waiting for the prompt each time.
+
+        Outputs are split by sentinels and checked by the error map of each
+        template and by the exit status, the first error is raised after the
+        line is executed.
+        """
+        results = []
+        for batch in iter_batches(commands):
+            sentinel = create_sentinel()
+            line = join_commands((command.command for command in batch), sentinel)
+            output = self._send_pipeline_line(line)
+            batch_results = split_output(output, sentinel, len(batch))
+            for command, result in zip(batch, batch_results):
+                check_errors(result, command.command_template.error_map)
+            results.extend(batch_results)
+        return results
+
+    def copy_to_folder(
+        self, src_folders: Sequence[str], src_files: Sequence[str], dst_folder: str
+    ) -> list[PipelineResult]:
+        """Copy folders and files with their parent dirs, in one pipeline."""
+        commands = [
+            PipelineCommand(
+                system.COPY_FOLDER, {"src_folder": folder, "dst_folder": dst_folder}
+            )
+            for folder in src_folders
+        ]
+        commands.extend(
+            PipelineCommand(
+                system.COPY_FILE, {"src_file": file_path, "dst_folder": dst_folder}
+            )
+            for file_path in src_files
+        )
+        return self.execute_pipeline(commands)
+
     def tar_compress_folder(self, compress_name: str, folder: str) -> str:
-        return CommandTemplateExecutor(
+        return InstrumentedExecutor(
             self._cli_service, system.TAR_COMPRESS_FOLDER
         ).execute_command(compress_name=compress_name, folder=folder)
 
     def tar_uncompress_folder(self, compressed_file: str, destination: str) -> str:
-        return CommandTemplateExecutor(
+        self._invalidate()
+        return InstrumentedExecutor(
             self._cli_service, system.TAR_UNCOMPRESS_FOLDER
         ).execute_command(compressed_file=compressed_file, destination=destination)
 
     def curl_upload_file(self, file_path: str, remote_url: str) -> str:
-        return CommandTemplateExecutor(
+        return InstrumentedExecutor(
             self._cli_service, system.CURL_UPLOAD_FILE
         ).execute_command(file_path=file_path, remote_url=remote_url)
 
     def curl_download_file(self, remote_url: str, file_path: str) -> str:
-        return CommandTemplateExecutor(
+        return InstrumentedExecutor(
             self._cli_service, system.CURL_DOWNLOAD_FILE
         ).execute_command(remote_url=remote_url, file_path=file_path)
 
-    def if_reload(self) -> str:
-        return CommandTemplateExecutor(
-            self._cli_service, system.IF_RELOAD
-        ).execute_command()
+    def _execute_with_retries(
+        self,
+        name: str,
+        command_template: CommandTemplate,
+        retries: int,
+        backoff: float,
+        timeout: float | None,
+        **kwargs: str,
+    ) -> str:
+        """Retry the command if the resource is busy, backoff doubles each time."""
+        optional_kwargs = {"timeout": timeout} if timeout else {}
+        executor = InstrumentedExecutor(
+            self._cli_service, command_template, **optional_kwargs
+        )
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                output = executor.execute_command(**kwargs)
+            except ResourceBusy:
+                if attempt >= retries:
+                    raise
+                delay = backoff * 2**attempt
+                attempt += 1
+                counters.incr(CounterName.COMMAND_RETRIED)
+                self._logger.warning(
+                    f"{name} failed, resource is busy, retry {attempt}/{retries} "
+                    f"in {delay:.1f}s"
+                )
+                time.sleep(delay)
+            else:
+                duration = time.monotonic() - start
+                self._logger.debug(f"{name} finished in {duration:.3f}s")
+                if self._address is not None:
+                    get_latency_history(self._address, name).add(duration)
+                return output
+
+    def if_reload(
+        self, retries: int = 0, backoff: float = 1.0, timeout: float | None = None
+    ) -> str:
+        self._invalidate()
+        return self._execute_with_retries(
+            "ifreload", system.IF_RELOAD, retries, backoff, timeout
+        )
+
+    def if_up(
+        self,
+        iface_names: Iterable[str],
+        retries: int = 0,
+        backoff: float = 1.0,
+        timeout: float | None = None,
+    ) -> str:
+        self._invalidate()
+        return self._execute_with_retries(
+            "ifup",
+            system.IF_UP,
+            retries,
+            backoff,
+            timeout,
+            iface_names=" ".join(iface_names),
+        )
 
     def restart_service(self, name: str) -> str:
-        return CommandTemplateExecutor(
+        self._invalidate(ReadCacheKey.SNMP_STATUS)
+        return InstrumentedExecutor(
             self._cli_service, system.RESTART_SERVICE
         ).execute_command(name=name)
 
     def shutdown(self) -> None:
-        CommandTemplateExecutor(self._cli_service, system.SHUTDOWN).execute_command()
+        self._invalidate()
+        InstrumentedExecutor(self._cli_service, system.SHUTDOWN).execute_command()
 
     def reboot(self) -> str:
-        return CommandTemplateExecutor(
-            self._cli_service, system.REBOOT
-        ).execute_command()
+        self._invalidate()
+        return InstrumentedExecutor(self._cli_service, system.REBOOT).execute_command()
 
-    def get_snmp_conf(self) -> str:
+    def _read_over_channel(self, file_path: str) -> str:
+        try:
+            return self._file_channel.read_file(file_path)
+        except PermissionError:
+            self._logger.debug(f"Staging {file_path} to read it over the channel")
+
+        staging_path = self._file_channel.get_staging_path(file_path)
+        InstrumentedExecutor(self._cli_service, system.STAGE_FILE).execute_command(
+            owner=self._file_channel.user, src_file=file_path, dst_file=staging_path
+        )
+        try:
+            return self._file_channel.read_file(staging_path)
+        finally:
+            self._file_channel.remove_file(staging_path)
+
+    def _write_over_channel(self, file_path: str, text: str) -> None:
+        """Write to the staging file, the CLI moves it in place as root."""
+        staging_path = self._file_channel.get_staging_path(file_path)
+        try:
+            self._file_channel.write_file(staging_path, text)
+            InstrumentedExecutor(
+                self._cli_service, system.REPLACE_FILE
+            ).execute_command(src_file=staging_path, dst_file=file_path)
+        except Exception:
+            try:
+                self._file_channel.remove_file(staging_path)
+            except OSError:
+                self._logger.warning(f"Failed to remove staging file {staging_path}")
+            raise
+
+    def _read_conf(self, file_path: str, refresh: bool = False) -> str:
+        return self._cached(
+            FILE_CACHE_KEYS[file_path],
+            lambda: self._read_conf_uncached(file_path),
+            refresh,
+        )
+
+    def _read_conf_uncached(self, file_path: str) -> str:
+        if self._file_channel is not None:
+            return self._read_over_channel(file_path).strip()
+        if self._chunked_transfer:
+            return self.read_file(file_path).strip()
         return (
-            CommandTemplateExecutor(
+            InstrumentedExecutor(
                 self._cli_service, system.READ_FILE, remove_prompt=True
             )
-            .execute_command(file_path=SNMP_CONF_PATH)
+            .execute_command(file_path=file_path)
             .strip()
         )
 
+    def _upload_conf(self, file_path: str, text: str) -> None:
+        self._invalidate_file(file_path)
+        if self._file_channel is not None:
+            self._write_over_channel(file_path, text)
+        else:
+            self._write_over_cli(file_path, text)
+
+    def _write_over_cli(self, file_path: str, text: str) -> None:
+        if self._chunked_transfer:
+            self.write_file(file_path, text)
+        else:
+            InstrumentedExecutor(self._cli_service, system.WRITE_FILE).execute_command(
+                text=text, file_path=file_path
+            )
+
+    def get_snmp_conf(self) -> str:
+        return self._read_conf(SNMP_CONF_PATH)
+
     def upload_snmp_conf(self, text: str) -> None:
-        CommandTemplateExecutor(self._cli_service, system.WRITE_FILE).execute_command(
-            text=text, file_path=SNMP_CONF_PATH
+        self._upload_conf(SNMP_CONF_PATH, text)
+
+    def get_iface_conf(self, refresh: bool = False) -> str:
+        """Read the interfaces file.
+
+        :param refresh: read it from the device even if the cached one is valid
+        """
+        return self._read_conf(IFACE_CONF_PATH, refresh)
+
+    def get_files(self, file_paths: Iterable[str]) -> dict[str, str]:
+        """Read the files, paths can be glob patterns.
+
+        Returns texts by file paths, missing files are skipped.
+        """
+        if self._chunked_transfer:
+            return {
+                file_path: self.read_file(file_path).strip()
+                for file_path in self.list_files(file_paths)
+            }
+        output = InstrumentedExecutor(
+            self._cli_service, system.READ_FILES, remove_prompt=True
+        ).execute_command(file_paths=" ".join(file_paths))
+        parts = FILE_HEADER_PATTERN.split(output)[1:]
+        return {
+            file_path: text.strip() for file_path, text in zip(parts[::2], parts[1::2])
+        }
+
+    def list_files(self, file_paths: Iterable[str]) -> list[str]:
+        """Regular files matching the paths, paths can be glob patterns."""
+        output = InstrumentedExecutor(
+            self._cli_service, system.LIST_FILES, remove_prompt=True
+        ).execute_command(file_paths=" ".join(file_paths))
+        return [file_path.strip() for file_path in FILE_PATH_PATTERN.findall(output)]
+
+    def upload_file(self, file_path: str, text: str) -> None:
+        self._invalidate_file(file_path)
+        self._write_over_cli(file_path, text)
+
+    def get_file_size(self, file_path: str) -> int:
+        output = InstrumentedExecutor(
+            self._cli_service, system.FILE_SIZE, remove_prompt=True
+        ).execute_command(file_path=file_path)
+        match = SIZE_PATTERN.search(output)
+        if not match:
+            raise FileSizeNotFound(file_path)
+        return int(match.group())
+
+    def iter_file_chunks(
+        self,
+        file_path: str,
+        chunk_size: int = READ_CHUNK_SIZE,
+        compress: bool = False,
+    ) -> Iterator[bytes]:
+        """Read the file by chunks encoded in base64, optionally gzipped.
+
+        MD5 sum of the content is checked after the last chunk.
+        """
+        size = self.get_file_size(file_path)
+        executor = InstrumentedExecutor(
+            self._cli_service, system.READ_BASE64_CHUNK, remove_prompt=True
         )
+        md5 = hashlib.md5()
+        for index in range(get_chunks_count(size, chunk_size)):
+            marker = create_sentinel()
+            output = executor.execute_command(
+                marker=marker,
+                file_path=file_path,
+                chunk_size=chunk_size,
+                index=index,
+                compressor="gzip -c" if compress else None,
+            )
+            marker = re.escape(marker)
+            match = re.search(
+                rf"^{marker} begin\s*$(.*?)^{marker} end\s*$",
+                output,
+                re.MULTILINE | re.DOTALL,
+            )
+            if not match:
+                raise FileChunkNotFound(file_path, index)
+            chunk = base64.b64decode("".join(match.group(1).split()))
+            if compress:
+                chunk = gzip.decompress(chunk)
+            md5.update(chunk)
+            yield chunk
 
-    def get_iface_conf(self) -> str:
-        return (
-            CommandTemplateExecutor(
-                self._cli_service, system.READ_FILE, remove_prompt=True
+        if md5.hexdigest() != self.get_file_md5(file_path):
+            raise FileChecksumMismatch(file_path)
+
+    def read_file(
+        self,
+        file_path: str,
+        chunk_size: int = READ_CHUNK_SIZE,
+        compress: bool = False,
+    ) -> str:
+        chunks = self.iter_file_chunks(file_path, chunk_size, compress)
+        return b"".join(chunks).decode()
+
+    def write_file(
+        self,
+        file_path: str,
+        text: str,
+        chunk_size: int = WRITE_CHUNK_SIZE,
+        compress: bool = False,
+    ) -> None:
+        """Write the text by chunks encoded in base64, optionally gzipped.
+
+        Chunks are written to a temp file outside of the destination dir, so
+        globs of the dir don't pick it up. It replaces the destination only if
+        their MD5 sums match and is removed if anything fails.
+        """
+        self._invalidate_file(file_path)
+        data = text.encode()
+        staging_path = self.create_tmp_file()
+        try:
+            executor = InstrumentedExecutor(
+                self._cli_service, system.WRITE_BASE64_CHUNK
             )
-            .execute_command(file_path=IFACE_CONF_PATH)
-            .strip()
-        )
+            for index in range(get_chunks_count(len(data), chunk_size)):
+                start = index * chunk_size
+                chunk = data[start : start + chunk_size]
+                if compress:
+                    chunk = _gzip(chunk)
+                encoded = base64.encodebytes(chunk).decode()
+                executor.execute_command(
+                    decompressor="gzip -dc" if compress else None,
+                    redirect=">>" if start else ">",
+                    file_path=staging_path,
+                    eof=HEREDOC_EOF,
+                    body=f"\n{encoded}{HEREDOC_EOF}",
+                )
+
+            if self.get_file_md5(staging_path) != hashlib.md5(data).hexdigest():
+                raise FileChecksumMismatch(file_path)
+            InstrumentedExecutor(
+                self._cli_service, system.REPLACE_FILE
+            ).execute_command(src_file=staging_path, dst_file=file_path)
+        except Exception:
+            try:
+                InstrumentedExecutor(
+                    self._cli_service, system.REMOVE_FILE
+                ).execute_command(file_path=staging_path)
+            except Exception:
+                self._logger.warning(f"Failed to remove staging file {staging_path}")
+            raise
+
+    def get_file_md5(self, file_path: str) -> str:
+        output = InstrumentedExecutor(
+            self._cli_service, system.FILE_MD5, remove_prompt=True
+        ).execute_command(file_path=file_path)
+        match = MD5_PATTERN.search(output)
+        if not match:
+            raise FileMd5NotFound(file_path)
+        return match.group()
+
+    def get_iface_conf_md5(self) -> str:
+        return self.get_file_md5(IFACE_CONF_PATH)
+
+    def edit_file(self, file_path: str, sed_args: str) -> str:
+        self._invalidate_file(file_path)
+        return InstrumentedExecutor(
+            self._cli_service, system.EDIT_FILE
+        ).execute_command(sed_args=sed_args, file_path=file_path)
+
+    def edit_iface_conf(self, sed_args: str) -> str:
+        return self.edit_file(IFACE_CONF_PATH, sed_args)
 
     def upload_iface_conf(self, text: str) -> None:
-        CommandTemplateExecutor(self._cli_service, system.WRITE_FILE).execute_command(
-            text=text, file_path=IFACE_CONF_PATH
-        )
+        self._upload_conf(IFACE_CONF_PATH, text)
+
+    def save_journal(self, file_paths: Iterable[str]) -> str:
+        """Copy the files to the journal dir before changing them."""
+        return InstrumentedExecutor(
+            self._cli_service, system.SAVE_JOURNAL
+        ).execute_command(journal_dir=JOURNAL_DIR, file_paths=" ".join(file_paths))
+
+    def restore_journal(self) -> str:
+        self._invalidate(ReadCacheKey.IFACE_CONF)
+        return InstrumentedExecutor(
+            self._cli_service, system.RESTORE_JOURNAL
+        ).execute_command(journal_dir=JOURNAL_DIR)
+
+    def recover_journal(self) -> bool:
+        """Restore the files left in the journal, returns True if restored."""
+        output = InstrumentedExecutor(
+            self._cli_service, system.RECOVER_JOURNAL
+        ).execute_command(journal_dir=JOURNAL_DIR)
+        is_recovered = bool(RECOVERED_PATTERN.search(output))
+        if is_recovered:
+            self._invalidate(ReadCacheKey.IFACE_CONF)
+        return is_recovered
+
+    def remove_journal(self) -> str:
+        return InstrumentedExecutor(
+            self._cli_service, system.REMOVE_JOURNAL
+        ).execute_command(journal_dir=JOURNAL_DIR)
 
     def restart_snmp_server(self) -> None:
         self.restart_service(SNMP_SERVICE_NAME)
 
     def start_snmp_server(self) -> None:
-        CommandTemplateExecutor(
-            self._cli_service, system.START_SERVICE
-        ).execute_command(name=SNMP_SERVICE_NAME)
+        self._invalidate(ReadCacheKey.SNMP_STATUS)
+        InstrumentedExecutor(self._cli_service, system.START_SERVICE).execute_command(
+            name=SNMP_SERVICE_NAME
+        )
 
     def stop_snmp_server(self) -> None:
-        CommandTemplateExecutor(self._cli_service, system.STOP_SERVICE).execute_command(
+        self._invalidate(ReadCacheKey.SNMP_STATUS)
+        InstrumentedExecutor(self._cli_service, system.STOP_SERVICE).execute_command(
             name=SNMP_SERVICE_NAME
         )
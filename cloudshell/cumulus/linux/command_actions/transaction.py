@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from logging import Logger
+from typing import Any, Callable, ClassVar, Iterable, Tuple
+
+import attr
+
+from cloudshell.cli.command_template.command_template import CommandTemplate
+from cloudshell.cli.service.cli_service import CliService
+
+from cloudshell.cumulus.linux.command_actions.executor import InstrumentedExecutor
+from cloudshell.cumulus.linux.command_templates import PendingChangesLost
+from cloudshell.cumulus.linux.connectivity.iface_config_handler import IfaceConfig
+from cloudshell.cumulus.linux.connectivity.vlan_config_handler import get_vni_name
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
+
+Command = Tuple[CommandTemplate, "dict[str, Any]"]
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class TransactionVlanActions(ABC):
+    """VLAN changes that are pending on the device until commit.
+
+    Commands of an action are staged as a whole, if one of them fails the
+    pending changes are aborted and the commands of the previous actions are
+    staged again. VLANs that are no longer used by any port are removed from
+    the bridge in the same transaction, the ports that use them are found in
+    the interfaces file, it's read on the first removal.
+    Has the same interface as VlanConfHandler.
+    """
+
+    BRIDGE_NAME: ClassVar[str]
+    COMMIT: ClassVar[CommandTemplate]
+    ABORT: ClassVar[CommandTemplate]
+    _cli_service: CliService
+    _logger: Logger
+    _read_iface_conf: Callable[[], str]
+    _staged: list[Command] = attr.ib(factory=list, init=False)
+    # VLANs added to the ports in this transaction
+    _added_vlans: dict[str, VlanSet] = attr.ib(factory=dict, init=False)
+    _conf: IfaceConfig | None = attr.ib(default=None, init=False)
+
+    def _execute(self, template: CommandTemplate, **kwargs) -> str:
+        return InstrumentedExecutor(self._cli_service, template).execute_command(
+            bridge_name=self.BRIDGE_NAME, **kwargs
+        )
+
+    def _stage(self, commands: list[Command]) -> None:
+        for i, (template, kwargs) in enumerate(commands):
+            try:
+                self._execute(template, **kwargs)
+            except Exception:
+                if i:
+                    self._restage()
+                raise
+        self._staged.extend(commands)
+
+    def _restage(self) -> None:
+        """Drop the commands of the failed action from the pending changes."""
+        self._logger.debug(
+            "Staging the pending changes again without the failed action"
+        )
+        try:
+            self._execute(self.ABORT)
+            for template, kwargs in self._staged:
+                self._execute(template, **kwargs)
+        except Exception as e:
+            self._staged.clear()
+            try:
+                self._execute(self.ABORT)
+            except Exception:
+                self._logger.exception("Failed to abort the pending changes")
+            raise PendingChangesLost() from e
+
+    def _add_vlans(self, port_name: str, vlans: VlanSet) -> None:
+        self._added_vlans[port_name] = (
+            self._added_vlans.get(port_name, VlanSet()) | vlans
+        )
+
+    def _get_conf(self) -> IfaceConfig:
+        if self._conf is None:
+            self._conf = IfaceConfig(self._read_iface_conf())
+        return self._conf
+
+    def _get_unused_vlans(self, port_name: str) -> VlanSet:
+        """Return VLANs of the port that no other port uses."""
+        conf = self._get_conf()
+        vlans = conf.get_iface_vlans(port_name)
+        vlans |= self._added_vlans.get(port_name, VlanSet())
+        used_vlans = VlanSet()
+        for name, added_vlans in self._added_vlans.items():
+            if name != port_name:
+                used_vlans |= added_vlans
+
+        unused_vlans = []
+        for vlan_id in vlans - used_vlans:
+            excluded = {port_name, self.BRIDGE_NAME, get_vni_name(vlan_id)}
+            if not conf.get_vlan_ifaces(vlan_id) - excluded:
+                unused_vlans.append(vlan_id)
+        return VlanSet.from_ids(unused_vlans)
+
+    def _forget_vlans(self, port_name: str) -> None:
+        self._added_vlans.pop(port_name, None)
+        for iface in self._get_conf().get_ifaces(port_name):
+            iface.remove_access_vlan()
+            iface.remove_trunk_vlans()
+
+    @abstractmethod
+    def _get_remove_commands(self, port_name: str, vlans: str | None) -> list[Command]:
+        """Commands that remove the port from the bridge and the unused VLANs."""
+
+    def remove_vlan(self, port_name: str) -> None:
+        unused_vlans = self._get_unused_vlans(port_name)
+        vlans = ",".join(unused_vlans.to_values()) if unused_vlans else None
+        self._stage(self._get_remove_commands(port_name, vlans))
+        self._forget_vlans(port_name)
+
+    def remove_vlans(self, port_names: Iterable[str]) -> None:
+        for port_name in port_names:
+            self.remove_vlan(port_name)
+
+    def commit(self) -> str:
+        output = self._execute(self.COMMIT)
+        self._staged.clear()
+        return output
+
+    def abort(self) -> str:
+        self._staged.clear()
+        return self._execute(self.ABORT)
@@ -21,6 +21,25 @@ class NotSupports2VlanAwareBridges(CumulusCommandError):
         super().__init__(msg)
 
 
+class QinQNotSupported(CumulusCommandError):
+    def __init__(self, backend: str):
+        super().__init__(f"QinQ isn't supported by {backend} connectivity backend")
+
+
+class PendingChangesLost(CumulusCommandError):
+    def __init__(self):
+        super().__init__(
+            "Failed to stage the pending changes again, the transaction is aborted"
+        )
+
+
+class ResourceBusy(CumulusCommandError):
+    """Transient error, the command can succeed if it's retried later."""
+
+    def __init__(self):
+        super().__init__("Resource is busy")
+
+
 ERROR_MAP = {
     r"[Cc]ommand not found": CommandNotFound(),
     r"[Ee]rror:|ERROR:": CommandError(),
@@ -0,0 +1,31 @@
+from cloudshell.cli.command_template.command_template import CommandTemplate
+
+from cloudshell.cumulus.linux.command_templates import ERROR_MAP
+
+ADD_ACCESS_VLAN = CommandTemplate(
+    "net add interface {port_name} bridge access {vlan_id}", error_map=ERROR_MAP
+)
+ADD_TRUNK_VLANS = CommandTemplate(
+    "net add interface {port_name} bridge vids {vlans}", error_map=ERROR_MAP
+)
+DEL_ACCESS_VLAN = CommandTemplate(
+    "net del interface {port_name} bridge access", error_map=ERROR_MAP
+)
+DEL_TRUNK_VLANS = CommandTemplate(
+    "net del interface {port_name} bridge vids", error_map=ERROR_MAP
+)
+ADD_BRIDGE_PORT = CommandTemplate(
+    "net add bridge {bridge_name} ports {port_name}", error_map=ERROR_MAP
+)
+ADD_BRIDGE_VLANS = CommandTemplate(
+    "net add bridge {bridge_name} vids {vlans}", error_map=ERROR_MAP
+)
+DEL_BRIDGE_VLANS = CommandTemplate(
+    "net del bridge {bridge_name} vids {vlans}", error_map=ERROR_MAP
+)
+DEL_BRIDGE_PORT = CommandTemplate(
+    "net del bridge {bridge_name} ports {port_name}", error_map=ERROR_MAP
+)
+
+COMMIT = CommandTemplate("net commit", error_map=ERROR_MAP)
+ABORT = CommandTemplate("net abort", error_map=ERROR_MAP)
@@ -0,0 +1,24 @@
+from cloudshell.cli.command_template.command_template import CommandTemplate
+
+from cloudshell.cumulus.linux.command_templates import ERROR_MAP
+
+SET_ACCESS_VLAN = CommandTemplate(
+    "nv set interface {port_name} bridge domain {bridge_name} access {vlan_id}",
+    error_map=ERROR_MAP,
+)
+SET_TRUNK_VLANS = CommandTemplate(
+    "nv set interface {port_name} bridge domain {bridge_name} vlan {vlans}",
+    error_map=ERROR_MAP,
+)
+UNSET_BRIDGE_PORT = CommandTemplate(
+    "nv unset interface {port_name} bridge domain {bridge_name}", error_map=ERROR_MAP
+)
+SET_BRIDGE_VLANS = CommandTemplate(
+    "nv set bridge domain {bridge_name} vlan {vlans}", error_map=ERROR_MAP
+)
+UNSET_BRIDGE_VLANS = CommandTemplate(
+    "nv unset bridge domain {bridge_name} vlan {vlans}", error_map=ERROR_MAP
+)
+
+APPLY_CONFIG = CommandTemplate("nv config apply -y", error_map=ERROR_MAP)
+DETACH_CONFIG = CommandTemplate("nv config detach", error_map=ERROR_MAP)
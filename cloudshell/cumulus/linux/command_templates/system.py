@@ -3,12 +3,15 @@ from cloudshell.cli.command_template.command_template import CommandTemplate
 from cloudshell.cumulus.linux.command_templates import (
     ERROR_MAP,
     NotSupports2VlanAwareBridges,
+    ResourceBusy,
 )
 
 CURL_ERROR_MAP = {
     r"curl:|[Ff]ail|[Ee]rror": "Uploading/downloading file via CURL failed"
 }
 CURL_ERROR_MAP.update(ERROR_MAP)
+SED_ERROR_MAP = {r"sed: ": "Editing file via sed failed"}
+SED_ERROR_MAP.update(ERROR_MAP)
 
 
 CREATE_TEMP_FILE = CommandTemplate("mktemp", error_map=ERROR_MAP)
@@ -35,9 +38,14 @@ IF_RELOAD_ERROR_MAP = {
     r"[Oo]nly one object with attribute ['\"]bridge-vlan-aware yes['\"] allowed": (
         NotSupports2VlanAwareBridges()
     ),
+    # another ifreload/ifup is running or the netlink socket is busy
+    r"[Rr]esource (temporarily )?busy|[Aa]nother instance of this program": (
+        ResourceBusy()
+    ),
     **ERROR_MAP,
 }
 IF_RELOAD = CommandTemplate("ifreload -a", error_map=IF_RELOAD_ERROR_MAP)
+IF_UP = CommandTemplate("ifup {iface_names}", error_map=IF_RELOAD_ERROR_MAP)
 RESTART_SERVICE = CommandTemplate("service {name} restart", error_map=ERROR_MAP)
 START_SERVICE = CommandTemplate("service {name} start", error_map=ERROR_MAP)
 STOP_SERVICE = CommandTemplate("service {name} stop", error_map=ERROR_MAP)
@@ -51,6 +59,54 @@ CURL_DOWNLOAD_FILE = CommandTemplate(
 
 # if file don't have new line at the end last line will be lost when we remove prompt
 READ_FILE = CommandTemplate("cat {file_path} && echo", error_map=ERROR_MAP)
+# prints "==> file_path <==" before the content of each file
+READ_FILES = CommandTemplate(
+    "tail -v -n +1 {file_paths} 2>/dev/null; echo", error_map=ERROR_MAP
+)
+# regular files matching the glob patterns, one path per line
+LIST_FILES = CommandTemplate(
+    "find {file_paths} -maxdepth 0 -type f 2>/dev/null", error_map=ERROR_MAP
+)
+FILE_MD5 = CommandTemplate("md5sum {file_path}", error_map=ERROR_MAP)
+FILE_SIZE = CommandTemplate("stat -c %s {file_path}", error_map=ERROR_MAP)
+# base64 keeps the content out of the shell parsing and the error map patterns
+# the output is between the markers, the echo of the command can look like base64
+READ_BASE64_CHUNK = CommandTemplate(
+    'echo "{marker} begin" ; '
+    "dd if={file_path} bs={chunk_size} skip={index} count=1 2>/dev/null"
+    '[ | {compressor}] | base64 ; echo "{marker} end"',
+    error_map=ERROR_MAP,
+)
+# body starts with a new line and ends with the eof marker of the heredoc
+WRITE_BASE64_CHUNK = CommandTemplate(
+    "base64 -d[ | {decompressor}] {redirect} {file_path} <<{eof}{body}",
+    error_map=ERROR_MAP,
+)
+# keeps the owner and the mode of the destination file
+REPLACE_FILE = CommandTemplate(
+    "cat {src_file} > {dst_file} && rm -f {src_file}", error_map=ERROR_MAP
+)
+# copy of the file that the user can read over the file channel
+STAGE_FILE = CommandTemplate(
+    "install -m 600 -o {owner} {src_file} {dst_file}", error_map=ERROR_MAP
+)
+REMOVE_FILE = CommandTemplate("rm -f {file_path}", error_map=ERROR_MAP)
+EDIT_FILE = CommandTemplate("sed -i {sed_args} {file_path}", error_map=SED_ERROR_MAP)
+# journal of the files keeps their full paths inside the journal dir
+SAVE_JOURNAL = CommandTemplate(
+    "rm -rf {journal_dir} && mkdir -p {journal_dir} && "
+    "cp -p --parents {file_paths} {journal_dir}/",
+    error_map=ERROR_MAP,
+)
+RESTORE_JOURNAL = CommandTemplate(
+    "cp -rp {journal_dir}/. / && rm -rf {journal_dir}", error_map=ERROR_MAP
+)
+RECOVER_JOURNAL = CommandTemplate(
+    "if test -d {journal_dir}; then "
+    "cp -rp {journal_dir}/. / && rm -rf {journal_dir} && echo recovered; fi",
+    error_map=ERROR_MAP,
+)
+REMOVE_JOURNAL = CommandTemplate("rm -rf {journal_dir}", error_map=ERROR_MAP)
 WRITE_FILE = CommandTemplate('printf "{text}" > {file_path}', error_map=ERROR_MAP)
 
 SHUTDOWN = CommandTemplate("shutdown -h now", error_map=ERROR_MAP)
@@ -1,11 +1,31 @@
 from __future__ import annotations
 
+import posixpath
 import re
-from typing import ClassVar, Iterable
+from itertools import chain
+from typing import ClassVar, Iterable, Iterator, Union
 
 import attr
 
-from cloudshell.cumulus.linux.utils.cached_property import cached_property
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
+
+AUTO_PATTERN = re.compile(r"^auto\s+(?P<name>\S+)\s*$")
+IFACE_PATTERN = re.compile(r"^iface\s+(?P<name>\S+)")
+SETTING_PATTERN = re.compile(r"^\s+\S")
+SOURCE_PATTERN = re.compile(r"^source\s+(?P<path>\S+)", re.MULTILINE)
+SOURCE_DIR_PATTERN = re.compile(r"^source-directory\s+(?P<path>\S+)", re.MULTILINE)
+
+
+def get_source_patterns(text: str, base_dir: str) -> list[str]:
+    """Paths (glob patterns) of the files included by "source" directives.
+
+    Relative paths are relative to the directory of the file.
+    """
+    patterns = [m["path"] for m in SOURCE_PATTERN.finditer(text)]
+    patterns.extend(
+        posixpath.join(m["path"], "*") for m in SOURCE_DIR_PATTERN.finditer(text)
+    )
+    return [posixpath.join(base_dir, pattern) for pattern in patterns]
 
 
 class SettingName:
@@ -17,83 +37,115 @@ class SettingName:
     PORTS = "bridge-ports"
 
 
-@attr.s(auto_attribs=True, slots=True, repr=False)
+VLAN_SETTINGS = {SettingName.ACCESS_VLAN, SettingName.TRUNK_VLAN}
+# VLANs are set to the section of the iface that already has them
+DEFAULT_SETTING_NAMES = (SettingName.ACCESS_VLAN, SettingName.TRUNK_VLAN)
+# changing these settings changes the bridge itself, not only its members
+TOPOLOGY_SETTINGS = {SettingName.VLAN_AWARE, SettingName.VLAN_PROTOCOL}
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False, repr=False)
 class Setting:
-    priv_text: str
+    """Setting of the iface section, e.g. "bridge-vids 10 20".
+
+    The original line is rendered as is while the values are the original ones.
+    """
+
     iface: IfaceSection
-    _text: str = attr.ib(default="", init=False)
+    name: str
+    _values: tuple[str, ...]
+    _line: str | None = None
+    dirty: bool = True
+    _orig_values: tuple[str, ...] | None = None
+    # position in the parsed section
+    _position: int | None = None
 
-    @staticmethod
-    def _get_setting_line(name: str, values: Iterable[str]) -> str:
-        return f"    {name} {' '.join(values)}"
+    @classmethod
+    def parse(cls, line: str, iface: IfaceSection, position: int) -> Setting:
+        name, *values = line.split()
+        return cls(iface, name, tuple(values), line, False, tuple(values), position)
 
     @classmethod
     def create(cls, name: str, values: Iterable[str], iface: IfaceSection) -> Setting:
-        line = cls._get_setting_line(name, values)
-        setting = Setting(line, iface)
+        setting = cls(iface, name, tuple(values))
         iface.add_setting(setting)
         return setting
 
-    def __attrs_post_init__(self):
-        self._text = self.priv_text
-
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.text})"
 
     @property
     def text(self) -> str:
-        return self._text
-
-    @text.setter
-    def text(self, value: str) -> None:
-        self._text = value
-        self.iface.update_setting(self)
-        self.priv_text = self.text
-
-    @property
-    def _text_without_indent(self):
-        return self.text.lstrip(" ")
+        if self.dirty or self._line is None:
+            return f"    {self.name} {' '.join(self._values)}"
+        return self._line
 
     @property
-    def name(self) -> str:
-        return self._text_without_indent.split(" ", 1)[0]
-
-    @property
-    def values(self) -> tuple[str]:
-        return tuple(self._text_without_indent.split(" ")[1:])
+    def values(self) -> tuple[str, ...]:
+        return self._values
 
     @values.setter
     def values(self, vals: Iterable[str]) -> None:
-        self.text = self._get_setting_line(self.name, vals)
-        self.iface.update_setting(self)
+        self.iface.update_setting(self, tuple(vals))
+
+    def _set_values(self, values: tuple[str, ...]) -> None:
+        self._values = values
+        self.dirty = values != self._orig_values
 
+    def _restore_line(self, removed_setting: Setting) -> None:
+        """Take the line and the position of the removed setting, it's re-added."""
+        self._line = removed_setting._line
+        self._orig_values = removed_setting._orig_values
+        self._position = removed_setting._position
+        self.dirty = self._values != self._orig_values
 
-@attr.s(auto_attribs=True, slots=True, repr=False)
+
+@attr.s(auto_attribs=True, slots=True, eq=False, repr=False)
 class IfaceSection:
-    priv_text: str
-    iface_config: IfaceConfig
-    _text: str = attr.ib(default="", init=False)
+    """Section of the config that starts with "auto"/"iface" lines.
 
-    def __attrs_post_init__(self):
-        self._text = self.priv_text
+    File path is set if the section is in the included fragment.
+    Settings are kept in the order they are in the file, the index maps
+    a setting name to the first setting with this name. A removed setting
+    that is added again takes its place and its line back, so re-applying
+    the same VLANs doesn't change the text. The section notifies the config
+    about changes of the settings.
+    """
+
+    name: str
+    iface_config: IfaceConfig
+    _header: list[str]
+    file_path: str | None = None
+    _settings: list[Setting] = attr.ib(factory=list, init=False)
+    _index: dict[str, Setting] = attr.ib(factory=dict, init=False)
+    _removed: dict[str, Setting] = attr.ib(factory=dict, init=False)
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.text})"
 
     @property
     def text(self) -> str:
-        return self._text
+        return "\n".join((*self._header, *(setting.text for setting in self._settings)))
 
-    @text.setter
-    def text(self, value: str) -> None:
-        self._text = value
-        self.iface_config.update_iface(self)
-        self.priv_text = self.text
+    @classmethod
+    def parse(
+        cls,
+        name: str,
+        iface_config: IfaceConfig,
+        header: list[str],
+        lines: list[str],
+        file_path: str | None = None,
+    ) -> IfaceSection:
+        iface = cls(name, iface_config, header, file_path)
+        for position, line in enumerate(lines):
+            setting = Setting.parse(line, iface, position)
+            iface._settings.append(setting)
+            iface._index.setdefault(setting.name, setting)
+        return iface
 
     @classmethod
     def create_iface(cls, name: str, iface_config: IfaceConfig) -> IfaceSection:
-        text = f"auto {name}\niface {name}"
-        iface = cls(text, iface_config)
+        iface = cls(name, iface_config, [f"auto {name}", f"iface {name}"])
         iface_config.add_iface(iface)
         return iface
 
@@ -101,28 +153,67 @@ class IfaceSection:
     def create_bridge(cls, name: str, iface_config: IfaceConfig) -> IfaceSection:
         return cls.create_iface(name, iface_config)
 
-    @cached_property
-    def name(self) -> str:
-        return self.text.splitlines()[0].split(" ", 1)[-1]
-
     # CRUD settings
+    def iter_settings(self) -> Iterator[Setting]:
+        return iter(self._settings)
+
     def get_setting(self, name: str) -> Setting | None:
-        match = re.search(rf"^\s{{4}}{name}\s.+$", self.text, re.MULTILINE)
-        if not match:
-            return None
-        else:
-            return Setting(match.group(), self)
+        return self._index.get(name)
 
     def add_setting(self, setting: Setting) -> None:
-        self.text = f"{self.text}\n{setting.text}"
-
-    def update_setting(self, setting: Setting) -> None:
-        self.text = self.text.replace(setting.priv_text, setting.text)
+        old_vlans = self._get_vlans_if_changed(setting.name)
+        removed_setting = self._removed.pop(setting.name, None)
+        if removed_setting is not None:
+            setting._restore_line(removed_setting)
+        self._settings.insert(self._get_insert_index(setting), setting)
+        self._index.setdefault(setting.name, setting)
+        self._update_vlan_index(old_vlans)
+        self.iface_config.mark_changed(self.name, setting.name)
+
+    def _get_insert_index(self, setting: Setting) -> int:
+        """New settings are appended, parsed ones return to their place."""
+        if setting._position is not None:
+            for i, other in enumerate(self._settings):
+                if other._position is not None and other._position > setting._position:
+                    return i
+        return len(self._settings)
+
+    def update_setting(self, setting: Setting, values: tuple[str, ...]) -> None:
+        if setting.values != values:
+            old_vlans = self._get_vlans_if_changed(setting.name)
+            setting._set_values(values)
+            self._update_vlan_index(old_vlans)
+            self.iface_config.mark_changed(self.name, setting.name)
 
     def remove_setting(self, name: str) -> None:
-        setting = self.get_setting(name)
-        if setting:
-            self.text = self.text.replace(f"\n{setting.priv_text}", "")
+        setting = self._index.get(name)
+        if setting is not None:
+            old_vlans = self._get_vlans_if_changed(name)
+            self._settings.remove(setting)
+            self._removed[name] = setting
+            del self._index[name]
+            for other in self._settings:
+                if other.name == name:  # the name is duplicated in the section
+                    self._index[name] = other
+                    break
+            self._update_vlan_index(old_vlans)
+            self.iface_config.mark_changed(self.name, name)
+
+    def get_vlans(self) -> VlanSet:
+        vlans = self.get_trunk_vlans()
+        access_vlan = self.get_access_vlan()
+        if access_vlan:
+            vlans |= VlanSet.from_ids([access_vlan])
+        return vlans
+
+    def _get_vlans_if_changed(self, setting_name: str) -> VlanSet | None:
+        if setting_name in VLAN_SETTINGS:
+            return self.iface_config.get_iface_vlans(self.name)
+
+    def _update_vlan_index(self, old_vlans: VlanSet | None) -> None:
+        if old_vlans is not None:
+            new_vlans = self.iface_config.get_iface_vlans(self.name)
+            self.iface_config.update_vlan_index(self.name, old_vlans, new_vlans)
 
     # bridge settings
     def add_vlan_aware(self, vlan_aware: bool) -> None:
@@ -151,44 +242,39 @@ class IfaceSection:
 
     def get_access_vlan(self) -> str | None:
         setting = self.get_setting(SettingName.ACCESS_VLAN)
-        if setting:
+        if setting and setting.values:
             return setting.values[0]
 
     def remove_access_vlan(self):
         self.remove_setting(SettingName.ACCESS_VLAN)
 
     # VLAN trunk
-    def add_trunk_vlans(self, vlans: Iterable[str]) -> None:
+    def add_trunk_vlans(self, vlans: VlanSet) -> None:
         setting = self.get_setting(SettingName.TRUNK_VLAN)
         if setting:
-            try:
-                vlans = sorted({*setting.values, *vlans}, key=int)
-            except ValueError:
-                # can't sort, VLANs are not integers
-                vlans = list({*setting.values, *vlans})
-            setting.values = vlans
+            old_vlans = VlanSet.from_values(setting.values)
+            if vlans - old_vlans:
+                setting.values = (old_vlans | vlans).to_values()
         else:
-            Setting.create(SettingName.TRUNK_VLAN, sorted(vlans), self)
+            Setting.create(SettingName.TRUNK_VLAN, vlans.to_values(), self)
 
-    def remove_trunk_vlan(self, vlan_id: str | None = None) -> None:
-        if not vlan_id:
+    def remove_trunk_vlans(self, vlans: VlanSet | None = None) -> None:
+        if vlans is None:
             self.remove_setting(SettingName.TRUNK_VLAN)
         else:
             setting = self.get_setting(SettingName.TRUNK_VLAN)
             if setting:
-                vlans = setting.values
-                if vlan_id in vlans:
-                    vlans = list(vlans)
-                    vlans.remove(vlan_id)
-
-                    if vlans:
-                        setting.values = vlans
+                old_vlans = VlanSet.from_values(setting.values)
+                if old_vlans & vlans:
+                    new_vlans = old_vlans - vlans
+                    if new_vlans:
+                        setting.values = new_vlans.to_values()
                     else:
                         self.remove_setting(SettingName.TRUNK_VLAN)
 
-    def get_trunk_vlans(self) -> tuple[str]:
+    def get_trunk_vlans(self) -> VlanSet:
         setting = self.get_setting(SettingName.TRUNK_VLAN)
-        return getattr(setting, "values", [])
+        return VlanSet.from_values(getattr(setting, "values", ()))
 
     # VXLAN
     def set_vxlan(self, vlan_id: str) -> None:
@@ -208,67 +294,273 @@ class IfaceSection:
             Setting.create(SettingName.PORTS, [name], self)
 
     def remove_port(self, name: str) -> None:
+        self.remove_ports([name])
+
+    def remove_ports(self, names: Iterable[str]) -> None:
         setting = self.get_setting(SettingName.PORTS)
         if setting:
-            ports = setting.values
-            if name in ports:
-                ports = list(ports)
-                ports.remove(name)
-
+            names = set(names)
+            ports = [port for port in setting.values if port not in names]
+            if len(ports) != len(setting.values):
                 if ports:
                     setting.values = ports
                 else:
                     self.remove_setting(SettingName.PORTS)
 
 
-@attr.s(auto_attribs=True, slots=True, repr=False)
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class IfaceConfigSnapshot:
+    """Rendered state of the config, it's restored if a change fails."""
+
+    text: str
+    fragments: dict[str, str]
+    changed_settings: dict[str, frozenset[str]]
+    removed_ifaces: frozenset[str]
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False, repr=False)
 class IfaceConfig:
-    """Adds/removes VLANs to/from ports via editing /etc/network/interface file."""
+    """Adds/removes VLANs to/from ports via editing /etc/network/interface file.
+
+    The file is parsed once into a list of nodes - plain lines (comments, empty
+    lines, "source" directives, etc.) and iface sections, the sections are
+    indexed by the iface name. The text is rendered from the nodes on demand.
+    Fragments are included files, they are parsed the same way, their sections
+    are indexed together with the main file ones. An iface can have several
+    sections, e.g. in the main file and in a fragment, ifupdown2 merges them.
+    New sections are added to the main file.
+    VLAN index maps VLAN ID to the ifaces that use it as access or trunk VLAN
+    in any of their sections, the sections update it on every change of their
+    VLAN settings.
+    Names of changed settings are collected per iface to know what to reload.
+    Rendered texts are cached until the next change.
+    """
 
     BR_DEFAULT: ClassVar[str] = "br_default"
     BR_QINQ: ClassVar[str] = "br_qinq"
     orig_text: str
-    text: str = attr.ib(default="", init=False)
+    orig_fragments: dict[str, str] = attr.ib(factory=dict)
+    _nodes: list[Union[str, IfaceSection]] = attr.ib(factory=list, init=False)
+    _fragment_nodes: dict[str, list[Union[str, IfaceSection]]] = attr.ib(
+        factory=dict, init=False
+    )
+    _ifaces: dict[str, list[IfaceSection]] = attr.ib(factory=dict, init=False)
+    _vlan_index: dict[int, set[str]] = attr.ib(factory=dict, init=False)
+    _changed_settings: dict[str, set[str]] = attr.ib(factory=dict, init=False)
+    _removed_ifaces: set[str] = attr.ib(factory=set, init=False)
+    _text: str | None = attr.ib(default=None, init=False)
+    _fragment_texts: dict[str, str] | None = attr.ib(default=None, init=False)
 
     def __attrs_post_init__(self):
-        self.text = self.orig_text
+        self._load(self.orig_text, self.orig_fragments)
+
+    def _load(self, text: str, fragments: dict[str, str]) -> None:
+        self._invalidate()
+        self._nodes = []
+        self._fragment_nodes = {}
+        self._ifaces = {}
+        self._vlan_index = {}
+        self._parse(text.split("\n"), self._nodes)
+        for file_path, fragment_text in fragments.items():
+            nodes = self._fragment_nodes[file_path] = []
+            self._parse(fragment_text.split("\n"), nodes, file_path)
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.text})"
 
-    def get_iface(self, iface_name: str) -> IfaceSection | None:
-        pattern = re.compile(rf"auto {iface_name}\niface {iface_name}(\n\s{{4}}.+)*")
-        match = pattern.search(self.text)
-        if match:
-            return IfaceSection(match.group(), self)
+    @staticmethod
+    def _render(nodes: list[Union[str, IfaceSection]]) -> str:
+        return "\n".join(node if isinstance(node, str) else node.text for node in nodes)
+
+    def _invalidate(self) -> None:
+        self._text = None
+        self._fragment_texts = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._render(self._nodes)
+        return self._text
 
-    def get_or_create_iface(self, iface_name: str) -> IfaceSection:
-        iface = self.get_iface(iface_name)
+    @property
+    def fragments(self) -> dict[str, str]:
+        """Texts of all fragments by file path."""
+        if self._fragment_texts is None:
+            self._fragment_texts = {
+                file_path: self._render(nodes)
+                for file_path, nodes in self._fragment_nodes.items()
+            }
+        return dict(self._fragment_texts)
+
+    def get_snapshot(self) -> IfaceConfigSnapshot:
+        return IfaceConfigSnapshot(
+            self.text,
+            self.fragments,
+            {name: frozenset(names) for name, names in self._changed_settings.items()},
+            frozenset(self._removed_ifaces),
+        )
+
+    def restore(self, snapshot: IfaceConfigSnapshot) -> None:
+        """Parse the config from the snapshot, the original texts are kept."""
+        self._load(snapshot.text, snapshot.fragments)
+        self._changed_settings = {
+            name: set(names) for name, names in snapshot.changed_settings.items()
+        }
+        self._removed_ifaces = set(snapshot.removed_ifaces)
+
+    @property
+    def changed_fragments(self) -> dict[str, str]:
+        """Texts of the changed fragments by file path."""
+        return {
+            file_path: text
+            for file_path, text in self.fragments.items()
+            if text != self.orig_fragments[file_path]
+        }
+
+    def _get_nodes(self, file_path: str | None) -> list[Union[str, IfaceSection]]:
+        if file_path is None:
+            return self._nodes
+        return self._fragment_nodes[file_path]
+
+    def _parse(
+        self,
+        lines: list[str],
+        nodes: list[Union[str, IfaceSection]],
+        file_path: str | None = None,
+    ) -> None:
+        i = 0
+        while i < len(lines):
+            header = []
+            auto_match = AUTO_PATTERN.match(lines[i])
+            iface_match = IFACE_PATTERN.match(lines[i])
+            if auto_match and i + 1 < len(lines):
+                iface_match = IFACE_PATTERN.match(lines[i + 1])
+                if iface_match and iface_match["name"] == auto_match["name"]:
+                    header.append(lines[i])
+                    i += 1
+                else:
+                    iface_match = None
+
+            if not iface_match:
+                nodes.append(lines[i])
+                i += 1
+                continue
+
+            header.append(lines[i])
+            i += 1
+            start = i
+            while i < len(lines) and SETTING_PATTERN.match(lines[i]):
+                i += 1
+            iface = IfaceSection.parse(
+                iface_match["name"], self, header, lines[start:i], file_path
+            )
+            nodes.append(iface)
+            self._ifaces.setdefault(iface.name, []).append(iface)
+            try:
+                vlans = iface.get_vlans()
+            except ValueError:
+                continue  # invalid VLANs can't be in use, let the validator find it
+            self.update_vlan_index(iface.name, VlanSet(), vlans)
+
+    @property
+    def nodes(self) -> tuple[Union[str, IfaceSection], ...]:
+        """Plain lines and iface sections of the main file and then fragments."""
+        return (*self._nodes, *chain.from_iterable(self._fragment_nodes.values()))
+
+    @property
+    def changed_settings(self) -> dict[str, set[str]]:
+        """Names of changed settings by iface name."""
+        return self._changed_settings
+
+    @property
+    def removed_ifaces(self) -> set[str]:
+        return self._removed_ifaces
+
+    def mark_changed(self, iface_name: str, setting_name: str) -> None:
+        self._invalidate()
+        self._changed_settings.setdefault(iface_name, set()).add(setting_name)
+
+    def get_ifaces(self, iface_name: str) -> list[IfaceSection]:
+        """All sections of the iface in the main file and the fragments."""
+        return list(self._ifaces.get(iface_name, ()))
+
+    def get_iface(self, iface_name: str, *setting_names: str) -> IfaceSection | None:
+        """Section of the iface that holds the settings to change.
+
+        :param setting_names: the first section that has the first of these
+            settings is returned, VLAN settings by default; the first section
+            of the iface if none of them has the settings
+        """
+        ifaces = self._ifaces.get(iface_name)
+        if not ifaces:
+            return None
+        for setting_name in setting_names or DEFAULT_SETTING_NAMES:
+            for iface in ifaces:
+                if iface.get_setting(setting_name):
+                    return iface
+        return ifaces[0]
+
+    def get_or_create_iface(self, iface_name: str, *setting_names: str) -> IfaceSection:
+        iface = self.get_iface(iface_name, *setting_names)
         if not iface:
             iface = IfaceSection.create_iface(iface_name, self)
         return iface
 
-    def update_iface(self, iface: IfaceSection) -> None:
-        self.text = self.text.replace(iface.priv_text, iface.text)
+    def get_iface_vlans(self, iface_name: str) -> VlanSet:
+        """Union of VLANs of all sections of the iface."""
+        vlans = VlanSet()
+        for iface in self._ifaces.get(iface_name, ()):
+            vlans |= iface.get_vlans()
+        return vlans
 
     def add_iface(self, iface: IfaceSection) -> None:
-        self.text = f"{self.text}\n\n{iface.text}".strip("\n")
+        self._invalidate()
+        while self._nodes and self._nodes[-1] == "":
+            self._nodes.pop()
+        if self._nodes:
+            self._nodes.append("")
+        self._nodes.append(iface)
+        self._ifaces.setdefault(iface.name, []).append(iface)
 
     def remove_iface(self, iface_name: str) -> None:
-        iface = self.get_iface(iface_name)
-        if iface:
-            self.text = re.sub(rf"\n*{re.escape(iface.priv_text)}", "", self.text)
-
-    def is_vlan_used(self, vlan_id: str, exclude_bridges: bool) -> bool:
-        exclude_vin = rf"(?!vni-{vlan_id})"
-        iface_pattern = rf"{exclude_vin}\S+"
+        """Remove all sections of the iface."""
+        self._invalidate()
+        vlans = self.get_iface_vlans(iface_name)
+        ifaces = self._ifaces.pop(iface_name, ())
+        if ifaces:
+            self.update_vlan_index(iface_name, vlans, VlanSet())
+        for iface in ifaces:
+            nodes = self._get_nodes(iface.file_path)
+            start = nodes.index(iface)
+            end = start + 1
+            # remove empty lines that separate the section from the previous one
+            while start and nodes[start - 1] == "":
+                start -= 1
+            if not start:
+                while end < len(nodes) and nodes[end] == "":
+                    end += 1
+            del nodes[start:end]
+            self._changed_settings.pop(iface_name, None)
+            self._removed_ifaces.add(iface_name)
+
+    def update_vlan_index(
+        self, iface_name: str, old_vlans: VlanSet, new_vlans: VlanSet
+    ) -> None:
+        for vlan_id in old_vlans - new_vlans:
+            ifaces = self._vlan_index.get(vlan_id, set())
+            ifaces.discard(iface_name)
+            if not ifaces:
+                self._vlan_index.pop(vlan_id, None)
+        for vlan_id in new_vlans - old_vlans:
+            self._vlan_index.setdefault(vlan_id, set()).add(iface_name)
+
+    def get_vlan_ifaces(self, vlan_id: str | int) -> set[str]:
+        """Names of the ifaces that use the VLAN."""
+        return set(self._vlan_index.get(int(vlan_id), ()))
+
+    def is_vlan_used(self, vlan_id: str | int, exclude_bridges: bool) -> bool:
+        excluded = {f"vni-{vlan_id}"}
         if exclude_bridges:
-            iface_pattern = rf"(?!({self.BR_DEFAULT}|{self.BR_QINQ})){iface_pattern}"
-
-        pattern = re.compile(
-            rf"auto {iface_pattern}\n"
-            rf"iface {iface_pattern}"
-            rf"(\n\s{{4}}.+)*"
-            rf"\n\s{{4}}(bridge-access {vlan_id}|bridge-vids(\s\d+)*\s{vlan_id})"
-        )
-        return bool(pattern.search(self.text))
+            excluded.update((self.BR_DEFAULT, self.BR_QINQ))
+        ifaces = self._vlan_index.get(int(vlan_id), ())
+        return any(iface_name not in excluded for iface_name in ifaces)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from cloudshell.cumulus.linux.connectivity.iface_config_handler import (
+    SETTING_PATTERN,
+    IfaceConfig,
+    IfaceSection,
+    Setting,
+    SettingName,
+)
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
+
+MAX_VXLAN_ID = 16777214
+# VLANs 0 and 4095 are reserved
+USABLE_VLANS = VlanSet.from_values(["1-4094"])
+
+
+class InvalidIfaceConfig(ValueError):
+    def __init__(self, errors: Iterable[str]):
+        self.errors = sorted(errors)
+        super().__init__(f"Interfaces config is invalid: {'; '.join(self.errors)}")
+
+
+class MultipleVlanAwareBridges(InvalidIfaceConfig):
+    ...
+
+
+def _is_comment(line: str) -> bool:
+    return line.lstrip().startswith("#")
+
+
+def _check_vxlan_id(values: tuple[str, ...]) -> None:
+    if not 1 <= int(values[0]) <= MAX_VXLAN_ID:
+        raise ValueError
+
+
+def _check_vlans(
+    parse: Callable[[tuple[str, ...]], VlanSet]
+) -> Callable[[tuple[str, ...]], None]:
+    def check(values: tuple[str, ...]) -> None:
+        if parse(values) - USABLE_VLANS:
+            raise ValueError
+
+    return check
+
+
+def _check_choice(*choices: str) -> Callable[[tuple[str, ...]], None]:
+    def check(values: tuple[str, ...]) -> None:
+        if values[0] not in choices:
+            raise ValueError
+
+    return check
+
+
+# check raises ValueError if values are invalid, number of values to check
+_VALUE_CHECKS = {
+    SettingName.VLAN_AWARE: (_check_choice("yes", "no"), 1),
+    SettingName.VLAN_PROTOCOL: (_check_choice("802.1ad", "802.1q"), 1),
+    SettingName.ACCESS_VLAN: (_check_vlans(VlanSet.from_ids), 1),
+    SettingName.TRUNK_VLAN: (_check_vlans(VlanSet.from_values), None),
+    SettingName.VXLAN_ID: (_check_vxlan_id, 1),
+    SettingName.PORTS: (lambda values: None, None),
+}
+
+
+def _get_setting_errors(iface: IfaceSection, setting: Setting) -> list[str]:
+    errors = []
+    values = setting.values
+    if not values:
+        errors.append(f"{iface.name}: setting {setting.name} has no value")
+    elif setting.name in _VALUE_CHECKS:
+        check, values_count = _VALUE_CHECKS[setting.name]
+        if values_count is not None and len(values) != values_count:
+            errors.append(f"{iface.name}: {setting.name} has extra values {values}")
+        else:
+            try:
+                check(values)
+            except ValueError:
+                errors.append(f"{iface.name}: {setting.name} is invalid {values}")
+    return errors
+
+
+def get_iface_config_errors(conf: IfaceConfig) -> set[str]:
+    """Find problems in the config, except for multiple VLAN-aware bridges."""
+    errors = set()
+    iface_names = set()
+    for node in conf.nodes:
+        if isinstance(node, str):
+            if SETTING_PATTERN.match(node) and not _is_comment(node):
+                errors.add(f"setting outside of iface section: {node.strip()}")
+            continue
+
+        if node.name in iface_names:
+            errors.add(f"{node.name}: duplicate iface")
+        iface_names.add(node.name)
+
+        setting_names = set()
+        for setting in node.iter_settings():
+            if _is_comment(setting.text):
+                continue
+            if setting.name in setting_names and setting.name in _VALUE_CHECKS:
+                errors.add(f"{node.name}: duplicate setting {setting.name}")
+            setting_names.add(setting.name)
+            errors.update(_get_setting_errors(node, setting))
+    return errors
+
+
+def get_vlan_aware_bridges(conf: IfaceConfig) -> set[str]:
+    bridges = set()
+    for node in conf.nodes:
+        if isinstance(node, IfaceSection):
+            setting = node.get_setting(SettingName.VLAN_AWARE)
+            if setting and setting.values == ("yes",):
+                bridges.add(node.name)
+    return bridges
+
+
+def validate_iface_config(
+    conf: IfaceConfig,
+    orig_conf: IfaceConfig | None = None,
+    multiple_vlan_aware_bridges: bool = True,
+) -> None:
+    """Check the rendered config before uploading it to the device.
+
+    Problems that are already present in the original config are ignored,
+    the change shouldn't be rejected because of them.
+    :param multiple_vlan_aware_bridges: whether the device supports more than
+        one VLAN-aware bridge
+    """
+    errors = get_iface_config_errors(conf)
+    if orig_conf is not None:
+        errors -= get_iface_config_errors(orig_conf)
+    if errors:
+        raise InvalidIfaceConfig(errors)
+
+    if not multiple_vlan_aware_bridges:
+        bridges = get_vlan_aware_bridges(conf)
+        if len(bridges) > 1 and (
+            orig_conf is None or bridges - get_vlan_aware_bridges(orig_conf)
+        ):
+            names = ", ".join(sorted(bridges))
+            error = f"only one VLAN-aware bridge is supported: {names}"
+            raise MultipleVlanAwareBridges([error])
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+from typing import Iterable
+
 from cloudshell.cumulus.linux.connectivity.iface_config_handler import (
+    TOPOLOGY_SETTINGS,
     IfaceConfig,
+    IfaceConfigSnapshot,
     IfaceSection,
+    SettingName,
 )
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
 
 
-def get_vni_name(vlan_id: str) -> str:
+def get_vni_name(vlan_id: str | int) -> str:
     return f"vni-{vlan_id}"
 
 
@@ -14,8 +20,12 @@ class VlanConfHandler:
     DEFAULT_BRIDGE_NAME = "br_default"
     QINQ_BRIDGE_NAME = "br_qinq"
 
-    def __init__(self, orig_text: str):
-        self.conf = IfaceConfig(orig_text)
+    def __init__(self, orig_text: str, orig_fragments: dict[str, str] | None = None):
+        """VLAN config handler.
+
+        :param orig_fragments: texts of the included files by file path
+        """
+        self.conf = IfaceConfig(orig_text, orig_fragments or {})
 
     @property
     def text(self) -> str:
@@ -25,74 +35,122 @@ class VlanConfHandler:
     def orig_text(self) -> str:
         return self.conf.orig_text
 
+    @property
+    def is_changed(self) -> bool:
+        return self.conf.text != self.orig_text or bool(self.conf.changed_fragments)
+
+    @property
+    def changed_fragments(self) -> dict[str, str]:
+        return {
+            file_path: f"{text}\n"
+            for file_path, text in self.conf.changed_fragments.items()
+        }
+
+    @property
+    def orig_fragments(self) -> dict[str, str]:
+        return self.conf.orig_fragments
+
+    def get_snapshot(self) -> IfaceConfigSnapshot:
+        return self.conf.get_snapshot()
+
+    def restore(self, snapshot: IfaceConfigSnapshot) -> None:
+        self.conf.restore(snapshot)
+
+    def get_ifaces_to_reload(self) -> list[str] | None:
+        """Names of changed ifaces or None if all ifaces have to be reloaded.
+
+        Removed ifaces and changed bridge topology can't be applied by
+        bringing up only the changed ifaces.
+        """
+        if self.conf.removed_ifaces:
+            return None
+        for setting_names in self.conf.changed_settings.values():
+            if setting_names & TOPOLOGY_SETTINGS:
+                return None
+        return sorted(self.conf.changed_settings)
+
     def prepare_bridge(self, qinq: bool) -> None:
         bridge_name = self.QINQ_BRIDGE_NAME if qinq else self.DEFAULT_BRIDGE_NAME
-        bridge = self.conf.get_iface(bridge_name)
+        bridge = self.conf.get_iface(bridge_name, SettingName.VLAN_AWARE)
         if not bridge:
             bridge = IfaceSection.create_bridge(bridge_name, self.conf)
         bridge.add_vlan_aware(True)
         if qinq:
+            bridge = self.conf.get_iface(bridge_name, SettingName.VLAN_PROTOCOL)
             bridge.add_vlan_protocol_qinq()
 
     def remove_vlan(self, port_name: str) -> None:
-        default_bridge = self.conf.get_iface(self.DEFAULT_BRIDGE_NAME)
-        qinq_bridge = self.conf.get_iface(self.QINQ_BRIDGE_NAME)
-        iface = self.conf.get_iface(port_name)
-        vlans_to_remove = set()
-
-        if iface:
-            vlan_id = iface.get_access_vlan()
-            if vlan_id:
+        self.remove_vlans([port_name])
+
+    def remove_vlans(self, port_names: Iterable[str]) -> None:
+        """Remove all VLANs from the ports and the ports from the bridges.
+
+        VLANs are removed from all sections of the ifaces.
+        """
+        port_names = list(port_names)
+        bridges = [
+            *self.conf.get_ifaces(self.DEFAULT_BRIDGE_NAME),
+            *self.conf.get_ifaces(self.QINQ_BRIDGE_NAME),
+        ]
+        qinq_bridges = self.conf.get_ifaces(self.QINQ_BRIDGE_NAME)
+        vlans_to_remove = VlanSet()
+
+        for port_name in port_names:
+            for iface in self.conf.get_ifaces(port_name):
+                vlans_to_remove |= iface.get_vlans()
                 iface.remove_access_vlan()
-                vlans_to_remove.add(vlan_id)
-            vlans_to_remove.update(iface.get_trunk_vlans())
-            iface.remove_trunk_vlan()
-
-        for vlan_id in vlans_to_remove:
-            if not self.conf.is_vlan_used(vlan_id, exclude_bridges=True):
-                if default_bridge:
-                    default_bridge.remove_trunk_vlan(vlan_id)
-
-                vni_name = get_vni_name(vlan_id)
+                iface.remove_trunk_vlans()
+
+        unused_vlans = VlanSet.from_ids(
+            vlan_id
+            for vlan_id in vlans_to_remove
+            if not self.conf.is_vlan_used(vlan_id, exclude_bridges=True)
+        )
+        if unused_vlans:
+            for bridge in bridges:
+                bridge.remove_trunk_vlans(unused_vlans)
+
+            vni_names = [get_vni_name(vlan_id) for vlan_id in unused_vlans]
+            for vni_name in vni_names:
                 self.conf.remove_iface(vni_name)
-                if qinq_bridge:
-                    qinq_bridge.remove_port(vni_name)
-                    qinq_bridge.remove_trunk_vlan(vlan_id)
+            for bridge in qinq_bridges:
+                bridge.remove_ports(vni_names)
 
-        if default_bridge:
-            default_bridge.remove_port(port_name)
-        if qinq_bridge:
-            qinq_bridge.remove_port(port_name)
+        for bridge in bridges:
+            bridge.remove_ports(port_names)
 
     def add_access_vlan(self, port_name: str, vlan_id: str, qinq: bool) -> None:
-        iface = self.conf.get_or_create_iface(port_name)
+        iface = self.conf.get_or_create_iface(
+            port_name, SettingName.ACCESS_VLAN, SettingName.TRUNK_VLAN
+        )
         iface.set_access_vlan(vlan_id)
-
-        bridge_name = self.QINQ_BRIDGE_NAME if qinq else self.DEFAULT_BRIDGE_NAME
-        bridge = self.conf.get_iface(bridge_name)
-        bridge.add_trunk_vlans([vlan_id])
-        bridge.add_port(port_name)
-
-        if qinq:
-            vni_name = self._add_vni(vlan_id)
-            bridge.add_port(vni_name)
+        self._add_to_bridge(port_name, VlanSet.from_ids([vlan_id]), qinq)
 
     def add_trunk_vlan(self, port_name: str, vlans: list[str], qinq: bool) -> None:
-        iface = self.conf.get_or_create_iface(port_name)
+        """Add trunk VLANs to the port.
+
+        :param vlans: VLAN IDs and ranges, e.g. ["10-20", "30"]
+        """
+        vlans = VlanSet.from_values(vlans)
+        iface = self.conf.get_or_create_iface(
+            port_name, SettingName.TRUNK_VLAN, SettingName.ACCESS_VLAN
+        )
         iface.add_trunk_vlans(vlans)
+        self._add_to_bridge(port_name, vlans, qinq)
 
+    def _add_to_bridge(self, port_name: str, vlans: VlanSet, qinq: bool) -> None:
         bridge_name = self.QINQ_BRIDGE_NAME if qinq else self.DEFAULT_BRIDGE_NAME
-        bridge = self.conf.get_iface(bridge_name)
-        bridge.add_trunk_vlans(vlans)
+        self.conf.get_iface(bridge_name, SettingName.TRUNK_VLAN).add_trunk_vlans(vlans)
+        bridge = self.conf.get_iface(bridge_name, SettingName.PORTS)
         bridge.add_port(port_name)
 
         if qinq:
-            vni_name = self._add_vni(vlans[0])  # QinQ only supports one VLAN
+            vni_name = self._add_vni(next(iter(vlans)))  # QinQ only supports one VLAN
             bridge.add_port(vni_name)
 
-    def _add_vni(self, vlan_id: str) -> str:
+    def _add_vni(self, vlan_id: str | int) -> str:
         vni_name = get_vni_name(vlan_id)
         vni = self.conf.get_or_create_iface(vni_name)
-        vni.set_access_vlan(vlan_id)
-        vni.set_vxlan(vlan_id)
+        vni.set_access_vlan(str(vlan_id))
+        vni.set_vxlan(str(vlan_id))
         return vni_name
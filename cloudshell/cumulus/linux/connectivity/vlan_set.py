@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import attr
+
+MAX_VLAN_ID = 4095
+MIN_RANGE_LEN = 3  # shorter ranges take the same space as separate VLANs
+
+
+def _parse_vlan_id(value: str | int) -> int:
+    vlan_id = int(value)
+    if not 0 <= vlan_id <= MAX_VLAN_ID:
+        raise ValueError(f"VLAN ID {vlan_id} is out of range")
+    return vlan_id
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True, repr=False)
+class VlanSet:
+    """Set of VLAN IDs stored as a 4096-bit bitmap."""
+
+    bitmap: int = 0
+
+    @classmethod
+    def from_ids(cls, vlan_ids: Iterable[str | int]) -> VlanSet:
+        bitmap = 0
+        for vlan_id in vlan_ids:
+            bitmap |= 1 << _parse_vlan_id(vlan_id)
+        return cls(bitmap)
+
+    @classmethod
+    def from_values(cls, values: Iterable[str]) -> VlanSet:
+        """Create a set from VLAN IDs and ranges, e.g. ["10-20", "30"]."""
+        bitmap = 0
+        for value in values:
+            start, _, end = value.partition("-")
+            start, end = sorted(map(_parse_vlan_id, (start, end or start)))
+            bitmap |= ((1 << (end - start + 1)) - 1) << start
+        return cls(bitmap)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self)!r})"
+
+    def __str__(self) -> str:
+        return " ".join(self.to_values())
+
+    def __or__(self, other: VlanSet) -> VlanSet:
+        return VlanSet(self.bitmap | other.bitmap)
+
+    def __sub__(self, other: VlanSet) -> VlanSet:
+        return VlanSet(self.bitmap & ~other.bitmap)
+
+    def __and__(self, other: VlanSet) -> VlanSet:
+        return VlanSet(self.bitmap & other.bitmap)
+
+    def __bool__(self) -> bool:
+        return bool(self.bitmap)
+
+    def __len__(self) -> int:
+        return bin(self.bitmap).count("1")
+
+    def __contains__(self, vlan_id: str | int) -> bool:
+        return bool(self.bitmap >> int(vlan_id) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        bitmap = self.bitmap
+        while bitmap:
+            lowest_bit = bitmap & -bitmap
+            yield lowest_bit.bit_length() - 1
+            bitmap ^= lowest_bit
+
+    def iter_ranges(self) -> Iterator[tuple[int, int]]:
+        bitmap = self.bitmap
+        while bitmap:
+            start = (bitmap & -bitmap).bit_length() - 1
+            # adding the lowest bit of the run clears the whole run
+            run_end_bit = (bitmap + (1 << start)) & ~bitmap
+            end = run_end_bit.bit_length() - 2
+            yield start, end
+            bitmap &= ~((1 << (end + 1)) - 1)
+
+    def to_values(self) -> list[str]:
+        """Render VLANs as IDs and ranges, e.g. ["10-20", "30"]."""
+        values = []
+        for start, end in self.iter_ranges():
+            if end - start + 1 >= MIN_RANGE_LEN:
+                values.append(f"{start}-{end}")
+            else:
+                values.extend(map(str, range(start, end + 1)))
+        return values
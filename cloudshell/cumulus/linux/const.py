@@ -1,4 +1,8 @@
 DEFAULT_VIEW_NAME = "Quali"
 SNMP_CONF_PATH = "/etc/snmp/snmpd.conf"
 IFACE_CONF_PATH = "/etc/network/interfaces"
+# copies of the files that are being changed, kept until the change is applied
+JOURNAL_DIR = "/etc/network/.cloudshell_journal"
 SNMP_SERVICE_NAME = "snmpd"
+# read timeout of the CLI session, seconds
+DEFAULT_RELOAD_TIMEOUT = 30
@@ -132,10 +132,7 @@ class ConfigurationFlow(AbstractConfigurationFlow):
     def _backup_to_tar_file(self, sys_act: SystemActions) -> str:
         self._logger.info("Creating backup files")
         backup_dir = sys_act.create_tmp_dir()
-        for conf_folder in CONF_FOLDERS:
-            sys_act.copy_folder(src_folder=conf_folder, dst_folder=backup_dir)
-        for conf_file in CONF_FILES:
-            sys_act.copy_file(src_file=conf_file, dst_folder=backup_dir)
+        sys_act.copy_to_folder(CONF_FOLDERS, CONF_FILES, backup_dir)
 
         self._logger.info(
             f"Compressing backup directory '{backup_dir}' to .tar archive"
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from typing import Sequence, Union
+
+import attr
+
+from cloudshell.cumulus.linux.flows.connectivity_flow import CumulusConnectivityFlow
+
+ConnectivityResult = Union[str, BaseException]
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class ConnectivityEngine:
+    """Applies connectivity requests to several devices concurrently.
+
+    CLI sessions are blocking, so every flow runs in a worker thread and the
+    event loop only waits for them, no more than max_concurrency at a time.
+    """
+
+    _logger: Logger
+    max_concurrency: int = 8
+
+    def __attrs_post_init__(self):
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency should be positive")
+
+    async def apply_connectivity(
+        self, requests: Sequence[tuple[CumulusConnectivityFlow, str]]
+    ) -> list[ConnectivityResult]:
+        """Apply requests, each one with its own device flow.
+
+        Returns responses in the order of the requests; if the flow raised
+        an exception it's returned instead of the response.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        max_workers = min(self.max_concurrency, len(requests)) or 1
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+            async def apply(flow: CumulusConnectivityFlow, request: str) -> str:
+                async with semaphore:
+                    return await loop.run_in_executor(
+                        executor, flow.apply_connectivity, request
+                    )
+
+            start = time.monotonic()
+            results = await asyncio.gather(
+                *(apply(flow, request) for flow, request in requests),
+                return_exceptions=True,
+            )
+
+        duration = time.monotonic() - start
+        failed = sum(isinstance(result, BaseException) for result in results)
+        self._logger.info(
+            f"Applied connectivity to {len(requests)} devices in {duration:.3f}s, "
+            f"{failed} failed"
+        )
+        return list(results)
+
+    def apply_connectivity_sync(
+        self, requests: Sequence[tuple[CumulusConnectivityFlow, str]]
+    ) -> list[ConnectivityResult]:
+        """Run apply_connectivity in a new event loop."""
+        return asyncio.run(self.apply_connectivity(requests))
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import difflib
+import posixpath
+import time
+from concurrent import futures as ft
 from logging import Logger
-from threading import Lock
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Iterable, Union
+
+import attr
 
 from cloudshell.shell.flows.connectivity.basic_flow import AbstractConnectivityFlow
+from cloudshell.shell.flows.connectivity.helpers.remove_vlans import (
+    prepare_remove_vlan_actions,
+)
 from cloudshell.shell.flows.connectivity.helpers.vlan_helper import get_vlan_list
 from cloudshell.shell.flows.connectivity.models.connectivity_model import (
     ConnectionModeEnum,
@@ -17,18 +25,93 @@ from cloudshell.shell.flows.connectivity.parse_request_service import (
     AbstractParseConnectivityService,
 )
 
+from cloudshell.cumulus.linux import BaseCumulusError
+from cloudshell.cumulus.linux.cli.file_channel import get_file_channel
 from cloudshell.cumulus.linux.cli.handler import CumulusCliConfigurator
-from cloudshell.cumulus.linux.command_actions.system import SystemActions
-from cloudshell.cumulus.linux.command_templates import CumulusCommandError
+from cloudshell.cumulus.linux.command_actions.nclu import NcluVlanActions
+from cloudshell.cumulus.linux.command_actions.nvue import NvueVlanActions
+from cloudshell.cumulus.linux.command_actions.system import (
+    READ_CHUNK_SIZE,
+    WRITE_CHUNK_SIZE,
+    SystemActions,
+    get_chunks_count,
+)
+from cloudshell.cumulus.linux.command_templates import (
+    CumulusCommandError,
+    NotSupports2VlanAwareBridges,
+    PendingChangesLost,
+)
+from cloudshell.cumulus.linux.connectivity.iface_config_handler import (
+    IfaceConfig,
+    get_source_patterns,
+)
+from cloudshell.cumulus.linux.connectivity.iface_config_validator import (
+    InvalidIfaceConfig,
+    validate_iface_config,
+)
 from cloudshell.cumulus.linux.connectivity.vlan_config_handler import VlanConfHandler
+from cloudshell.cumulus.linux.const import DEFAULT_RELOAD_TIMEOUT, IFACE_CONF_PATH
+from cloudshell.cumulus.linux.utils.counters import CounterName, counters
+from cloudshell.cumulus.linux.utils.device_lock import DeviceLock, get_device_lock
+from cloudshell.cumulus.linux.utils.file_cache import file_cache, get_text_md5
+from cloudshell.cumulus.linux.utils.latency_history import get_latency_history
+from cloudshell.cumulus.linux.utils.read_cache import read_cache
+from cloudshell.cumulus.linux.utils.text_patch import get_sed_args, get_sed_expressions
 
 if TYPE_CHECKING:
+    from cloudshell.cli.service.cli_service import CliService
     from cloudshell.shell.standards.networking.resource_config import (
         NetworkingResourceConfig,
     )
 
+# addresses of devices that failed to reload config with 2 VLAN-aware bridges
+_single_vlan_aware_bridge_devices: set[str] = set()
+
+VlanHandler = Union[VlanConfHandler, NcluVlanActions, NvueVlanActions]
+TransactionActions = Union[NcluVlanActions, NvueVlanActions]
+
+
+class ConfigRollbackFailed(BaseCumulusError):
+    def __init__(self):
+        super().__init__(
+            "Failed to roll back the VLAN changes, the config could be left changed"
+        )
+
+
+class ConnectivityBackend:
+    FILE = "file"  # edit /etc/network/interfaces and reload it
+    NCLU = "nclu"  # net add/del ... and net commit, Cumulus 3.x/4.x
+    NVUE = "nvue"  # nv set/unset ... and nv config apply, Cumulus 5.x
+
+
+_TRANSACTION_ACTIONS = {
+    ConnectivityBackend.NCLU: NcluVlanActions,
+    ConnectivityBackend.NVUE: NvueVlanActions,
+}
+
+
+@attr.s(auto_attribs=True, slots=True)
+class ConnectivityPlan:
+    """Predicted result of applying connectivity actions.
 
-lock = Lock()
+    reload_ifaces is None if all ifaces would be reloaded.
+    """
+
+    diff: str = ""
+    reload_ifaces: set[str] | None = attr.ib(factory=set)
+    round_trips: int = 0
+    failed_actions: dict[str, str] = attr.ib(factory=dict)
+
+
+def _get_diff(file_path: str, orig_text: str, text: str) -> str:
+    lines = difflib.unified_diff(
+        orig_text.split("\n"),
+        text.split("\n"),
+        f"a{file_path}",
+        f"b{file_path}",
+        lineterm="",
+    )
+    return "".join(f"{line}\n" for line in lines)
 
 
 class CumulusConnectivityFlow(AbstractConnectivityFlow):
@@ -39,62 +122,660 @@ class CumulusConnectivityFlow(AbstractConnectivityFlow):
         logger: Logger,
         resource_config: NetworkingResourceConfig,
         cli_configurator: CumulusCliConfigurator,
+        batch_actions: bool = False,
+        cache_iface_conf: bool = False,
+        patch_iface_conf: bool = False,
+        targeted_reload: bool = False,
+        validate_iface_conf: bool = False,
+        include_iface_fragments: bool = False,
+        backend: str = ConnectivityBackend.FILE,
+        journal_iface_conf: bool = False,
+        reload_retries: int = 0,
+        adaptive_reload_timeout: bool = False,
+        sftp_file_transfer: bool = False,
+        cache_reads: bool = False,
+        chunked_file_transfer: bool = False,
     ):
+        """Connectivity flow.
+
+        :param batch_actions: apply all actions of the request to the config in one
+            read/modify/write/reload cycle instead of one cycle per action
+        :param cache_iface_conf: keep the last known interfaces file in memory and
+            read it from the device only if its MD5 sum changed
+        :param patch_iface_conf: upload only changed lines of the interfaces file
+            and verify the result by MD5 sum instead of writing the whole file
+        :param targeted_reload: bring up only changed interfaces instead of
+            reloading all of them, if the change allows it
+        :param validate_iface_conf: check the new interfaces file locally and
+            reject invalid changes before uploading them
+        :param include_iface_fragments: load files included into the interfaces
+            file by "source" directives, write only changed files
+        :param backend: one of ConnectivityBackend, NCLU and NVUE backends apply
+            all actions of the request in one transaction, options of the
+            interfaces file don't affect them
+        :param journal_iface_conf: copy the files to the journal on the device
+            before changing them, roll back from it and recover the files left
+            there by an interrupted change
+        :param reload_retries: how many times to retry reloading of the interfaces
+            if the resource is busy, with exponential backoff
+        :param adaptive_reload_timeout: set the timeout of reloading by the
+            history of its durations on the device instead of the session default
+        :param sftp_file_transfer: read and write the interfaces file over SFTP
+            with the CLI credentials, the CLI is used only for commands
+        :param cache_reads: reuse the interfaces file read by recent flows for
+            a few seconds, changes of the file made by the driver invalidate it
+        :param chunked_file_transfer: read and write the interfaces file and its
+            fragments over the CLI by base64 chunks with MD5 check instead of
+            cat and printf, SFTP takes precedence
+        """
         super().__init__(parse_connectivity_request_service, logger)
         self._resource_config = resource_config
         self._cli_configurator = cli_configurator
+        self._batch_actions = batch_actions
+        self._cache_iface_conf = cache_iface_conf
+        self._patch_iface_conf = patch_iface_conf
+        self._targeted_reload = targeted_reload
+        self._validate_iface_conf = validate_iface_conf
+        self._include_iface_fragments = include_iface_fragments
+        if backend != ConnectivityBackend.FILE and backend not in _TRANSACTION_ACTIONS:
+            raise ValueError(f"Unknown connectivity backend {backend}")
+        self._backend = backend
+        self._journal_iface_conf = journal_iface_conf
+        self._reload_retries = reload_retries
+        self._adaptive_reload_timeout = adaptive_reload_timeout
+        self._sftp_file_transfer = sftp_file_transfer
+        self._cache_reads = cache_reads
+        self._chunked_file_transfer = chunked_file_transfer
+
+    @property
+    def _lock(self) -> DeviceLock:
+        return get_device_lock(self._resource_config.address)
 
     @staticmethod
     def _get_port_name(action: ConnectivityActionModel) -> str:
         return action.action_target.name.split("/")[-1]
 
+    def _get_sys_actions(self, cli_service: CliService) -> SystemActions:
+        file_channel = None
+        if self._sftp_file_transfer:
+            file_channel = get_file_channel(self._resource_config)
+        return SystemActions(
+            cli_service,
+            self._logger,
+            self._resource_config.address,
+            file_channel,
+            read_cache if self._cache_reads else None,
+            self._chunked_file_transfer,
+        )
+
+    def _get_reload_timeout(self, name: str) -> float | None:
+        if not self._adaptive_reload_timeout:
+            return None
+        history = get_latency_history(self._resource_config.address, name)
+        return history.get_timeout(DEFAULT_RELOAD_TIMEOUT)
+
+    def _get_iface_conf(self, sys_actions: SystemActions) -> str:
+        if not self._cache_iface_conf:
+            return sys_actions.get_iface_conf()
+
+        address = self._resource_config.address
+        md5 = sys_actions.get_iface_conf_md5()
+        conf_text = file_cache.get(address, IFACE_CONF_PATH, md5)
+        if conf_text is None:
+            # the file is changed, the result of the read cache can be stale
+            conf_text = sys_actions.get_iface_conf(refresh=True)
+            file_cache.put(address, IFACE_CONF_PATH, md5, conf_text)
+        else:
+            self._logger.debug("Interfaces file isn't changed, using cached one")
+        return conf_text
+
+    def _get_vlan_handler(self, cli_service: CliService) -> VlanHandler:
+        actions_class = _TRANSACTION_ACTIONS.get(self._backend)
+        if actions_class:
+            sys_actions = self._get_sys_actions(cli_service)
+            return actions_class(
+                cli_service, self._logger, lambda: self._get_iface_conf(sys_actions)
+            )
+        return self._load_vlan_handler(self._get_sys_actions(cli_service))
+
+    def _save_vlan_handler(
+        self, cli_service: CliService, vlan_handler: VlanHandler
+    ) -> None:
+        if isinstance(vlan_handler, VlanConfHandler):
+            sys_actions = self._get_sys_actions(cli_service)
+            self._upload_new_conf(sys_actions, vlan_handler)
+        else:
+            self._commit_transaction(vlan_handler)
+
+    def _commit_transaction(self, vlan_actions: TransactionActions) -> None:
+        start = time.monotonic()
+        if self._cache_reads:
+            # the transaction rewrites the interfaces file
+            read_cache.invalidate(self._resource_config.address)
+        try:
+            vlan_actions.commit()
+        except CumulusCommandError:
+            try:
+                vlan_actions.abort()
+            except Exception as e:
+                raise ConfigRollbackFailed() from e
+            raise
+        duration = time.monotonic() - start
+        self._logger.debug(f"Committed {self._backend} transaction in {duration:.3f}s")
+
+    def _load_vlan_handler(self, sys_actions: SystemActions) -> VlanConfHandler:
+        if self._journal_iface_conf and sys_actions.recover_journal():
+            self._logger.warning(
+                "Previous change of the interfaces config was interrupted, "
+                "the files are restored from the journal"
+            )
+            self._reload_ifaces(sys_actions, None)
+        conf_text = self._get_iface_conf(sys_actions)
+        fragments = None
+        if self._include_iface_fragments:
+            base_dir = posixpath.dirname(IFACE_CONF_PATH)
+            patterns = get_source_patterns(conf_text, base_dir)
+            if patterns:
+                fragments = sys_actions.get_files(patterns)
+        return VlanConfHandler(conf_text, fragments)
+
+    def _upload_iface_conf(
+        self, sys_actions: SystemActions, text: str, prev_text: str
+    ) -> None:
+        address = self._resource_config.address
+        if self._cache_iface_conf:
+            file_cache.invalidate(address, IFACE_CONF_PATH)
+
+        md5 = None
+        if self._patch_iface_conf and prev_text:
+            md5 = self._edit_iface_conf(sys_actions, text, prev_text)
+        if md5 is None:
+            sys_actions.upload_iface_conf(text)
+            md5 = get_text_md5(text)
+
+        if self._cache_iface_conf:
+            # the same text as get_iface_conf would return
+            file_cache.put(address, IFACE_CONF_PATH, md5, text.strip())
+
+    def _edit_iface_conf(
+        self, sys_actions: SystemActions, text: str, prev_text: str
+    ) -> str | None:
+        """Change only modified lines of the file, returns MD5 sum if succeeded."""
+        sed_args = self._get_sed_args(text, prev_text)
+        if sed_args is None:
+            return None
+
+        if sed_args:
+            sys_actions.edit_iface_conf(sed_args)
+        # sed always ends the file with a new line
+        md5 = get_text_md5(text if text.endswith("\n") else f"{text}\n")
+        if sys_actions.get_iface_conf_md5() != md5:
+            self._logger.warning(
+                "Interfaces file differs from the expected one after editing, "
+                "uploading the whole file"
+            )
+            return None
+        return md5
+
     @staticmethod
+    def _get_sed_args(text: str, prev_text: str) -> str | None:
+        """Sed arguments to edit the file, None if it's better to upload it."""
+        expressions = get_sed_expressions(prev_text, text)
+        if expressions is None:
+            return None
+        sed_args = get_sed_args(expressions)
+        if len(sed_args) >= len(text):
+            return None
+        return sed_args
+
+    @staticmethod
+    def _is_main_conf_changed(vlan_handler: VlanConfHandler) -> bool:
+        return vlan_handler.conf.text != vlan_handler.orig_text
+
     def _upload_new_conf(
-        sys_actions: SystemActions, vlan_handler: VlanConfHandler
+        self, sys_actions: SystemActions, vlan_handler: VlanConfHandler
     ) -> None:
-        sys_actions.upload_iface_conf(vlan_handler.text)
+        if not vlan_handler.is_changed:
+            self._logger.debug("Interfaces config isn't changed, skip upload/reload")
+            counters.incr(CounterName.NO_OP_SKIPPED)
+            return
+        if self._validate_iface_conf:
+            self._validate_new_conf(vlan_handler)
+
+        iface_names = None
+        if self._targeted_reload:
+            iface_names = vlan_handler.get_ifaces_to_reload()
+
+        fragments = vlan_handler.changed_fragments
+        is_main_changed = self._is_main_conf_changed(vlan_handler)
+        if self._journal_iface_conf:
+            file_paths = [*fragments]
+            if is_main_changed:
+                file_paths.insert(0, IFACE_CONF_PATH)
+            sys_actions.save_journal(file_paths)
         try:
-            sys_actions.if_reload()
-        except CumulusCommandError:
-            sys_actions.upload_iface_conf(vlan_handler.orig_text)
-            sys_actions.if_reload()
+            if is_main_changed:
+                self._upload_iface_conf(
+                    sys_actions, vlan_handler.text, vlan_handler.orig_text
+                )
+            for file_path, text in fragments.items():
+                sys_actions.upload_file(file_path, text)
+            self._reload_ifaces(sys_actions, iface_names)
+        except Exception as e:
+            if isinstance(e, NotSupports2VlanAwareBridges):
+                _single_vlan_aware_bridge_devices.add(self._resource_config.address)
+            try:
+                self._rollback_conf(sys_actions, vlan_handler, is_main_changed)
+            except Exception as rollback_error:
+                raise ConfigRollbackFailed() from rollback_error
             raise
+        if self._journal_iface_conf:
+            sys_actions.remove_journal()
 
-    def _set_vlan(self, action: ConnectivityActionModel) -> ConnectivityActionResult:
+    def _rollback_conf(
+        self,
+        sys_actions: SystemActions,
+        vlan_handler: VlanConfHandler,
+        is_main_changed: bool,
+    ) -> None:
+        if self._journal_iface_conf:
+            sys_actions.restore_journal()
+        else:
+            if is_main_changed:
+                self._upload_iface_conf(
+                    sys_actions, vlan_handler.orig_text, vlan_handler.text
+                )
+            for file_path in vlan_handler.changed_fragments:
+                sys_actions.upload_file(
+                    file_path, vlan_handler.orig_fragments[file_path]
+                )
+        self._reload_ifaces(sys_actions, None)
+
+    def _validate_new_conf(self, vlan_handler: VlanConfHandler) -> None:
+        address = self._resource_config.address
+        validate_iface_config(
+            vlan_handler.conf,
+            IfaceConfig(vlan_handler.orig_text, vlan_handler.orig_fragments),
+            multiple_vlan_aware_bridges=(
+                address not in _single_vlan_aware_bridge_devices
+            ),
+        )
+
+    def _reload_ifaces(
+        self, sys_actions: SystemActions, iface_names: list[str] | None
+    ) -> None:
+        """Bring up the ifaces or reload all of them if names are None."""
+        if iface_names == []:
+            self._logger.debug("Interfaces aren't changed, nothing to reload")
+            return
+
+        start = time.monotonic()
+        if iface_names is None:
+            sys_actions.if_reload(
+                retries=self._reload_retries,
+                timeout=self._get_reload_timeout("ifreload"),
+            )
+            target = "all interfaces"
+        else:
+            sys_actions.if_up(
+                iface_names,
+                retries=self._reload_retries,
+                timeout=self._get_reload_timeout("ifup"),
+            )
+            target = f"interfaces {', '.join(iface_names)}"
+        duration = time.monotonic() - start
+        self._logger.debug(f"Reloaded {target} in {duration:.3f}s")
+
+    def apply_connectivity(self, request: str) -> str:
+        self._logger.debug(f"Apply connectivity request: {request}")
+        actions = self._parse_connectivity_request_service.get_actions(request)
+        set_actions = list(filter(lambda a: a.type is a.type.SET_VLAN, actions))
+        remove_actions = list(filter(lambda a: a.type is a.type.REMOVE_VLAN, actions))
+        remove_actions = prepare_remove_vlan_actions(set_actions, remove_actions)
+
+        if self._batch_actions or self._backend != ConnectivityBackend.FILE:
+            self._apply_actions_batch(remove_actions, set_actions)
+        else:
+            self._apply_actions_by_port(remove_actions, set_actions)
+        return self._get_result()
+
+    @staticmethod
+    def _group_by_port(
+        remove_actions: list[ConnectivityActionModel],
+        set_actions: list[ConnectivityActionModel],
+    ) -> list[tuple[list[ConnectivityActionModel], list[ConnectivityActionModel]]]:
+        """Remove and set actions of each port.
+
+        Removing VLANs before setting new ones is applied with the set actions
+        in one change, so setting the same VLANs is a no-op.
+        """
+        groups = {}
+        for action in remove_actions:
+            groups.setdefault(action.action_target.name, ([], []))[0].append(action)
+        for action in set_actions:
+            groups.setdefault(action.action_target.name, ([], []))[1].append(action)
+        return list(groups.values())
+
+    def _apply_actions_by_port(
+        self,
+        remove_actions: list[ConnectivityActionModel],
+        set_actions: list[ConnectivityActionModel],
+    ) -> None:
+        with ft.ThreadPoolExecutor() as executor:
+            futures = [
+                executor.submit(self._apply_actions_batch, *port_actions, False)
+                for port_actions in self._group_by_port(remove_actions, set_actions)
+            ]
+            for future in futures:
+                future.result()
+
+    def plan_connectivity(
+        self,
+        actions: list[ConnectivityActionModel],
+        conf_text: str,
+        fragments: dict[str, str] | None = None,
+    ) -> ConnectivityPlan:
+        """Predict what applying the actions would do without connecting.
+
+        Actions are applied offline to the supplied interfaces file (and
+        fragments) the same way apply_connectivity does it with the current
+        options. Round trips are counted as if the cached file is outdated.
+        """
+        if self._backend != ConnectivityBackend.FILE:
+            raise ValueError(f"Can't plan changes for {self._backend} backend")
+
+        set_actions = [a for a in actions if a.type is a.type.SET_VLAN]
+        remove_actions = [a for a in actions if a.type is a.type.REMOVE_VLAN]
+        remove_actions = prepare_remove_vlan_actions(set_actions, remove_actions)
+        # remove actions prepared from set actions have set type
+        all_actions = [
+            *((action, self._remove_vlan_conf) for action in remove_actions),
+            *((action, self._set_vlan_conf) for action in set_actions),
+        ]
+        if self._batch_actions:
+            steps = [all_actions]
+        else:
+            steps = [
+                [
+                    *((action, self._remove_vlan_conf) for action in port_removes),
+                    *((action, self._set_vlan_conf) for action in port_sets),
+                ]
+                for port_removes, port_sets in self._group_by_port(
+                    remove_actions, set_actions
+                )
+            ]
+
+        plan = ConnectivityPlan()
+        orig_fragments = fragments or {}
+        text, fragments = conf_text, orig_fragments
+        for step_actions in steps:
+            vlan_handler = VlanConfHandler(text, fragments)
+            is_applied = False
+            for action, apply_action in step_actions:
+                if action.action_id in plan.failed_actions:
+                    continue  # set action after the failed remove one
+                try:
+                    self._apply_action(vlan_handler, action, apply_action)
+                except Exception as e:
+                    plan.failed_actions[action.action_id] = str(e)
+                else:
+                    is_applied = True
+
+            if is_applied and self._validate_iface_conf:
+                try:
+                    self._validate_new_conf(vlan_handler)
+                except InvalidIfaceConfig as e:
+                    for action, _ in step_actions:
+                        plan.failed_actions.setdefault(action.action_id, str(e))
+                    is_applied = False
+
+            plan.round_trips += self._count_round_trips(vlan_handler, is_applied)
+            if is_applied and vlan_handler.is_changed:
+                self._plan_reload(plan, vlan_handler)
+                text = vlan_handler.conf.text
+                fragments = {**fragments, **vlan_handler.conf.changed_fragments}
+
+        plan.diff = _get_diff(IFACE_CONF_PATH, conf_text, text) + "".join(
+            _get_diff(path, orig, fragments[path])
+            for path, orig in orig_fragments.items()
+        )
+        return plan
+
+    def _count_round_trips(
+        self, vlan_handler: VlanConfHandler, is_applied: bool
+    ) -> int:
+        """Requests that the real run sends to read, write and reload the file.
+
+        CLI commands and SFTP operations are counted.
+        """
+        base_dir = posixpath.dirname(IFACE_CONF_PATH)
+        orig_text = vlan_handler.orig_text
+        if self._sftp_file_transfer or not self._chunked_file_transfer:
+            count = 1
+        else:
+            count = self._count_chunked_read(orig_text)
+        if self._cache_iface_conf:
+            count += 1  # MD5 sum
+        if self._journal_iface_conf:
+            count += 1  # recover the journal
+        if self._include_iface_fragments and get_source_patterns(orig_text, base_dir):
+            count += 1
+            if self._chunked_file_transfer:
+                count += sum(
+                    self._count_chunked_read(text)
+                    for text in vlan_handler.orig_fragments.values()
+                )
+        if not is_applied or not vlan_handler.is_changed:
+            return count
+
+        if self._journal_iface_conf:
+            count += 2  # save and remove the journal
+
+        if self._is_main_conf_changed(vlan_handler):
+            sed_args = None
+            if self._patch_iface_conf and orig_text:
+                sed_args = self._get_sed_args(vlan_handler.text, orig_text)
+            if sed_args is not None:
+                # edit and check MD5 sum
+                count += int(bool(sed_args)) + 1
+            elif self._sftp_file_transfer:
+                count += 2  # write the staging file and move it in place
+            else:
+                count += self._count_cli_write(vlan_handler.text)
+        for text in vlan_handler.changed_fragments.values():
+            count += self._count_cli_write(text)
+        if not self._targeted_reload or vlan_handler.get_ifaces_to_reload() != []:
+            count += 1
+        return count
+
+    @staticmethod
+    def _count_chunked_read(text: str) -> int:
+        # size, chunks and MD5 sum, the file ends with a new line
+        return get_chunks_count(len(text.encode()) + 1, READ_CHUNK_SIZE) + 2
+
+    def _count_cli_write(self, text: str) -> int:
+        if not self._chunked_file_transfer:
+            return 1
+        # temp file, chunks, MD5 sum and moving the temp file in place
+        return get_chunks_count(len(text.encode()), WRITE_CHUNK_SIZE) + 3
+
+    def _plan_reload(
+        self, plan: ConnectivityPlan, vlan_handler: VlanConfHandler
+    ) -> None:
+        iface_names = None
+        if self._targeted_reload:
+            iface_names = vlan_handler.get_ifaces_to_reload()
+        if iface_names is None:
+            plan.reload_ifaces = None
+        elif plan.reload_ifaces is not None:
+            plan.reload_ifaces.update(iface_names)
+
+    def _apply_actions_batch(
+        self,
+        remove_actions: list[ConnectivityActionModel],
+        set_actions: list[ConnectivityActionModel],
+        fall_back: bool = True,
+    ) -> None:
+        """Apply the actions in one change of the config.
+
+        :param fall_back: apply the actions one by one if the change fails,
+            otherwise fail all of them
+        """
+        all_actions = [*remove_actions, *set_actions]
+        try:
+            with self._lock.acquire(self._logger):
+                with self._cli_configurator.root_mode_service() as cli_service:
+                    vlan_handler = self._get_vlan_handler(cli_service)
+
+                    remove_actions = self._apply_to_conf(
+                        vlan_handler, remove_actions, self._remove_vlan_conf
+                    )
+                    self._filter_set_actions(set_actions)
+                    set_actions = self._apply_to_conf(
+                        vlan_handler, set_actions, self._set_vlan_conf
+                    )
+                    if remove_actions or set_actions:
+                        self._save_vlan_handler(cli_service, vlan_handler)
+        except Exception as e:
+            if not fall_back or isinstance(e, ConfigRollbackFailed):
+                self._logger.exception("Failed to apply VLAN changes in one batch")
+                self._fail_actions(all_actions, e)
+            else:
+                self._logger.exception(
+                    "Failed to apply VLAN changes in one batch, the config is left "
+                    "unchanged"
+                )
+                self._logger.info("Applying actions one by one to find the failed ones")
+                self._apply_actions_one_by_one(remove_actions, set_actions)
+        else:
+            for action in (*remove_actions, *set_actions):
+                if action.action_id in self._results:
+                    continue  # set action failed after its remove copy
+                result = ConnectivityActionResult.success_result(action, "Success")
+                self._results[result.actionId] = result
+
+    def _fail_actions(
+        self, actions: list[ConnectivityActionModel], error: Exception
+    ) -> None:
+        """Fail the actions that don't have results yet."""
+        for action in actions:
+            if action.action_id not in self._results:
+                result = ConnectivityActionResult.fail_result(action, str(error))
+                self._results[result.actionId] = result
+
+    def _apply_to_conf(
+        self,
+        vlan_handler: VlanHandler,
+        actions: list[ConnectivityActionModel],
+        apply_action: Callable[[VlanHandler, ConnectivityActionModel], None],
+    ) -> list[ConnectivityActionModel]:
+        applied = []
+        for action in actions:
+            try:
+                self._apply_action(vlan_handler, action, apply_action)
+            except PendingChangesLost:
+                raise  # changes of the applied actions are lost too
+            except Exception as e:
+                vlan = action.connection_params.vlan_id
+                target_name = action.action_target.name
+                emsg = (
+                    f"Failed to apply VLAN changes ({vlan}) for target {target_name}. "
+                    f"Error: {e}"
+                )
+                self._logger.exception(emsg)
+                result = ConnectivityActionResult.fail_result(action, emsg)
+                self._results[result.actionId] = result
+            else:
+                applied.append(action)
+        return applied
+
+    @staticmethod
+    def _apply_action(
+        vlan_handler: VlanHandler,
+        action: ConnectivityActionModel,
+        apply_action: Callable[[VlanHandler, ConnectivityActionModel], None],
+    ) -> None:
+        """Apply the action, changes of the failed one are dropped from the config.
+
+        Transaction actions drop them on the device by themselves.
+        """
+        if not isinstance(vlan_handler, VlanConfHandler):
+            apply_action(vlan_handler, action)
+            return
+
+        snapshot = vlan_handler.get_snapshot()
+        try:
+            apply_action(vlan_handler, action)
+        except Exception:
+            vlan_handler.restore(snapshot)
+            raise
+
+    def _apply_actions_one_by_one(
+        self,
+        remove_actions: list[ConnectivityActionModel],
+        set_actions: list[ConnectivityActionModel],
+    ) -> None:
+        with ft.ThreadPoolExecutor() as executor:
+            remove_vlan_futures = {
+                executor.submit(self._remove_vlan, action): action
+                for action in remove_actions
+            }
+            self._wait_futures(remove_vlan_futures)
+
+            self._filter_set_actions(set_actions)
+            set_vlan_futures = {
+                executor.submit(self._set_vlan, action): action
+                for action in set_actions
+            }
+            self._wait_futures(set_vlan_futures)
+
+    def _set_vlan_conf(
+        self, vlan_handler: VlanHandler, action: ConnectivityActionModel
+    ) -> None:
         vlan_str = action.connection_params.vlan_id
         port_name = self._get_port_name(action)
         qinq = action.connection_params.vlan_service_attrs.qnq
 
-        with lock:
-            with self._cli_configurator.root_mode_service() as cli_service:
-                sys_actions = SystemActions(cli_service, self._logger)
-                conf_text = sys_actions.get_iface_conf()
-                vlan_handler = VlanConfHandler(conf_text)
-                vlan_handler.prepare_bridge(qinq)
+        vlan_handler.prepare_bridge(qinq)
+        if action.connection_params.mode is ConnectionModeEnum.ACCESS:
+            vlan_handler.add_access_vlan(port_name, vlan_str, qinq)
+        else:
+            vlan_list = get_vlan_list(
+                vlan_str,
+                is_vlan_range_supported=True,
+                is_multi_vlan_supported=False,
+            )
+            vlan_handler.add_trunk_vlan(port_name, vlan_list, qinq)
 
-                if action.connection_params.mode is ConnectionModeEnum.ACCESS:
-                    vlan_handler.add_access_vlan(port_name, vlan_str, qinq)
-                else:
-                    vlan_list = get_vlan_list(
-                        vlan_str,
-                        is_vlan_range_supported=False,
-                        is_multi_vlan_supported=False,
-                    )
-                    vlan_handler.add_trunk_vlan(port_name, vlan_list, qinq)
+    def _remove_vlan_conf(
+        self, vlan_handler: VlanHandler, action: ConnectivityActionModel
+    ) -> None:
+        vlan_handler.remove_vlan(self._get_port_name(action))
 
-                self._upload_new_conf(sys_actions, vlan_handler)
+    def _set_vlan(self, action: ConnectivityActionModel) -> ConnectivityActionResult:
+        with self._lock.acquire(self._logger):
+            with self._cli_configurator.root_mode_service() as cli_service:
+                vlan_handler = self._get_vlan_handler(cli_service)
+                self._set_vlan_conf(vlan_handler, action)
+                self._save_vlan_handler(cli_service, vlan_handler)
         return ConnectivityActionResult.success_result(action, "Success")
 
     def _remove_vlan(self, action: ConnectivityActionModel) -> ConnectivityActionResult:
-        port_name = self._get_port_name(action)
-
-        with lock:
+        with self._lock.acquire(self._logger):
             with self._cli_configurator.root_mode_service() as cli_service:
-                sys_actions = SystemActions(cli_service, self._logger)
-                conf_text = sys_actions.get_iface_conf()
+                vlan_handler = self._get_vlan_handler(cli_service)
+                self._remove_vlan_conf(vlan_handler, action)
+                self._save_vlan_handler(cli_service, vlan_handler)
+        return ConnectivityActionResult.success_result(action, "Success")
 
-                vlan_handler = VlanConfHandler(conf_text)
-                vlan_handler.remove_vlan(port_name)
+    def remove_vlans(self, port_names: Iterable[str]) -> None:
+        """Remove all VLANs from the ports in one change of the config.
 
-                self._upload_new_conf(sys_actions, vlan_handler)
-        return ConnectivityActionResult.success_result(action, "Success")
+        Ports can be set by names or full resource names, e.g. "cumulus/swp1".
+        """
+        port_names = [port_name.split("/")[-1] for port_name in port_names]
+        with self._lock.acquire(self._logger):
+            with self._cli_configurator.root_mode_service() as cli_service:
+                vlan_handler = self._get_vlan_handler(cli_service)
+                vlan_handler.remove_vlans(port_names)
+                self._save_vlan_handler(cli_service, vlan_handler)
@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, ClassVar, Union
 
 import attr
 
+from cloudshell.cli.service.cli_service import CliService
 from cloudshell.snmp.snmp_configurator import EnableDisableSnmpFlowInterface
 from cloudshell.snmp.snmp_parameters import (
     SNMPReadParameters,
@@ -15,10 +16,12 @@ from cloudshell.snmp.snmp_parameters import (
 )
 
 from cloudshell.cumulus.linux import BaseCumulusError
+from cloudshell.cumulus.linux.cli.file_channel import get_file_channel
 from cloudshell.cumulus.linux.cli.handler import CumulusCliConfigurator
 from cloudshell.cumulus.linux.command_actions.snmp import BaseSnmpActions
 from cloudshell.cumulus.linux.command_actions.system import SystemActions
 from cloudshell.cumulus.linux.snmp.snmp_conf_handler import SnmpConfigHandler
+from cloudshell.cumulus.linux.utils.read_cache import ReadCache, read_cache
 
 if TYPE_CHECKING:
     from cloudshell.shell.standards.networking.resource_config import (
@@ -47,14 +50,42 @@ class EnableDisableFlowWithConfig(EnableDisableSnmpFlowInterface):
     _cli_configurator: CumulusCliConfigurator
     _resource_config: NetworkingResourceConfig
     _logger: Logger
+    # read and write snmpd.conf over SFTP with the CLI credentials
+    sftp_file_transfer: bool = False
+    # reuse snmpd.conf and the server status read by recent flows
+    cache_reads: bool = False
+    # read and write snmpd.conf by base64 chunks with MD5 check, SFTP wins
+    chunked_file_transfer: bool = False
+
+    @property
+    def _read_cache(self) -> ReadCache | None:
+        return read_cache if self.cache_reads else None
+
+    def _get_sys_actions(self, cli_service: CliService) -> SystemActions:
+        file_channel = None
+        if self.sftp_file_transfer:
+            file_channel = get_file_channel(self._resource_config)
+        return SystemActions(
+            cli_service,
+            self._logger,
+            self._resource_config.address,
+            file_channel,
+            self._read_cache,
+            self.chunked_file_transfer,
+        )
+
+    def _get_snmp_actions(self, cli_service: CliService) -> BaseSnmpActions:
+        return BaseSnmpActions(
+            cli_service, self._logger, self._resource_config.address, self._read_cache
+        )
 
     def enable_snmp(self, snmp_parameters: SNMP_PARAM_TYPES):
         self._validate_snmp_params(snmp_parameters)
 
         with self._cli_configurator.root_mode_service() as cli_service:
             r_conf = self._resource_config
-            sys_act = SystemActions(cli_service, self._logger)
-            snmp_act = BaseSnmpActions(cli_service, self._logger)
+            sys_act = self._get_sys_actions(cli_service)
+            snmp_act = self._get_snmp_actions(cli_service)
             snmp_conf = SnmpConfigHandler(sys_act.get_snmp_conf())
 
             snmp_conf.add_server_ip(r_conf.address, r_conf.vrf_management_name)
@@ -97,7 +128,7 @@ class EnableDisableFlowWithConfig(EnableDisableSnmpFlowInterface):
 
         with self._cli_configurator.root_mode_service() as cli_service:
             r_conf = self._resource_config
-            sys_act = SystemActions(cli_service, self._logger)
+            sys_act = self._get_sys_actions(cli_service)
             snmp_conf = SnmpConfigHandler(sys_act.get_snmp_conf())
 
             snmp_conf.remove_server_ip(r_conf.address, r_conf.vrf_management_name)
@@ -117,7 +148,7 @@ class EnableDisableFlowWithConfig(EnableDisableSnmpFlowInterface):
     def _wait_for_snmp_service(self, snmp_act: BaseSnmpActions):
         timeout_time = datetime.now() + timedelta(seconds=self.SNMP_WAITING_TIMEOUT)
 
-        while not snmp_act.is_snmp_running():
+        while not snmp_act.is_snmp_running(cached=False):
             if datetime.now() > timeout_time:
                 raise SnmpServerDown()
             self._logger.info("Waiting for SNMP service to start...")
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from threading import Lock
+
+import attr
+
+
+class CounterName:
+    NO_OP_SKIPPED = "connectivity.no_op_skipped"
+    COMMAND_RETRIED = "system.command_retried"
+    READ_CACHE_HIT = "read_cache.hit"
+    READ_CACHE_MISS = "read_cache.miss"
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class Counters:
+    """In-process named counters of the operations."""
+
+    _values: dict[str, int] = attr.ib(factory=dict, init=False)
+    _lock: Lock = attr.ib(factory=Lock, init=False, repr=False)
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+counters = Counters()
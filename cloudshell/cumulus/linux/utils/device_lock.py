@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from logging import Logger
+from threading import Lock
+from typing import Iterator
+
+import attr
+
+_registry_lock = Lock()
+_device_locks: dict[str, DeviceLock] = {}
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class DeviceLock:
+    """Lock for the device config with lock contention statistics."""
+
+    name: str
+    _lock: Lock = attr.ib(factory=Lock, init=False, repr=False)
+    acquired_count: int = attr.ib(default=0, init=False)
+    total_wait: float = attr.ib(default=0.0, init=False)
+    max_wait: float = attr.ib(default=0.0, init=False)
+
+    @contextmanager
+    def acquire(self, logger: Logger) -> Iterator[None]:
+        start = time.monotonic()
+        with self._lock:
+            wait = time.monotonic() - start
+            self.acquired_count += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            logger.debug(f"Lock for the device {self.name} acquired in {wait:.3f}s")
+            yield
+
+
+def get_device_lock(address: str) -> DeviceLock:
+    with _registry_lock:
+        try:
+            device_lock = _device_locks[address]
+        except KeyError:
+            device_lock = _device_locks[address] = DeviceLock(address)
+    return device_lock
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import hashlib
+from threading import Lock
+
+import attr
+
+
+def get_text_md5(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class CachedFile:
+    md5: str
+    text: str
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class FileCache:
+    """In-process cache of the device files validated by the file's MD5 sum."""
+
+    _files: dict[tuple[str, str], CachedFile] = attr.ib(factory=dict, init=False)
+    _lock: Lock = attr.ib(factory=Lock, init=False)
+
+    def get(self, device: str, file_path: str, md5: str) -> str | None:
+        with self._lock:
+            cached_file = self._files.get((device, file_path))
+        if cached_file and cached_file.md5 == md5:
+            return cached_file.text
+
+    def put(self, device: str, file_path: str, md5: str, text: str) -> None:
+        with self._lock:
+            self._files[(device, file_path)] = CachedFile(md5, text)
+
+    def invalidate(self, device: str, file_path: str) -> None:
+        with self._lock:
+            self._files.pop((device, file_path), None)
+
+
+file_cache = FileCache()
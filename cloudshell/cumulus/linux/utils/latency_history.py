@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from threading import Lock
+
+import attr
+
+_registry_lock = Lock()
+_histories: dict[tuple[str, str], LatencyHistory] = {}
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class LatencyHistory:
+    """Durations of the last runs of the command on the device."""
+
+    name: str
+    max_size: int = 50
+    _durations: deque = attr.ib(init=False, repr=False)
+    _lock: Lock = attr.ib(factory=Lock, init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        self._durations = deque(maxlen=self.max_size)
+
+    def add(self, duration: float) -> None:
+        with self._lock:
+            self._durations.append(duration)
+
+    @property
+    def durations(self) -> list[float]:
+        with self._lock:
+            return list(self._durations)
+
+    def percentile(self, percent: float) -> float | None:
+        """Nearest-rank percentile, None if there is no history yet."""
+        durations = sorted(self.durations)
+        if not durations:
+            return None
+        rank = math.ceil(percent / 100 * len(durations))
+        return durations[max(rank, 1) - 1]
+
+    def get_timeout(
+        self,
+        default: float,
+        factor: float = 3.0,
+        percent: float = 95,
+        min_samples: int = 3,
+    ) -> float:
+        """Timeout that leaves a margin over the usual duration.
+
+        Never less than the default one, and the default one is used until
+        there are enough samples.
+        """
+        if len(self.durations) < min_samples:
+            return default
+        return max(default, self.percentile(percent) * factor)
+
+
+def get_latency_history(address: str, name: str) -> LatencyHistory:
+    with _registry_lock:
+        try:
+            history = _histories[(address, name)]
+        except KeyError:
+            history = _histories[(address, name)] = LatencyHistory(name)
+    return history
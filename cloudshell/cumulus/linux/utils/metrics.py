@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import bisect
+import json
+from threading import Lock
+
+import attr
+
+# upper bounds of the duration buckets, seconds
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+
+class MetricsSink:
+    """Receives metrics of the device commands, doesn't keep them."""
+
+    enabled = False
+
+    def record_command(
+        self,
+        name: str,
+        duration: float,
+        sent: int,
+        received: int,
+        error: str | None = None,
+    ) -> None:
+        pass
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class CommandStats:
+    count: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    # counts by DURATION_BUCKETS, not cumulative
+    buckets: list[int] = attr.ib(factory=lambda: [0] * len(DURATION_BUCKETS))
+    errors: dict[str, int] = attr.ib(factory=dict)
+
+    def add(
+        self,
+        duration: float,
+        sent: int,
+        received: int,
+        error: str | None,
+    ) -> None:
+        self.count += 1
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.buckets[bisect.bisect_left(DURATION_BUCKETS, duration)] += 1
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class InMemoryMetricsSink(MetricsSink):
+    """Keeps histograms of the commands by their templates."""
+
+    enabled = True
+    _stats: dict[str, CommandStats] = attr.ib(factory=dict, init=False)
+    _lock: Lock = attr.ib(factory=Lock, init=False, repr=False)
+
+    def record_command(
+        self,
+        name: str,
+        duration: float,
+        sent: int,
+        received: int,
+        error: str | None = None,
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = CommandStats()
+            stats.add(duration, sent, received, error)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {name: attr.asdict(stats) for name, stats in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def export_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def export_text(self) -> str:
+        """Prometheus text format, names of the commands are in the labels."""
+        lines = []
+        for name, stats in sorted(self.snapshot().items()):
+            label = json.dumps(name)
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(
+                    f"cumulus_command_duration_seconds_bucket{{command={label},"
+                    f'le="{le}"}} {cumulative}'
+                )
+            lines.extend(
+                [
+                    f"cumulus_command_duration_seconds_sum{{command={label}}} "
+                    f"{stats['total_duration']:.6f}",
+                    f"cumulus_command_duration_seconds_count{{command={label}}} "
+                    f"{stats['count']}",
+                    f"cumulus_command_sent_bytes_total{{command={label}}} "
+                    f"{stats['bytes_sent']}",
+                    f"cumulus_command_received_bytes_total{{command={label}}} "
+                    f"{stats['bytes_received']}",
+                ]
+            )
+            for error, count in sorted(stats["errors"].items()):
+                lines.append(
+                    f"cumulus_command_errors_total{{command={label},"
+                    f'error="{error}"}} {count}'
+                )
+        return "".join(f"{line}\n" for line in lines)
+
+
+_metrics_sink: MetricsSink = MetricsSink()
+
+
+def get_metrics_sink() -> MetricsSink:
+    return _metrics_sink
+
+
+def set_metrics_sink(metrics_sink: MetricsSink) -> None:
+    """Set the sink of the process, e.g. InMemoryMetricsSink to scrape it."""
+    global _metrics_sink
+    _metrics_sink = metrics_sink
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Any, Callable, TypeVar
+
+import attr
+
+from cloudshell.cumulus.linux.utils.counters import CounterName, counters
+
+T = TypeVar("T")
+
+
+class ReadCacheKey:
+    IFACE_CONF = "iface_conf"
+    SNMP_CONF = "snmp_conf"
+    SNMP_STATUS = "snmp_status"
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class ReadCache:
+    """In-process results of read-only device queries, valid for ttl seconds."""
+
+    ttl: float = 10.0
+    _entries: dict[tuple[str, str], tuple[float, Any]] = attr.ib(
+        factory=dict, init=False
+    )
+    _lock: Lock = attr.ib(factory=Lock, init=False, repr=False)
+
+    def read(
+        self, device: str, key: str, read: Callable[[], T], refresh: bool = False
+    ) -> T:
+        """Return the cached result or read it and cache it.
+
+        :param refresh: read it even if the cached one is still valid
+        """
+        start = time.monotonic()
+        if not refresh:
+            with self._lock:
+                entry = self._entries.get((device, key))
+            if entry is not None and start - entry[0] <= self.ttl:
+                counters.incr(CounterName.READ_CACHE_HIT)
+                return entry[1]
+            counters.incr(CounterName.READ_CACHE_MISS)
+
+        value = read()
+        with self._lock:
+            # the time of the request, the device could change during the read
+            self._entries[(device, key)] = (start, value)
+        return value
+
+    def invalidate(self, device: str, *keys: str) -> None:
+        """Drop the results of the device, all of them if keys are not set."""
+        with self._lock:
+            if keys:
+                for key in keys:
+                    self._entries.pop((device, key), None)
+            else:
+                for entry_key in [k for k in self._entries if k[0] == device]:
+                    del self._entries[entry_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+read_cache = ReadCache()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+
+
+def _get_file_lines(text: str) -> list[str]:
+    if text.endswith("\n"):
+        text = text[:-1]
+    return text.split("\n")
+
+
+def _escape_sed_text(lines: list[str]) -> str:
+    return "\\n".join(line.replace("\\", "\\\\") for line in lines)
+
+
+def get_sed_expressions(old_text: str, new_text: str) -> list[str] | None:
+    """Get GNU sed expressions that change lines of the old text to the new one.
+
+    All expressions use line numbers of the old text so they have to be executed
+    in one sed call. Returns None if the change can't be expressed with sed.
+    """
+    old_lines = _get_file_lines(old_text)
+    new_lines = _get_file_lines(new_text)
+    changes: list[tuple[int, int, list[str]]] = []  # old lines range -> new lines
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+
+        lines = new_lines[j1:j2]
+        if tag == "insert" or lines == [""]:
+            # sed can't add a single empty line and needs an existing line as an
+            # address so we replace the neighbour line with itself and new lines
+            prev_i2 = changes[-1][1] if changes else 0
+            if i2 < len(old_lines):
+                lines.append(old_lines[i2])
+                i2 += 1
+            elif i1 > prev_i2:
+                i1 -= 1
+                lines.insert(0, old_lines[i1])
+            elif changes:
+                prev_i1, prev_i2, prev_lines = changes.pop()
+                lines = [*prev_lines, *old_lines[prev_i2:i1], *lines]
+                i1 = prev_i1
+            if i1 == i2 or lines == [""]:
+                return None
+        changes.append((i1, i2, lines))
+
+    expressions = []
+    for i1, i2, lines in changes:
+        address = f"{i2}" if i2 - i1 == 1 else f"{i1 + 1},{i2}"
+        if lines:
+            expressions.append(f"{address}c\\{_escape_sed_text(lines)}")
+        else:
+            expressions.append(f"{address}d")
+    return expressions
+
+
+def get_sed_args(expressions: list[str]) -> str:
+    return " ".join(
+        "-e '{}'".format(expression.replace("'", "'\\''")) for expression in expressions
+    )
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from cloudshell.cumulus.linux.cli.file_channel import (
+    MAX_IDLE_TIME,
+    SftpFileChannel,
+    get_file_channel,
+)
+from cloudshell.cumulus.linux.command_actions.system import SystemActions
+from cloudshell.cumulus.linux.command_templates import CommandError
+
+from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
+
+STAGING_PATH = "/tmp/.cs_0123456789ab_interfaces"
+
+
+class LocalSftp:
+    """SFTP stand-in that keeps remote files in the local dir."""
+
+    def __init__(self, root: Path, protected: set[str]):
+        self.root = root
+        self.protected = protected
+
+    def _path(self, file_path: str) -> Path:
+        return self.root / file_path.lstrip("/")
+
+    def open(self, file_path: str, mode: str):  # noqa: A003
+        if file_path in self.protected:
+            raise PermissionError(13, "Permission denied")
+        path = self._path(file_path)
+        if "w" in mode:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            return path.open("wb")
+        return io.BytesIO(path.read_bytes())
+
+    def chmod(self, file_path: str, mode: int):
+        self._path(file_path).chmod(mode)
+
+    def remove(self, file_path: str):
+        self._path(file_path).unlink()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture()
+def sftp(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.cli.file_channel.uuid.uuid4",
+        lambda: Mock(hex="0123456789abcdef"),
+    )
+    path = tmp_path / "etc/network/interfaces"
+    path.parent.mkdir(parents=True)
+    path.write_text("auto swp1\niface swp1\n")
+    return LocalSftp(tmp_path, set())
+
+
+@pytest.mark.parametrize("protected", (False, True))
+def test_get_iface_conf(cli_emu: CliEmu, logger, resource_conf, sftp, protected):
+    ios = [*ENTER_ROOT_MODE]
+    if protected:
+        sftp.protected.add("/etc/network/interfaces")
+        # stand-in of the file the user can read
+        staged = sftp.root / STAGING_PATH.lstrip("/")
+        staged.parent.mkdir()
+        staged.write_text("auto swp1\niface swp1\n")
+        ios.extend(
+            [
+                Input(f"install -m 600 -o user /etc/network/interfaces {STAGING_PATH}"),
+                Output("", Prompt.ROOT),
+            ]
+        )
+    cli = cli_emu.create_cli(ios)
+    file_channel = SftpFileChannel(resource_conf, sftp)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger, file_channel=file_channel)
+        assert sys_actions.get_iface_conf() == "auto swp1\niface swp1"
+    assert not (sftp.root / STAGING_PATH.lstrip("/")).exists()
+    cli_emu.validate_all_ios_executed()
+
+
+@pytest.mark.parametrize("failed", (False, True))
+def test_upload_iface_conf(cli_emu: CliEmu, logger, resource_conf, sftp, failed):
+    text = 'auto swp1\niface swp1\n    alias "100%"\n'
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input(f"cat {STAGING_PATH} > /etc/network/interfaces && rm -f {STAGING_PATH}"),
+        Output("error: No space left on device" if failed else "", Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+    file_channel = SftpFileChannel(resource_conf, sftp)
+    staging_path = sftp.root / STAGING_PATH.lstrip("/")
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger, file_channel=file_channel)
+        if failed:
+            with pytest.raises(CommandError):
+                sys_actions.upload_iface_conf(text)
+            assert not staging_path.exists()
+        else:
+            sys_actions.upload_iface_conf(text)
+            assert staging_path.read_text() == text
+            assert staging_path.stat().st_mode & 0o777 == 0o600
+    cli_emu.validate_all_ios_executed()
+
+
+def test_get_file_channel(resource_conf):
+    file_channel = get_file_channel(resource_conf)
+
+    assert get_file_channel(resource_conf) is file_channel
+    assert file_channel.user == "user"
+
+
+@pytest.mark.parametrize(
+    ("connection_type", "expected_port"), (("SSH", 2222), ("Telnet", 22), ("Auto", 22))
+)
+def test_file_channel_port(resource_conf, connection_type, expected_port):
+    attrs = resource_conf.attributes
+    attrs[f"{resource_conf.shell_name}.CLI Connection Type"] = connection_type
+    attrs[f"{resource_conf.shell_name}.CLI TCP Port"] = "2222"
+
+    assert SftpFileChannel(resource_conf)._get_port() == expected_port
+
+
+def test_get_file_channel_sweeps_other_channels(resource_conf, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.cli.file_channel.time.monotonic", lambda: now[0]
+    )
+    file_channel = get_file_channel(resource_conf)
+    sftp = file_channel._sftp = Mock()
+    password_attr = f"{resource_conf.shell_name}.Password"
+    password = resource_conf.attributes[password_attr]
+
+    resource_conf.attributes[password_attr] = "other"
+    now[0] += 100
+    # the channel was used recently, it's kept
+    other_channel = get_file_channel(resource_conf)
+    sftp.close.assert_not_called()
+
+    now[0] += MAX_IDLE_TIME
+    assert get_file_channel(resource_conf) is other_channel
+    sftp.close.assert_called_once_with()
+
+    resource_conf.attributes[password_attr] = password
+    assert get_file_channel(resource_conf) is not file_channel
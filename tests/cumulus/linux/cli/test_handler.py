@@ -0,0 +1,33 @@
+import pytest
+
+from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
+
+
+@pytest.mark.parametrize("park_in_root_mode", (False, True))
+def test_park_in_root_mode(cli_emu: CliEmu, park_in_root_mode):
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("whoami"),
+        Output("root", Prompt.ROOT),
+        # session is reused, mode is checked by prompt
+        Input(""),
+        Output("", Prompt.ROOT),
+    ]
+    if park_in_root_mode:
+        ios.extend([Input("whoami"), Output("root", Prompt.ROOT)])
+    else:
+        ios.extend(
+            [
+                Input("exit"),
+                Output("logout", Prompt.DEFAULT),
+                Input("whoami"),
+                Output("cumulus", Prompt.DEFAULT),
+            ]
+        )
+    cli = cli_emu.create_cli(ios, park_in_root_mode=park_in_root_mode)
+
+    with cli.root_mode_service() as cli_service:
+        cli_service.send_command("whoami")
+    with cli.enable_mode_service() as cli_service:
+        cli_service.send_command("whoami")
+    cli_emu.validate_all_ios_executed()
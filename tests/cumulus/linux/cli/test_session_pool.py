@@ -0,0 +1,68 @@
+from unittest.mock import Mock
+
+from cloudshell.cumulus.linux.cli.session_pool import (
+    MAX_IDLE_TIME,
+    CumulusSessionPool,
+    get_session_pool,
+)
+
+
+def test_session_pool_evicts_expired_sessions(logger, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.cli.session_pool.time.monotonic", lambda: now[0]
+    )
+    pool = CumulusSessionPool(max_pool_size=2, max_idle_time=10, max_session_age=100)
+    session = Mock()
+
+    assert pool.get_session([session], "#", logger) is session
+    pool.return_session(session, logger)
+    now[0] = 5
+    # reused while it's warm
+    assert pool.get_session([session], "#", logger) is session
+    pool.return_session(session, logger)
+
+    now[0] = 20
+    assert pool.evict_expired(logger) == 1
+    session.disconnect.assert_called_once_with()
+
+    new_session = Mock()
+    assert pool.get_session([new_session], "#", logger) is new_session
+    now[0] = 200
+    pool.return_session(new_session, logger)
+    # too old even if it's just returned
+    assert pool.evict_expired(logger) == 1
+
+
+def test_get_session_pool(resource_conf):
+    session_pool = get_session_pool(resource_conf)
+
+    assert get_session_pool(resource_conf) is session_pool
+    resource_conf.attributes[f"{resource_conf.shell_name}.Password"] = "new"
+    assert get_session_pool(resource_conf) is not session_pool
+
+
+def test_get_session_pool_sweeps_other_pools(resource_conf, logger, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.cli.session_pool.time.monotonic", lambda: now[0]
+    )
+    session_pool = get_session_pool(resource_conf)
+    session = Mock()
+    assert session_pool.get_session([session], "#", logger) is session
+    session_pool.return_session(session, logger)
+    password_attr = f"{resource_conf.shell_name}.Password"
+    password = resource_conf.attributes[password_attr]
+
+    resource_conf.attributes[password_attr] = "other"
+    now[0] += 100
+    # the session is warm, the pool is kept
+    other_pool = get_session_pool(resource_conf)
+    session.disconnect.assert_not_called()
+
+    now[0] += MAX_IDLE_TIME
+    assert get_session_pool(resource_conf) is other_pool
+    session.disconnect.assert_called_once_with()
+
+    resource_conf.attributes[password_attr] = password
+    assert get_session_pool(resource_conf) is not session_pool
@@ -0,0 +1,88 @@
+import pytest
+
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
+
+from cloudshell.cumulus.linux.command_actions.pipeline import (
+    PipelineCommand,
+    PipelineCommandFailed,
+    PipelineResult,
+    iter_batches,
+    join_commands,
+    split_output,
+)
+from cloudshell.cumulus.linux.command_actions.system import SystemActions
+from cloudshell.cumulus.linux.command_templates import CommandError, system
+
+from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
+
+SENTINEL = "__cs_0123456789ab__"
+
+
+def test_join_and_split():
+    line = join_commands(["mkdir -p /tmp/a", "cat /tmp/b"], SENTINEL)
+    assert line == (
+        f'mkdir -p /tmp/a ; echo "{SENTINEL} $?" ; cat /tmp/b ; echo "{SENTINEL} $?"'
+    )
+
+    output = f"{SENTINEL} 0\r\nline1\r\nline2\r\n{SENTINEL} 1\r\n"
+    assert split_output(output, SENTINEL, 2) == [
+        PipelineResult("", 0),
+        PipelineResult("line1\r\nline2", 1),
+    ]
+    with pytest.raises(CommandExecutionException):
+        split_output(output, SENTINEL, 3)
+
+
+def test_iter_batches():
+    commands = [
+        PipelineCommand(system.CREATE_FOLDER, {"folder_path": f"/tmp/{i}"})
+        for i in range(5)
+    ]
+    batches = list(iter_batches(commands, max_line_length=120))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+@pytest.mark.parametrize(
+    ("output", "exit_status", "error"),
+    (
+        ("'/etc/hosts' -> ...", 0, None),
+        ("cp: error: No space left on device", 1, CommandError),
+        # failed without printing anything
+        ("", 1, PipelineCommandFailed),
+    ),
+)
+def test_copy_to_folder(
+    cli_emu: CliEmu, logger, monkeypatch, output, exit_status, error
+):
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.command_actions.system.create_sentinel",
+        lambda: SENTINEL,
+    )
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input(
+            f"cp --parents -rv /etc/network/ /tmp/b/ ; "
+            f'echo "{SENTINEL} $?" ; '
+            f"cp --parents -fv /etc/hosts /tmp/b/ ; "
+            f'echo "{SENTINEL} $?"'
+        ),
+        Output(
+            f"'/etc/network' -> ...\r\n{SENTINEL} 0\r\n"
+            f"{output}\r\n{SENTINEL} {exit_status}",
+            Prompt.ROOT,
+        ),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger)
+        if error:
+            with pytest.raises(error):
+                sys_actions.copy_to_folder(["/etc/network/"], ["/etc/hosts"], "/tmp/b")
+        else:
+            results = sys_actions.copy_to_folder(
+                ["/etc/network/"], ["/etc/hosts"], "/tmp/b"
+            )
+            assert [result.exit_status for result in results] == [0, 0]
+            assert results[1].output == output
+    cli_emu.validate_all_ios_executed()
@@ -0,0 +1,222 @@
+import base64
+import gzip
+import hashlib
+import io
+
+import pytest
+
+from cloudshell.cumulus.linux.command_actions.system import (
+    FileChecksumMismatch,
+    FileChunkNotFound,
+    SystemActions,
+)
+from cloudshell.cumulus.linux.command_templates import CommandError
+
+from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
+
+MARKER = "__cs_0123456789ab__"
+TMP_FILE = "/tmp/tmp.AbCd123456"
+TEXT = 'auto swp1\niface swp1\n    alias "100%" \\\\ test\n'
+
+
+def _gzip(data: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gzip_file:
+        gzip_file.write(data)
+    return buffer.getvalue()
+
+
+def _md5_output(text: str, file_path: str) -> Output:
+    return Output(f"{hashlib.md5(text.encode()).hexdigest()}  {file_path}", Prompt.ROOT)
+
+
+@pytest.mark.parametrize("compress", (False, True))
+def test_write_file(cli_emu: CliEmu, logger, compress):
+    chunks = [TEXT[i : i + 20].encode() for i in range(0, len(TEXT), 20)]
+    if compress:
+        chunks = list(map(_gzip, chunks))
+    pipe = " | gzip -dc" if compress else ""
+    ios = [*ENTER_ROOT_MODE, Input("mktemp"), Output(TMP_FILE, Prompt.ROOT)]
+    for i, chunk in enumerate(chunks):
+        encoded = base64.encodebytes(chunk).decode()
+        redirect = ">>" if i else ">"
+        ios.extend(
+            [
+                Input(
+                    f"base64 -d{pipe} {redirect} {TMP_FILE} <<CS_EOF\n"
+                    f"{encoded}CS_EOF"
+                ),
+                Output("", Prompt.ROOT),
+            ]
+        )
+    ios.extend(
+        [
+            Input(f"md5sum {TMP_FILE}"),
+            _md5_output(TEXT, TMP_FILE),
+            Input(f"cat {TMP_FILE} > /tmp/file && rm -f {TMP_FILE}"),
+            Output("", Prompt.ROOT),
+        ]
+    )
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger)
+        sys_actions.write_file("/tmp/file", TEXT, chunk_size=20, compress=compress)
+    cli_emu.validate_all_ios_executed()
+
+
+def _read_chunk_command(index: int) -> str:
+    return (
+        f'echo "{MARKER} begin" ; '
+        f"dd if=/tmp/file bs=20 skip={index} count=1 2>/dev/null | base64 ; "
+        f'echo "{MARKER} end"'
+    )
+
+
+@pytest.mark.parametrize("corrupted", (False, True))
+def test_read_file(cli_emu: CliEmu, logger, monkeypatch, corrupted):
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.command_actions.system.create_sentinel",
+        lambda: MARKER,
+    )
+    chunks = [TEXT[:20], TEXT[20:40], TEXT[40:]]
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("stat -c %s /tmp/file"),
+        Output(str(len(TEXT)), Prompt.ROOT),
+    ]
+    for i, chunk in enumerate(chunks):
+        encoded = base64.encodebytes(chunk.encode()).decode()
+        ios.extend(
+            [
+                Input(_read_chunk_command(i)),
+                # the wrapped echo of the command looks like base64
+                Output(
+                    f"2/dev/null\n{MARKER} begin\n{encoded}{MARKER} end", Prompt.ROOT
+                ),
+            ]
+        )
+    ios.extend(
+        [
+            Input("md5sum /tmp/file"),
+            _md5_output(TEXT + "changed" if corrupted else TEXT, "/tmp/file"),
+        ]
+    )
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger)
+        if corrupted:
+            with pytest.raises(FileChecksumMismatch):
+                sys_actions.read_file("/tmp/file", chunk_size=20)
+        else:
+            assert sys_actions.read_file("/tmp/file", chunk_size=20) == TEXT
+    cli_emu.validate_all_ios_executed()
+
+
+def test_read_file_without_markers(cli_emu: CliEmu, logger, monkeypatch):
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.command_actions.system.create_sentinel",
+        lambda: MARKER,
+    )
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("stat -c %s /tmp/file"),
+        Output("10", Prompt.ROOT),
+        Input(_read_chunk_command(0)),
+        Output("bash: syntax error", Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger)
+        with pytest.raises(FileChunkNotFound):
+            sys_actions.read_file("/tmp/file", chunk_size=20)
+    cli_emu.validate_all_ios_executed()
+
+
+def test_upload_file_chunked(cli_emu: CliEmu, logger):
+    text = "auto swp1\niface swp1\n"
+    encoded = base64.encodebytes(text.encode()).decode()
+    ios = [
+        *ENTER_ROOT_MODE,
+        # staged outside of the dir, its source glob doesn't pick it up
+        Input("mktemp"),
+        Output(TMP_FILE, Prompt.ROOT),
+        Input(f"base64 -d > {TMP_FILE} <<CS_EOF\n{encoded}CS_EOF"),
+        Output("", Prompt.ROOT),
+        Input(f"md5sum {TMP_FILE}"),
+        _md5_output(text, TMP_FILE),
+        Input(
+            f"cat {TMP_FILE} > /etc/network/interfaces.d/ports.intf && "
+            f"rm -f {TMP_FILE}"
+        ),
+        Output("", Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger, chunked_transfer=True)
+        sys_actions.upload_file("/etc/network/interfaces.d/ports.intf", text)
+    cli_emu.validate_all_ios_executed()
+
+
+@pytest.mark.parametrize("corrupted", (False, True))
+def test_write_file_failed_removes_tmp_file(cli_emu: CliEmu, logger, corrupted):
+    encoded = base64.encodebytes(TEXT.encode()).decode()
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("mktemp"),
+        Output(TMP_FILE, Prompt.ROOT),
+        Input(f"base64 -d > {TMP_FILE} <<CS_EOF\n{encoded}CS_EOF"),
+    ]
+    if corrupted:
+        ios.extend(
+            [
+                Output("", Prompt.ROOT),
+                Input(f"md5sum {TMP_FILE}"),
+                _md5_output(TEXT + "changed", TMP_FILE),
+            ]
+        )
+    else:
+        ios.append(Output("base64: error: invalid input", Prompt.ROOT))
+    ios.extend([Input(f"rm -f {TMP_FILE}"), Output("", Prompt.ROOT)])
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger)
+        with pytest.raises(FileChecksumMismatch if corrupted else CommandError):
+            sys_actions.write_file("/tmp/file", TEXT)
+    cli_emu.validate_all_ios_executed()
+
+
+def test_get_files_chunked(cli_emu: CliEmu, logger, monkeypatch):
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.command_actions.system.create_sentinel",
+        lambda: MARKER,
+    )
+    file_path = "/etc/network/interfaces.d/ports.intf"
+    text = "auto swp1\niface swp1\n"
+    encoded = base64.encodebytes(text.encode()).decode()
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("find /etc/network/interfaces.d/*.intf -maxdepth 0 -type f 2>/dev/null"),
+        Output(file_path, Prompt.ROOT),
+        Input(f"stat -c %s {file_path}"),
+        Output(str(len(text)), Prompt.ROOT),
+        Input(
+            f'echo "{MARKER} begin" ; '
+            f"dd if={file_path} bs=65536 skip=0 count=1 2>/dev/null | base64 ; "
+            f'echo "{MARKER} end"'
+        ),
+        Output(f"{MARKER} begin\n{encoded}{MARKER} end", Prompt.ROOT),
+        Input(f"md5sum {file_path}"),
+        _md5_output(text, file_path),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger, chunked_transfer=True)
+        files = sys_actions.get_files(["/etc/network/interfaces.d/*.intf"])
+    assert files == {file_path: text.strip()}
+    cli_emu.validate_all_ios_executed()
@@ -0,0 +1,73 @@
+import pytest
+
+from cloudshell.cumulus.linux.command_actions.nvue import NvueVlanActions
+from cloudshell.cumulus.linux.command_templates import PendingChangesLost
+
+from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
+
+CONF = """auto br_default
+iface br_default
+    bridge-vids 10 20
+
+auto swp1
+iface swp1
+    bridge-access 10
+
+auto swp2
+iface swp2
+    bridge-vids 20"""
+
+
+def test_remove_vlan_keeps_vlans_used_in_transaction(cli_emu: CliEmu, logger):
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("nv set bridge domain br_default vlan 10"),
+        Output("", Prompt.ROOT),
+        Input("nv set interface swp3 bridge domain br_default access 10"),
+        Output("", Prompt.ROOT),
+        Input("nv unset interface swp1 bridge domain br_default"),
+        Output("", Prompt.ROOT),
+        Input("nv unset interface swp2 bridge domain br_default"),
+        Output("", Prompt.ROOT),
+        Input("nv unset bridge domain br_default vlan 20"),
+        Output("", Prompt.ROOT),
+        Input("nv unset interface swp3 bridge domain br_default"),
+        Output("", Prompt.ROOT),
+        Input("nv unset bridge domain br_default vlan 10"),
+        Output("", Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        vlan_actions = NvueVlanActions(cli_service, logger, lambda: CONF)
+        vlan_actions.add_access_vlan("swp3", "10", qinq=False)
+        vlan_actions.remove_vlans(["swp1", "swp2", "swp3"])
+    cli_emu.validate_all_ios_executed()
+
+
+def test_failed_restage_aborts_transaction(cli_emu: CliEmu, logger):
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("nv set bridge domain br_default vlan 10"),
+        Output("", Prompt.ROOT),
+        Input("nv set interface swp3 bridge domain br_default access 10"),
+        Output("", Prompt.ROOT),
+        Input("nv set bridge domain br_default vlan 20"),
+        Output("", Prompt.ROOT),
+        Input("nv set interface swp4 bridge domain br_default vlan 20"),
+        Output("Error: swp4 doesn't exist", Prompt.ROOT),
+        Input("nv config detach"),
+        Output("", Prompt.ROOT),
+        Input("nv set bridge domain br_default vlan 10"),
+        Output("Error: config is locked", Prompt.ROOT),
+        Input("nv config detach"),
+        Output("", Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        vlan_actions = NvueVlanActions(cli_service, logger, lambda: CONF)
+        vlan_actions.add_access_vlan("swp3", "10", qinq=False)
+        with pytest.raises(PendingChangesLost):
+            vlan_actions.add_trunk_vlan("swp4", ["20"], qinq=False)
+    cli_emu.validate_all_ios_executed()
@@ -99,7 +99,7 @@ class CliEmu:
         self.cli_configurator_cls = cli_configurator_cls
         self.expected_ios = deque()
 
-    def create_cli(emu, expected_ios: Sequence[Input | Output]):
+    def create_cli(emu, expected_ios: Sequence[Input | Output], **kwargs):
         assert not emu.expected_ios
         expected_ios = deque(expected_ios)
         # probe for prompt
@@ -143,10 +143,12 @@ class CliEmu:
         class Cli(emu.cli_configurator_cls):
             REGISTERED_SESSIONS = (TestSession,)
 
-        cli_ = get_cli(emu.resource_conf)
+        cli_ = get_cli(emu.resource_conf, shared_pool=False)
         session_manager = SessionManagerImpl()
         cli_._session_pool._session_manager = session_manager
-        return Cli(resource_config=emu.resource_conf, logger=emu.logger, cli=cli_)
+        return Cli(
+            resource_config=emu.resource_conf, logger=emu.logger, cli=cli_, **kwargs
+        )
 
     def validate_all_ios_executed(self):
         assert not self.expected_ios
@@ -0,0 +1,151 @@
+from cloudshell.cumulus.linux.connectivity.iface_config_handler import (
+    IfaceConfig,
+    get_source_patterns,
+)
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
+
+CONF = """# This file describes the network interfaces available on your system
+
+source /etc/network/interfaces.d/*.intf
+
+auto lo
+iface lo inet loopback
+
+auto eth0
+iface eth0 inet dhcp
+    vrf mgmt
+
+iface swp1
+    bridge-access 14
+
+auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 14 15
+    bridge-ports swp1 swp2"""
+
+
+def test_parse_and_render_without_changes():
+    conf = IfaceConfig(CONF)
+
+    assert conf.text == CONF
+    assert conf.get_iface("lo").text == "auto lo\niface lo inet loopback"
+    assert conf.get_iface("eth0").get_setting("vrf").values == ("mgmt",)
+    assert conf.get_iface("swp1").get_access_vlan() == "14"
+    assert list(conf.get_iface("br_default").get_trunk_vlans()) == [14, 15]
+    assert conf.get_iface("swp2") is None
+
+
+def test_remove_iface():
+    conf = IfaceConfig(CONF)
+
+    conf.remove_iface("swp1")
+    conf.remove_iface("lo")
+
+    assert conf.get_iface("swp1") is None
+    assert conf.text == CONF.replace(
+        "\n\niface swp1\n    bridge-access 14", ""
+    ).replace("\n\nauto lo\niface lo inet loopback", "")
+
+
+def test_is_vlan_used():
+    conf = IfaceConfig(CONF)
+
+    assert conf.is_vlan_used("14", exclude_bridges=True)
+    assert not conf.is_vlan_used("15", exclude_bridges=True)
+    assert conf.is_vlan_used("15", exclude_bridges=False)
+    assert not conf.is_vlan_used("1", exclude_bridges=False)
+
+
+def test_is_vlan_used_after_changes():
+    conf = IfaceConfig(CONF)
+    swp1 = conf.get_iface("swp1")
+    swp2 = conf.get_or_create_iface("swp2")
+
+    swp1.remove_access_vlan()
+    assert not conf.is_vlan_used("14", exclude_bridges=True)
+
+    swp2.add_trunk_vlans(VlanSet.from_ids(["14", "16"]))
+    assert conf.is_vlan_used("14", exclude_bridges=True)
+    assert conf.is_vlan_used("16", exclude_bridges=True)
+
+    swp2.remove_trunk_vlans(VlanSet.from_ids(["14"]))
+    assert not conf.is_vlan_used("14", exclude_bridges=True)
+    assert conf.is_vlan_used("16", exclude_bridges=True)
+
+    conf.remove_iface("swp2")
+    assert not conf.is_vlan_used("16", exclude_bridges=False)
+
+
+def test_get_source_patterns():
+    text = (
+        "source /etc/network/interfaces.d/*.intf\n"
+        "source ports.intf\n"
+        "source-directory interfaces.d"
+    )
+
+    assert get_source_patterns(text, "/etc/network") == [
+        "/etc/network/interfaces.d/*.intf",
+        "/etc/network/ports.intf",
+        "/etc/network/interfaces.d/*",
+    ]
+
+
+def test_fragments():
+    fragment_path = "/etc/network/interfaces.d/ports.intf"
+    fragment = "auto swp3\niface swp3\n    bridge-access 15\n\nauto swp4\niface swp4"
+    conf = IfaceConfig(CONF, {fragment_path: fragment})
+
+    assert conf.is_vlan_used(15, exclude_bridges=True)
+    assert conf.changed_fragments == {}
+
+    conf.get_iface("swp3").remove_access_vlan()
+    conf.remove_iface("swp4")
+    conf.get_or_create_iface("swp5")
+
+    assert conf.changed_fragments == {fragment_path: "auto swp3\niface swp3"}
+    assert conf.text == f"{CONF}\n\nauto swp5\niface swp5"
+    assert not conf.is_vlan_used(15, exclude_bridges=True)
+
+
+def test_iface_sections_in_main_file_and_fragment():
+    fragment_path = "/etc/network/interfaces.d/ports.intf"
+    conf = IfaceConfig(
+        "auto swp1\niface swp1\n    mtu 9216",
+        {fragment_path: "iface swp1\n    bridge-access 10\n    bridge-vids 20"},
+    )
+    main_iface, fragment_iface = conf.get_ifaces("swp1")
+
+    assert conf.get_iface("swp1") is fragment_iface
+    assert conf.get_iface("swp1", "mtu") is main_iface
+    assert conf.get_iface_vlans("swp1") == VlanSet.from_ids([10, 20])
+
+    main_iface.add_trunk_vlans(VlanSet.from_ids([20]))
+    fragment_iface.remove_trunk_vlans()
+
+    assert conf.is_vlan_used(20, exclude_bridges=True)
+
+    conf.remove_iface("swp1")
+
+    assert conf.text == ""
+    assert conf.changed_fragments == {fragment_path: ""}
+    assert not conf.is_vlan_used(10, exclude_bridges=True)
+    assert not conf.is_vlan_used(20, exclude_bridges=True)
+
+
+def test_setting_is_rendered_as_is_until_changed():
+    conf = IfaceConfig("auto br_default\niface br_default\n\tbridge-vids   14  15")
+    iface = conf.get_iface("br_default")
+    setting = iface.get_setting("bridge-vids")
+
+    setting.values = ["14", "15"]
+    assert not setting.dirty
+    assert conf.text == "auto br_default\niface br_default\n\tbridge-vids   14  15"
+    assert conf.changed_settings == {}
+
+    setting.values = ["14"]
+    assert setting.dirty
+    assert iface.get_setting("bridge-vids") is setting
+    assert conf.text == "auto br_default\niface br_default\n    bridge-vids 14"
+    assert conf.changed_settings == {"br_default": {"bridge-vids"}}
+    assert not conf.is_vlan_used(15, exclude_bridges=False)
@@ -0,0 +1,101 @@
+import pytest
+
+from cloudshell.cumulus.linux.connectivity.iface_config_handler import IfaceConfig
+from cloudshell.cumulus.linux.connectivity.iface_config_validator import (
+    InvalidIfaceConfig,
+    MultipleVlanAwareBridges,
+    get_iface_config_errors,
+    validate_iface_config,
+)
+
+VALID_CONF = """# comment
+auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10-12 20
+    bridge-ports swp1 vni-20
+    # comment
+
+auto swp1
+iface swp1
+    bridge-access 10
+
+auto vni-20
+iface vni-20
+    bridge-access 20
+    vxlan-id 20"""
+
+
+@pytest.mark.parametrize(
+    ("conf_text", "expected_errors"),
+    (
+        (VALID_CONF, set()),
+        (
+            "auto swp1\niface swp1\n\nauto swp1\niface swp1",
+            {"swp1: duplicate iface"},
+        ),
+        (
+            "auto swp1\niface swp1\n    bridge-access 10\n    bridge-access 11",
+            {"swp1: duplicate setting bridge-access"},
+        ),
+        (
+            "auto swp1\niface swp1\n    bridge-access",
+            {"swp1: setting bridge-access has no value"},
+        ),
+        (
+            "auto swp1\niface swp1\n    bridge-access 10 11",
+            {"swp1: bridge-access has extra values ('10', '11')"},
+        ),
+        (
+            "auto swp1\niface swp1\n    bridge-vids 10 5000",
+            {"swp1: bridge-vids is invalid ('10', '5000')"},
+        ),
+        (
+            "auto swp1\niface swp1\n    bridge-access 0",
+            {"swp1: bridge-access is invalid ('0',)"},
+        ),
+        (
+            "auto swp1\niface swp1\n    bridge-access 4095",
+            {"swp1: bridge-access is invalid ('4095',)"},
+        ),
+        (
+            "auto swp1\niface swp1\n    bridge-vids 4090-4095",
+            {"swp1: bridge-vids is invalid ('4090-4095',)"},
+        ),
+        (
+            "auto br\niface br\n    bridge-vlan-aware maybe",
+            {"br: bridge-vlan-aware is invalid ('maybe',)"},
+        ),
+        (
+            "auto vni-1\niface vni-1\n    vxlan-id 0",
+            {"vni-1: vxlan-id is invalid ('0',)"},
+        ),
+        (
+            "auto swp1\niface swp1\n\n    bridge-access 10",
+            {"setting outside of iface section: bridge-access 10"},
+        ),
+    ),
+)
+def test_get_iface_config_errors(conf_text, expected_errors):
+    assert get_iface_config_errors(IfaceConfig(conf_text)) == expected_errors
+
+
+def test_validate_iface_config_ignores_orig_errors():
+    orig_conf = IfaceConfig("auto swp1\niface swp1\n    bridge-access 10 11")
+    conf = IfaceConfig(f"{orig_conf.text}\n\nauto swp2\niface swp2\n    bridge-vids")
+
+    with pytest.raises(InvalidIfaceConfig) as exc_info:
+        validate_iface_config(conf, orig_conf)
+
+    assert exc_info.value.errors == ["swp2: setting bridge-vids has no value"]
+
+
+def test_validate_iface_config_vlan_aware_bridges():
+    orig_conf = IfaceConfig(VALID_CONF)
+    conf = IfaceConfig(
+        f"{VALID_CONF}\n\nauto br_qinq\niface br_qinq\n    bridge-vlan-aware yes"
+    )
+
+    validate_iface_config(conf, orig_conf)
+    with pytest.raises(MultipleVlanAwareBridges):
+        validate_iface_config(conf, orig_conf, multiple_vlan_aware_bridges=False)
@@ -1,5 +1,6 @@
 import pytest
 
+from cloudshell.cumulus.linux.connectivity.iface_config_handler import IfaceConfig
 from cloudshell.cumulus.linux.connectivity.vlan_config_handler import VlanConfHandler
 
 
@@ -985,6 +986,10 @@ def test_remove_vlan(conf_text, port_names, expected_conf_text):
     assert conf.text == f"{expected_conf_text}\n"
     assert conf.orig_text == conf_text
 
+    bulk_conf = VlanConfHandler(conf_text)
+    bulk_conf.remove_vlans(port_names)
+    assert bulk_conf.text == f"{expected_conf_text}\n"
+
 
 @pytest.mark.parametrize(
     ("conf_text", "map_port_vlan", "expected_conf_text"),
@@ -1018,7 +1023,7 @@ iface swp1
             """auto br_default
 iface br_default
     bridge-vlan-aware yes
-    bridge-vids 14 15 16
+    bridge-vids 14-16
     bridge-ports swp1 swp2 swp3
 
 auto swp1
@@ -1091,7 +1096,7 @@ iface vni-14
 iface br_qinq
     bridge-vlan-aware yes
     bridge-vlan-protocol 802.1ad
-    bridge-vids 14 15 16
+    bridge-vids 14-16
     bridge-ports swp1 swp2 swp3 vni-14 vni-15 vni-16
 
 auto swp1
@@ -1165,7 +1170,7 @@ iface swp1
             """auto br_default
 iface br_default
     bridge-vlan-aware yes
-    bridge-vids 13 14 15 16 17
+    bridge-vids 13-17
     bridge-ports swp1 swp2 swp3
 
 auto swp1
@@ -1278,3 +1283,137 @@ def test_add_vlan_trunk_qinq(conf_text, map_port_vlan, expected_conf_text):
 
     assert conf.text == expected_conf_text + "\n"
     assert conf.orig_text == conf_text
+
+
+BRIDGE_CONF = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp1
+
+auto swp1
+iface swp1
+    bridge-access 10"""
+
+
+FRAGMENT_PATH = "/etc/network/interfaces.d/ports.intf"
+SPLIT_IFACE_CONF = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp1
+
+auto swp1
+iface swp1
+    mtu 9216"""
+
+
+def test_remove_vlan_iface_split_across_files():
+    conf = VlanConfHandler(
+        SPLIT_IFACE_CONF, {FRAGMENT_PATH: "iface swp1\n    bridge-access 10\n"}
+    )
+
+    conf.remove_vlan("swp1")
+
+    assert conf.text == (
+        "auto br_default\n"
+        "iface br_default\n"
+        "    bridge-vlan-aware yes\n"
+        "\n"
+        "auto swp1\n"
+        "iface swp1\n"
+        "    mtu 9216\n"
+    )
+    assert conf.changed_fragments == {FRAGMENT_PATH: "iface swp1\n\n"}
+
+
+def test_add_vlan_iface_split_across_files():
+    conf = VlanConfHandler(
+        SPLIT_IFACE_CONF, {FRAGMENT_PATH: "iface swp1\n    bridge-access 10\n"}
+    )
+
+    conf.prepare_bridge(qinq=False)
+    conf.add_access_vlan("swp1", "11", qinq=False)
+
+    assert conf.text == SPLIT_IFACE_CONF.replace("vids 10", "vids 10 11") + "\n"
+    assert conf.changed_fragments == {
+        FRAGMENT_PATH: "iface swp1\n    bridge-access 11\n\n"
+    }
+
+
+def test_re_add_vlan_keeps_settings_order():
+    # NCLU writes bridge-vids after bridge-ports
+    conf_text = """auto br_default
+iface br_default
+    bridge-ports swp1
+    bridge-vids 10
+    bridge-vlan-aware yes
+
+auto swp1
+iface swp1
+    bridge-access 10"""
+    conf = VlanConfHandler(conf_text)
+
+    conf.remove_vlan("swp1")
+    conf.prepare_bridge(qinq=False)
+    conf.add_access_vlan("swp1", "10", qinq=False)
+
+    assert not conf.is_changed
+
+
+def test_render_is_cached_until_change(monkeypatch):
+    conf = VlanConfHandler(
+        SPLIT_IFACE_CONF, {FRAGMENT_PATH: "iface swp1\n    bridge-access 10\n"}
+    )
+    render = IfaceConfig._render
+    rendered = []
+
+    def render_counted(nodes):
+        rendered.append(nodes)
+        return render(nodes)
+
+    monkeypatch.setattr(IfaceConfig, "_render", staticmethod(render_counted))
+    conf.add_access_vlan("swp1", "11", qinq=False)
+
+    assert conf.is_changed
+    assert conf.text == SPLIT_IFACE_CONF.replace("vids 10", "vids 10 11") + "\n"
+    assert conf.changed_fragments
+    # the main file and the fragment are rendered once
+    assert len(rendered) == 2
+
+    conf.remove_vlan("swp1")
+    assert "bridge-ports" not in conf.text
+    assert len(rendered) == 3
+
+
+def test_get_ifaces_to_reload_changed_ifaces():
+    conf = VlanConfHandler(BRIDGE_CONF)
+    conf.prepare_bridge(qinq=False)
+    conf.add_access_vlan("swp2", "11", qinq=False)
+
+    assert conf.get_ifaces_to_reload() == ["br_default", "swp2"]
+
+
+def test_get_ifaces_to_reload_nothing_changed():
+    conf = VlanConfHandler(BRIDGE_CONF)
+    conf.prepare_bridge(qinq=False)
+    conf.add_access_vlan("swp1", "10", qinq=False)
+
+    assert conf.get_ifaces_to_reload() == []
+
+
+@pytest.mark.parametrize(
+    "change",
+    (
+        lambda conf: conf.prepare_bridge(qinq=True),  # new bridge
+        lambda conf: conf.remove_vlan("swp1"),  # removed vni
+    ),
+)
+def test_get_ifaces_to_reload_all(change):
+    conf = VlanConfHandler(
+        BRIDGE_CONF.replace("bridge-ports swp1", "bridge-ports swp1 vni-10")
+        + "\n\nauto vni-10\niface vni-10\n    bridge-access 10\n    vxlan-id 10"
+    )
+    change(conf)
+
+    assert conf.get_ifaces_to_reload() is None
@@ -0,0 +1,38 @@
+import pytest
+
+from cloudshell.cumulus.linux.connectivity.vlan_set import VlanSet
+
+
+@pytest.mark.parametrize(
+    ("values", "expected_values"),
+    (
+        ([], []),
+        (["10"], ["10"]),
+        (["10", "11"], ["10", "11"]),
+        (["10-12"], ["10-12"]),
+        (["20-10", "30", "1"], ["1", "10-20", "30"]),
+        (["10", "12", "11", "13-15"], ["10-15"]),
+        (["1-4094"], ["1-4094"]),
+    ),
+)
+def test_to_values(values, expected_values):
+    assert VlanSet.from_values(values).to_values() == expected_values
+
+
+def test_set_operations():
+    vlans = VlanSet.from_values(["10-20", "30"])
+
+    assert len(vlans) == 12
+    assert 15 in vlans
+    assert "30" in vlans
+    assert 21 not in vlans
+    assert list(vlans - VlanSet.from_values(["11-20"])) == [10, 30]
+    assert str(vlans | VlanSet.from_ids([21, 22])) == "10-22 30"
+    assert str(vlans & VlanSet.from_ids([9, 10, 30])) == "10 30"
+    assert not VlanSet()
+
+
+@pytest.mark.parametrize("value", ("4096", "-1", "a", "10-a"))
+def test_invalid_vlan(value):
+    with pytest.raises(ValueError):
+        VlanSet.from_values([value])
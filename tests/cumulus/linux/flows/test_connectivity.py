@@ -15,8 +15,20 @@ from cloudshell.shell.flows.connectivity.parse_request_service import (
 from cloudshell.cumulus.linux.command_templates import (
     CommandError,
     NotSupports2VlanAwareBridges,
+    QinQNotSupported,
+    ResourceBusy,
 )
-from cloudshell.cumulus.linux.flows.connectivity_flow import CumulusConnectivityFlow
+from cloudshell.cumulus.linux.connectivity.iface_config_validator import (
+    MultipleVlanAwareBridges,
+)
+from cloudshell.cumulus.linux.connectivity.vlan_config_handler import VlanConfHandler
+from cloudshell.cumulus.linux.flows.connectivity_flow import (
+    ConnectivityBackend,
+    CumulusConnectivityFlow,
+)
+from cloudshell.cumulus.linux.utils.counters import CounterName, counters
+from cloudshell.cumulus.linux.utils.file_cache import get_text_md5
+from cloudshell.cumulus.linux.utils.latency_history import get_latency_history
 
 from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
 
@@ -106,12 +118,12 @@ iface swp2
             """auto br_default
 iface br_default
     bridge-vlan-aware yes
-    bridge-vids 14 15 16
+    bridge-vids 14-16
     bridge-ports swp3
 
 auto swp3
 iface swp3
-    bridge-vids 14 15 16""",
+    bridge-vids 14-16""",
         ),
         (
             "14",
@@ -248,14 +260,7 @@ iface vni-10
         *ENTER_ROOT_MODE,
         Input("cat /etc/network/interfaces && echo"),
         Output(orig_conf, Prompt.ROOT),
-        Input(f'printf "{orig_conf}\n" > /etc/network/interfaces'),
-        Output("", Prompt.ROOT),
-        Input("ifreload -a"),
-        Output("", Prompt.ROOT),
-        Input(""),  # start set VLAN, receive the session and check prompt
-        Output("", Prompt.ROOT),
-        Input("cat /etc/network/interfaces && echo"),
-        Output(orig_conf, Prompt.ROOT),
+        # the remove copy and the set are applied in one change
         Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
         Output("", Prompt.ROOT),
         Input("ifreload -a"),
@@ -504,7 +509,7 @@ iface br_qinq
     bridge-vlan-protocol 802.1ad
 
 """
-    conf_after_remove_vlan = """# Auto-generated by NVUE!
+    conf_after_set_vlan = """# Auto-generated by NVUE!
 # Any local modifications will prevent NVUE from re-generating this file.
 # md5sum: 5d90fa0e4d8af28dcae1b4832e137f29
 # This file describes the network interfaces available on your system
@@ -532,6 +537,7 @@ iface swp2
 
 auto swp3
 iface swp3
+    bridge-access 500
 
 auto br_default
 iface br_default
@@ -547,79 +553,1060 @@ auto br_qinq
 iface br_qinq
     bridge-vlan-aware yes
     bridge-vlan-protocol 802.1ad
-"""
-    conf_after_set_vlan = """# Auto-generated by NVUE!
-# Any local modifications will prevent NVUE from re-generating this file.
-# md5sum: 5d90fa0e4d8af28dcae1b4832e137f29
-# This file describes the network interfaces available on your system
-# and how to activate them. For more information, see interfaces(5).
+    bridge-vids 500
+    bridge-ports swp3 vni-500
 
-source /etc/network/interfaces.d/*.intf
+auto vni-500
+iface vni-500
+    bridge-access 500
+    vxlan-id 500
+"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        # the port is moved from br_default to br_qinq in one change
+        Input(f'printf "{conf_after_set_vlan}" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
 
-auto lo
-iface lo inet loopback
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(service, logger, resource_conf, test_cli)
+    flow.apply_connectivity(request)
+    cli_emu.validate_all_ios_executed()
 
-auto mgmt
-iface mgmt
-    address 127.0.0.1/8
-    address ::1/128
-    vrf-table auto
 
-auto eth0
-iface eth0 inet dhcp
-    ip-forward off
-    ip6-forward off
-    vrf mgmt
+def test_apply_connectivity_batch(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request
+):
+    actions = []
+    for i, (port_name, vlan_id) in enumerate((("swp2", "10"), ("swp3", "11"))):
+        action = create_action_request(
+            set_vlan=True,
+            vlan_id=vlan_id,
+            mode=ConnectionModeEnum.ACCESS,
+            qnq=False,
+            port_name=port_name,
+        )
+        action["actionId"] = f"{action['actionId']}_{i}"
+        actions.append(action)
+    request = {"driverRequest": {"actions": actions}}
+    orig_conf = "auto br_default\niface br_default"
+    new_conf = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10 11
+    bridge-ports swp2 swp3
 
 auto swp2
 iface swp2
+    bridge-access 10
 
 auto swp3
 iface swp3
-    bridge-access 500
+    bridge-access 11"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
 
-auto br_default
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(
+        service, logger, resource_conf, test_cli, batch_actions=True
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = resp["driverResponse"]["actionResults"]
+    assert len(results) == 2
+    assert all(result["success"] for result in results)
+    cli_emu.validate_all_ios_executed()
+
+
+def test_apply_connectivity_batch_failed_action_is_not_uploaded(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request, monkeypatch
+):
+    def add_vni(*args):
+        raise ValueError("VXLAN isn't supported")
+
+    # the port and the bridge are already changed when the action fails
+    monkeypatch.setattr(VlanConfHandler, "_add_vni", add_vni)
+    valid_action = create_action_request(set_vlan=True, port_name="swp2")
+    invalid_action = create_action_request(
+        set_vlan=True, vlan_id="11", qnq=True, port_name="swp3"
+    )
+    invalid_action["actionId"] = f"{invalid_action['actionId']}_1"
+    request = {"driverRequest": {"actions": [valid_action, invalid_action]}}
+    orig_conf = "auto br_default\niface br_default"
+    new_conf = """auto br_default
 iface br_default
-    hwaddress 00:50:56:a8:9c:e5
     bridge-vlan-aware yes
-    bridge-vids 1
-    bridge-pvid 1
+    bridge-vids 10
+    bridge-ports swp2
 
-auto swp1
-iface swp1
+auto swp2
+iface swp2
+    bridge-access 10"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(
+        service, logger, resource_conf, test_cli, batch_actions=True
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = {
+        result["actionId"]: result["success"]
+        for result in resp["driverResponse"]["actionResults"]
+    }
+    assert results == {
+        valid_action["actionId"]: True,
+        invalid_action["actionId"]: False,
+    }
+    cli_emu.validate_all_ios_executed()
+
+
+def test_plan_connectivity_failed_action_is_dropped(
+    logger, resource_conf, create_vlan_action
+):
+    actions = [
+        create_vlan_action(set_vlan=True, port_name="swp2"),
+        create_vlan_action(
+            set_vlan=True,
+            vlan_id="abc",
+            mode=ConnectionModeEnum.TRUNK,
+            qnq=True,
+            port_name="swp3",
+        ),
+    ]
+    actions[1].action_id += "_1"
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, None, batch_actions=True
+    )
+
+    plan = flow.plan_connectivity(actions, "auto br_default\niface br_default")
+
+    assert list(plan.failed_actions) == [actions[1].action_id]
+    assert "br_qinq" not in plan.diff
+    assert "+    bridge-access 10\n" in plan.diff
+
+
+def test_apply_connectivity_batch_failed(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request
+):
+    orig_conf = "auto br_default\niface br_default"
+    new_conf = """auto br_default
+iface br_default
 
 auto br_qinq
 iface br_qinq
     bridge-vlan-aware yes
     bridge-vlan-protocol 802.1ad
-    bridge-vids 500
-    bridge-ports swp3 vni-500
+    bridge-vids 10
+    bridge-ports swp2 vni-10
 
-auto vni-500
-iface vni-500
-    bridge-access 500
-    vxlan-id 500
-"""
+auto swp2
+iface swp2
+    bridge-access 10
+
+auto vni-10
+iface vni-10
+    bridge-access 10
+    vxlan-id 10"""
+    request = create_action_request(
+        set_vlan=True,
+        vlan_id="10",
+        mode=ConnectionModeEnum.ACCESS,
+        qnq=True,
+        port_name="swp2",
+    )
+    request = {"driverRequest": {"actions": [request]}}
+    failed_reload = [
+        Input("ifreload -a"),
+        Output(
+            "Only one object with attribute 'bridge-vlan-aware yes' allowed",
+            Prompt.ROOT,
+        ),
+        Input(f'printf "{orig_conf}" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+    ]
     ios = [
+        # batch
         *ENTER_ROOT_MODE,
         Input("cat /etc/network/interfaces && echo"),
         Output(orig_conf, Prompt.ROOT),
-        Input(f'printf "{conf_after_remove_vlan}" > /etc/network/interfaces'),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
         Output("", Prompt.ROOT),
-        Input("ifreload -a"),
+        *failed_reload,
+        # remove VLAN, nothing to remove
+        Input(""),
         Output("", Prompt.ROOT),
-        Input(""),  # get session from pool is set VLAN
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        # set VLAN
+        Input(""),
         Output("", Prompt.ROOT),
         Input("cat /etc/network/interfaces && echo"),
-        Output(conf_after_remove_vlan, Prompt.ROOT),
-        Input(f'printf "{conf_after_set_vlan}" > /etc/network/interfaces'),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
         Output("", Prompt.ROOT),
-        Input("ifreload -a"),
+        *failed_reload,
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(
+        service, logger, resource_conf, test_cli, batch_actions=True
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = resp["driverResponse"]["actionResults"]
+    assert len(results) == 1
+    assert results[0]["success"] is False
+    emsg = "version of Cumulus doesn't support 2 VLAN aware bridges"
+    assert emsg in results[0]["errorMessage"]
+    cli_emu.validate_all_ios_executed()
+
+
+def test_apply_connectivity_batch_load_failed(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request
+):
+    actions = []
+    for i, port_name in enumerate(("swp2", "swp3")):
+        action = create_action_request(set_vlan=True, port_name=port_name)
+        action["actionId"] = f"{action['actionId']}_{i}"
+        actions.append(action)
+    request = {"driverRequest": {"actions": actions}}
+    failed_read = [
+        Input("cat /etc/network/interfaces && echo"),
+        Output("error: Input/output error", Prompt.ROOT),
+    ]
+    ios = [
+        *ENTER_ROOT_MODE,
+        *failed_read,
+        # remove VLAN of each port one by one
+        *(Input(""), Output("", Prompt.ROOT), *failed_read),
+        *(Input(""), Output("", Prompt.ROOT), *failed_read),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(
+        service, logger, resource_conf, test_cli, batch_actions=True
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = resp["driverResponse"]["actionResults"]
+    assert len(results) == 2
+    assert not any(result["success"] for result in results)
+    cli_emu.validate_all_ios_executed()
+
+
+def test_apply_connectivity_batch_rollback_failed(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request
+):
+    orig_conf = "auto br_default\niface br_default"
+    new_conf = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp2
+
+auto swp2
+iface swp2
+    bridge-access 10"""
+    request = create_action_request(set_vlan=True, port_name="swp2")
+    request = {"driverRequest": {"actions": [request]}}
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
         Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("error: swp2: failed", Prompt.ROOT),
+        Input(f'printf "{orig_conf}" > /etc/network/interfaces'),
+        Output("error: Read-only file system", Prompt.ROOT),
     ]
     test_cli = cli_emu.create_cli(ios)
 
     service = ParseConnectivityRequestService(True, True)
-    flow = CumulusConnectivityFlow(service, logger, resource_conf, test_cli)
-    flow.apply_connectivity(request)
+    flow = CumulusConnectivityFlow(
+        service, logger, resource_conf, test_cli, batch_actions=True
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = resp["driverResponse"]["actionResults"]
+    assert len(results) == 1
+    assert results[0]["success"] is False
+    assert "Failed to roll back" in results[0]["errorMessage"]
+    cli_emu.validate_all_ios_executed()
+
+
+def test_set_vlan_with_cached_iface_conf(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action
+):
+    resource_conf.address = "192.168.10.1"
+    orig_conf = "auto br_default\niface br_default"
+    conf_after_1st = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp2
+
+auto swp2
+iface swp2
+    bridge-access 10"""
+    conf_after_2nd = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10 11
+    bridge-ports swp2 swp3
+
+auto swp2
+iface swp2
+    bridge-access 10
+
+auto swp3
+iface swp3
+    bridge-access 11"""
+    md5_cmd = "md5sum /etc/network/interfaces"
+    uploaded_md5 = get_text_md5(f"{conf_after_1st}\n")
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input(md5_cmd),
+        Output(f"{get_text_md5(orig_conf)}  /etc/network/interfaces", Prompt.ROOT),
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{conf_after_1st}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+        Input(""),
+        Output("", Prompt.ROOT),
+        Input(md5_cmd),
+        Output(f"{uploaded_md5}  /etc/network/interfaces", Prompt.ROOT),
+        Input(f'printf "{conf_after_2nd}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, cache_iface_conf=True
+    )
+    assert flow._set_vlan(create_vlan_action(set_vlan=True, vlan_id="10")).success
+    action = create_vlan_action(set_vlan=True, vlan_id="11", port_name="swp3")
+    assert flow._set_vlan(action).success
+    cli_emu.validate_all_ios_executed()
+
+
+@pytest.mark.parametrize("md5_matches", (True, False))
+def test_remove_vlan_with_patched_iface_conf(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action, md5_matches
+):
+    orig_conf = """auto lo
+iface lo inet loopback
+
+auto eth0
+iface eth0 inet dhcp
+    vrf mgmt
+
+auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp1 swp2
+
+auto swp1
+iface swp1
+    bridge-access 10
+
+auto swp2
+iface swp2
+    bridge-access 10"""
+    new_conf = orig_conf.replace("swp1 swp2", "swp1").replace(
+        "iface swp2\n    bridge-access 10", "iface swp2"
+    )
+    md5 = get_text_md5(f"{new_conf}\n") if md5_matches else "0" * 32
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(
+            "sed -i -e '12c\\    bridge-ports swp1' -e '20d' /etc/network/interfaces"
+        ),
+        Output("", Prompt.ROOT),
+        Input("md5sum /etc/network/interfaces"),
+        Output(f"{md5}  /etc/network/interfaces", Prompt.ROOT),
+    ]
+    if not md5_matches:
+        ios.extend(
+            [
+                Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+                Output("", Prompt.ROOT),
+            ]
+        )
+    ios.extend([Input("ifreload -a"), Output("", Prompt.ROOT)])
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, patch_iface_conf=True
+    )
+    action = create_vlan_action(set_vlan=False, vlan_id="10", port_name="swp2")
+    assert flow._remove_vlan(action).success
+    cli_emu.validate_all_ios_executed()
+
+
+@pytest.mark.parametrize("reload_failed", (False, True))
+def test_set_vlan_with_targeted_reload(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action, reload_failed
+):
+    orig_conf = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp1
+
+auto swp1
+iface swp1
+    bridge-access 10"""
+    new_conf = f"""{orig_conf.replace("ports swp1", "ports swp1 swp2")}
+
+auto swp2
+iface swp2
+    bridge-access 10"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifup br_default swp2"),
+    ]
+    if reload_failed:
+        ios.extend(
+            [
+                Output("error: swp2: failed", Prompt.ROOT),
+                Input(f'printf "{orig_conf}" > /etc/network/interfaces'),
+                Output("", Prompt.ROOT),
+                Input("ifreload -a"),
+            ]
+        )
+    ios.append(Output("", Prompt.ROOT))
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, targeted_reload=True
+    )
+    action = create_vlan_action(set_vlan=True, vlan_id="10", port_name="swp2")
+    if reload_failed:
+        with pytest.raises(CommandError):
+            flow._set_vlan(action)
+    else:
+        assert flow._set_vlan(action).success
+    cli_emu.validate_all_ios_executed()
+
+
+@pytest.mark.parametrize("retries", (0, 1))
+def test_set_vlan_reload_retried(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action, monkeypatch, retries
+):
+    resource_conf.address = "192.168.10.3"
+    sleeps = []
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.command_actions.system.time.sleep", sleeps.append
+    )
+    orig_conf = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp1"""
+    new_conf = f"""{orig_conf} swp2
+
+auto swp2
+iface swp2
+    bridge-access 10"""
+    busy = "error: Another instance of this program is already running."
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifup br_default swp2"),
+        Output(busy, Prompt.ROOT),
+    ]
+    if retries:
+        ios.extend([Input("ifup br_default swp2"), Output("", Prompt.ROOT)])
+    else:
+        ios.extend(
+            [
+                Input(f'printf "{orig_conf}" > /etc/network/interfaces'),
+                Output("", Prompt.ROOT),
+                Input("ifreload -a"),
+                Output("", Prompt.ROOT),
+            ]
+        )
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None,
+        logger,
+        resource_conf,
+        test_cli,
+        targeted_reload=True,
+        reload_retries=retries,
+        adaptive_reload_timeout=True,
+    )
+    action = create_vlan_action(set_vlan=True, vlan_id="10", port_name="swp2")
+    if retries:
+        assert flow._set_vlan(action).success
+        assert sleeps == [1.0]
+        history = get_latency_history(resource_conf.address, "ifup")
+        assert len(history.durations) == 1
+    else:
+        with pytest.raises(ResourceBusy):
+            flow._set_vlan(action)
+        assert sleeps == []
+    cli_emu.validate_all_ios_executed()
+
+
+def test_set_vlan_rejected_by_validation(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action
+):
+    resource_conf.address = "192.168.10.2"
+    orig_conf = """auto br_default
+iface br_default
+    bridge-vlan-aware yes"""
+    new_conf = f"""{orig_conf}
+
+auto br_qinq
+iface br_qinq
+    bridge-vlan-aware yes
+    bridge-vlan-protocol 802.1ad
+    bridge-vids 10
+    bridge-ports swp2 vni-10
+
+auto swp2
+iface swp2
+    bridge-access 10
+
+auto vni-10
+iface vni-10
+    bridge-access 10
+    vxlan-id 10"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output(
+            "Only one object with attribute 'bridge-vlan-aware yes' allowed",
+            Prompt.ROOT,
+        ),
+        Input(f'printf "{orig_conf}" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+        # the device doesn't support 2 bridges, the next change isn't uploaded
+        Input(""),
+        Output("", Prompt.ROOT),
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, validate_iface_conf=True
+    )
+    action = create_vlan_action(set_vlan=True, vlan_id="10", qnq=True)
+    with pytest.raises(NotSupports2VlanAwareBridges):
+        flow._set_vlan(action)
+    with pytest.raises(MultipleVlanAwareBridges):
+        flow._set_vlan(action)
+    cli_emu.validate_all_ios_executed()
+
+
+def test_remove_vlan_with_iface_fragments(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action
+):
+    orig_conf = """source /etc/network/interfaces.d/*.intf
+
+auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10 11
+    bridge-ports swp1 swp2"""
+    fragments_output = """==> /etc/network/interfaces.d/swp1.intf <==
+auto swp1
+iface swp1
+    bridge-access 10
+
+==> /etc/network/interfaces.d/swp2.intf <==
+auto swp2
+iface swp2
+    bridge-access 11
+"""
+    new_conf = """source /etc/network/interfaces.d/*.intf
+
+auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10
+    bridge-ports swp1"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input("tail -v -n +1 /etc/network/interfaces.d/*.intf 2>/dev/null; echo"),
+        Output(fragments_output, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input('printf "auto swp2\niface swp2\n" > /etc/network/interfaces.d/swp2.intf'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, include_iface_fragments=True
+    )
+    action = create_vlan_action(set_vlan=False, vlan_id="11", port_name="swp2")
+    assert flow._remove_vlan(action).success
+    cli_emu.validate_all_ios_executed()
+
+
+NVUE_PORTS_CONF = """auto br_default
+iface br_default
+    bridge-ports swp2 swp3 swp4
+    bridge-vids 5 30
+    bridge-vlan-aware yes
+
+auto swp2
+iface swp2
+    bridge-access 5
+
+auto swp3
+iface swp3
+    bridge-vids 30
+
+auto swp4
+iface swp4
+    bridge-access 30"""
+
+
+def test_apply_connectivity_nvue(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request
+):
+    actions = []
+    for i, (port_name, vlan_id, mode) in enumerate(
+        (
+            ("swp2", "10", ConnectionModeEnum.ACCESS),
+            ("swp3", "20-22", ConnectionModeEnum.TRUNK),
+        )
+    ):
+        action = create_action_request(
+            set_vlan=True, vlan_id=vlan_id, mode=mode, port_name=port_name
+        )
+        action["actionId"] = f"{action['actionId']}_{i}"
+        actions.append(action)
+    request = {"driverRequest": {"actions": actions}}
+    ios = [
+        *ENTER_ROOT_MODE,
+        # ports that use the VLANs are found in the file on the first removal
+        Input("cat /etc/network/interfaces && echo"),
+        Output(NVUE_PORTS_CONF, Prompt.ROOT),
+        # VLANs are removed from the ports before setting new ones
+        Input("nv unset interface swp2 bridge domain br_default"),
+        Output("", Prompt.ROOT),
+        # VLAN 5 isn't used by other ports
+        Input("nv unset bridge domain br_default vlan 5"),
+        Output("", Prompt.ROOT),
+        Input("nv unset interface swp3 bridge domain br_default"),
+        Output("", Prompt.ROOT),
+        Input("nv set bridge domain br_default vlan 10"),
+        Output("", Prompt.ROOT),
+        Input("nv set interface swp2 bridge domain br_default access 10"),
+        Output("", Prompt.ROOT),
+        Input("nv set bridge domain br_default vlan 20-22"),
+        Output("", Prompt.ROOT),
+        Input("nv set interface swp3 bridge domain br_default vlan 20-22"),
+        Output("", Prompt.ROOT),
+        Input("nv config apply -y"),
+        Output("applied [rev_id: 2]", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(
+        service, logger, resource_conf, test_cli, backend=ConnectivityBackend.NVUE
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = resp["driverResponse"]["actionResults"]
+    assert len(results) == 2
+    assert all(result["success"] for result in results)
+    cli_emu.validate_all_ios_executed()
+
+
+def test_remove_vlan_nclu_commit_failed(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action
+):
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(
+            "auto bridge\niface bridge\n    bridge-vids 10\n\n"
+            "auto swp2\niface swp2\n    bridge-access 10",
+            Prompt.ROOT,
+        ),
+        Input("net del interface swp2 bridge access"),
+        Output("", Prompt.ROOT),
+        Input("net del interface swp2 bridge vids"),
+        Output("", Prompt.ROOT),
+        Input("net del bridge bridge ports swp2"),
+        Output("", Prompt.ROOT),
+        Input("net del bridge bridge vids 10"),
+        Output("", Prompt.ROOT),
+        Input("net commit"),
+        Output("ERROR: failed to apply", Prompt.ROOT),
+        Input("net abort"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, backend=ConnectivityBackend.NCLU
+    )
+    with pytest.raises(CommandError):
+        flow._remove_vlan(create_vlan_action(set_vlan=False))
+    cli_emu.validate_all_ios_executed()
+
+
+def test_apply_connectivity_nclu_failed_action_is_not_staged(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request
+):
+    actions = []
+    for i, port_name in enumerate(("swp2", "swp3")):
+        action = create_action_request(set_vlan=True, port_name=port_name)
+        action["actionId"] = f"{action['actionId']}_{i}"
+        actions.append(action)
+    request = {"driverRequest": {"actions": actions}}
+    stage_swp2 = [
+        Input("net add interface swp2 bridge access 10"),
+        Output("", Prompt.ROOT),
+        Input("net add bridge bridge vids 10"),
+        Output("", Prompt.ROOT),
+        Input("net add bridge bridge ports swp2"),
+        Output("", Prompt.ROOT),
+    ]
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output("", Prompt.ROOT),
+        *(
+            io
+            for port_name in ("swp2", "swp3")
+            for io in (
+                Input(f"net del interface {port_name} bridge access"),
+                Output("", Prompt.ROOT),
+                Input(f"net del interface {port_name} bridge vids"),
+                Output("", Prompt.ROOT),
+                Input(f"net del bridge bridge ports {port_name}"),
+                Output("", Prompt.ROOT),
+            )
+        ),
+        *stage_swp2,
+        Input("net add interface swp3 bridge access 10"),
+        Output("", Prompt.ROOT),
+        Input("net add bridge bridge vids 10"),
+        Output("", Prompt.ROOT),
+        Input("net add bridge bridge ports swp3"),
+        Output("ERROR: swp3 is not a valid port", Prompt.ROOT),
+        # the staged commands of swp3 are dropped
+        Input("net abort"),
+        Output("", Prompt.ROOT),
+        *(
+            io
+            for port_name in ("swp2", "swp3")
+            for io in (
+                Input(f"net del interface {port_name} bridge access"),
+                Output("", Prompt.ROOT),
+                Input(f"net del interface {port_name} bridge vids"),
+                Output("", Prompt.ROOT),
+                Input(f"net del bridge bridge ports {port_name}"),
+                Output("", Prompt.ROOT),
+            )
+        ),
+        *stage_swp2,
+        Input("net commit"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(
+        service,
+        logger,
+        resource_conf,
+        test_cli,
+        batch_actions=True,
+        backend=ConnectivityBackend.NCLU,
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = {
+        result["actionId"]: result["success"]
+        for result in resp["driverResponse"]["actionResults"]
+    }
+    assert results == {actions[0]["actionId"]: True, actions[1]["actionId"]: False}
+    cli_emu.validate_all_ios_executed()
+
+
+def test_set_vlan_qinq_not_supported_by_nclu(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action
+):
+    test_cli = cli_emu.create_cli(ENTER_ROOT_MODE)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, backend=ConnectivityBackend.NCLU
+    )
+    with pytest.raises(QinQNotSupported):
+        flow._set_vlan(create_vlan_action(set_vlan=True, qnq=True))
+    cli_emu.validate_all_ios_executed()
+
+
+@pytest.mark.parametrize(
+    ("options", "expected_round_trips", "expected_reload_ifaces"),
+    (
+        # remove VLAN from each port: read only, nothing to remove
+        # set VLAN for each port: read, write, reload
+        ({}, 6, None),
+        ({"batch_actions": True}, 3, None),
+        ({"batch_actions": True, "cache_iface_conf": True}, 4, None),
+        ({"batch_actions": True, "sftp_file_transfer": True}, 4, None),
+        # read and write: one chunk, MD5 sum and size or moving the new file
+        ({"batch_actions": True, "chunked_file_transfer": True}, 8, None),
+        (
+            {"batch_actions": True, "targeted_reload": True},
+            3,
+            {"br_default", "swp2", "swp3"},
+        ),
+    ),
+)
+def test_plan_connectivity(
+    logger,
+    resource_conf,
+    create_vlan_action,
+    options,
+    expected_round_trips,
+    expected_reload_ifaces,
+):
+    conf_text = "auto br_default\niface br_default\n    bridge-vlan-aware yes"
+    actions = [
+        create_vlan_action(set_vlan=True, vlan_id="10", port_name="swp2"),
+        create_vlan_action(set_vlan=True, vlan_id="11", port_name="swp3"),
+    ]
+    actions[1].action_id += "_1"
+    flow = CumulusConnectivityFlow(None, logger, resource_conf, None, **options)
+
+    plan = flow.plan_connectivity(actions, conf_text)
+
+    assert plan.diff == (
+        "--- a/etc/network/interfaces\n"
+        "+++ b/etc/network/interfaces\n"
+        "@@ -1,3 +1,13 @@\n"
+        " auto br_default\n"
+        " iface br_default\n"
+        "     bridge-vlan-aware yes\n"
+        "+    bridge-vids 10 11\n"
+        "+    bridge-ports swp2 swp3\n"
+        "+\n"
+        "+auto swp2\n"
+        "+iface swp2\n"
+        "+    bridge-access 10\n"
+        "+\n"
+        "+auto swp3\n"
+        "+iface swp3\n"
+        "+    bridge-access 11\n"
+    )
+    assert plan.round_trips == expected_round_trips
+    assert plan.reload_ifaces == expected_reload_ifaces
+    assert plan.failed_actions == {}
+
+
+@pytest.mark.parametrize("batch_actions", (False, True))
+def test_set_existing_vlan_is_skipped(
+    cli_emu: CliEmu, logger, resource_conf, create_action_request, batch_actions
+):
+    # NCLU writes bridge-vids after bridge-ports
+    orig_conf = """auto br_default
+iface br_default
+    bridge-ports swp2
+    bridge-vids 10
+    bridge-vlan-aware yes
+
+auto swp2
+iface swp2
+    bridge-access 10"""
+    action = create_action_request(set_vlan=True, vlan_id="10", port_name="swp2")
+    request = {"driverRequest": {"actions": [action]}}
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+    skipped = counters.get(CounterName.NO_OP_SKIPPED)
+
+    service = ParseConnectivityRequestService(True, True)
+    flow = CumulusConnectivityFlow(
+        service, logger, resource_conf, test_cli, batch_actions=batch_actions
+    )
+    resp = json.loads(flow.apply_connectivity(json.dumps(request)))
+
+    results = resp["driverResponse"]["actionResults"]
+    assert len(results) == 1
+    assert results[0]["success"] is True
+    assert counters.get(CounterName.NO_OP_SKIPPED) == skipped + 1
+    cli_emu.validate_all_ios_executed()
+
+
+@pytest.mark.parametrize("reload_failed", (False, True))
+def test_set_vlan_with_journal(
+    cli_emu: CliEmu, logger, resource_conf, create_vlan_action, reload_failed
+):
+    journal_dir = "/etc/network/.cloudshell_journal"
+    recover_cmd = (
+        f"if test -d {journal_dir}; then cp -rp {journal_dir}/. / && "
+        f"rm -rf {journal_dir} && echo recovered; fi"
+    )
+    orig_conf = "auto br_default\niface br_default\n    bridge-vlan-aware yes"
+    new_conf = f"""{orig_conf}
+    bridge-vids 10
+    bridge-ports swp2
+
+auto swp2
+iface swp2
+    bridge-access 10"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input(recover_cmd),
+        # interrupted change is recovered
+        Output("recovered", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(
+            f"rm -rf {journal_dir} && mkdir -p {journal_dir} && "
+            f"cp -p --parents /etc/network/interfaces {journal_dir}/"
+        ),
+        Output("", Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+    ]
+    if reload_failed:
+        ios.extend(
+            [
+                Output("error: swp2: failed", Prompt.ROOT),
+                Input(f"cp -rp {journal_dir}/. / && rm -rf {journal_dir}"),
+                Output("", Prompt.ROOT),
+                Input("ifreload -a"),
+                Output("", Prompt.ROOT),
+            ]
+        )
+    else:
+        ios.extend(
+            [
+                Output("", Prompt.ROOT),
+                Input(f"rm -rf {journal_dir}"),
+                Output("", Prompt.ROOT),
+            ]
+        )
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(
+        None, logger, resource_conf, test_cli, journal_iface_conf=True
+    )
+    action = create_vlan_action(set_vlan=True, vlan_id="10", port_name="swp2")
+    if reload_failed:
+        with pytest.raises(CommandError):
+            flow._set_vlan(action)
+    else:
+        assert flow._set_vlan(action).success
+    cli_emu.validate_all_ios_executed()
+
+
+def test_remove_vlans(cli_emu: CliEmu, logger, resource_conf):
+    orig_conf = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 10 11
+    bridge-ports swp1 swp2 swp3
+
+auto swp1
+iface swp1
+    bridge-access 10
+
+auto swp2
+iface swp2
+    bridge-vids 10 11
+
+auto swp3
+iface swp3
+    bridge-access 11"""
+    new_conf = """auto br_default
+iface br_default
+    bridge-vlan-aware yes
+    bridge-vids 11
+    bridge-ports swp3
+
+auto swp1
+iface swp1
+
+auto swp2
+iface swp2
+
+auto swp3
+iface swp3
+    bridge-access 11"""
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output(orig_conf, Prompt.ROOT),
+        Input(f'printf "{new_conf}\n" > /etc/network/interfaces'),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+    ]
+    test_cli = cli_emu.create_cli(ios)
+
+    flow = CumulusConnectivityFlow(None, logger, resource_conf, test_cli)
+    flow.remove_vlans(["cumulus/swp1", "swp2"])
     cli_emu.validate_all_ios_executed()
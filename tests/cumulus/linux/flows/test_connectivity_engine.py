@@ -0,0 +1,46 @@
+import threading
+import time
+
+import pytest
+
+from cloudshell.cumulus.linux.flows.connectivity_engine import ConnectivityEngine
+
+
+class FakeFlow:
+    def __init__(self, counter: dict, lock: threading.Lock, fail: bool = False):
+        self._counter = counter
+        self._lock = lock
+        self._fail = fail
+
+    def apply_connectivity(self, request: str) -> str:
+        with self._lock:
+            self._counter["running"] += 1
+            self._counter["max"] = max(self._counter["max"], self._counter["running"])
+        time.sleep(0.05)
+        with self._lock:
+            self._counter["running"] -= 1
+        if self._fail:
+            raise RuntimeError(request)
+        return f"response {request}"
+
+
+@pytest.mark.parametrize("max_concurrency", (1, 3))
+def test_apply_connectivity(logger, max_concurrency):
+    counter = {"running": 0, "max": 0}
+    lock = threading.Lock()
+    requests = [(FakeFlow(counter, lock), str(i)) for i in range(6)]
+    requests[2] = (FakeFlow(counter, lock, fail=True), "2")
+
+    engine = ConnectivityEngine(logger, max_concurrency=max_concurrency)
+    results = engine.apply_connectivity_sync(requests)
+
+    assert counter["max"] == max_concurrency
+    assert [r for i, r in enumerate(results) if i != 2] == [
+        f"response {i}" for i in (0, 1, 3, 4, 5)
+    ]
+    assert isinstance(results[2], RuntimeError)
+
+
+def test_max_concurrency_validation(logger):
+    with pytest.raises(ValueError):
+        ConnectivityEngine(logger, max_concurrency=0)
@@ -0,0 +1,15 @@
+from cloudshell.cumulus.linux.utils.counters import Counters
+
+
+def test_counters():
+    counters = Counters()
+
+    counters.incr("a")
+    counters.incr("a", 2)
+    counters.incr("b")
+
+    assert counters.get("a") == 3
+    assert counters.get("c") == 0
+    assert counters.snapshot() == {"a": 3, "b": 1}
+    counters.reset()
+    assert counters.snapshot() == {}
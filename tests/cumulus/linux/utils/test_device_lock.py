@@ -0,0 +1,14 @@
+from cloudshell.cumulus.linux.utils.device_lock import get_device_lock
+
+
+def test_get_device_lock(logger):
+    device_lock = get_device_lock("192.168.1.1")
+
+    assert get_device_lock("192.168.1.1") is device_lock
+    assert get_device_lock("192.168.1.2") is not device_lock
+
+    with device_lock.acquire(logger):
+        with get_device_lock("192.168.1.2").acquire(logger):
+            pass
+    assert device_lock.acquired_count == 1
+    assert device_lock.max_wait >= 0
@@ -0,0 +1,27 @@
+from cloudshell.cumulus.linux.utils.latency_history import (
+    LatencyHistory,
+    get_latency_history,
+)
+
+
+def test_latency_history():
+    history = LatencyHistory("ifreload", max_size=4)
+    assert history.percentile(95) is None
+    assert history.get_timeout(30) == 30
+
+    for duration in (1.0, 20.0, 2.0, 3.0, 4.0):
+        history.add(duration)
+
+    assert history.durations == [20.0, 2.0, 3.0, 4.0]
+    assert history.percentile(50) == 3.0
+    assert history.percentile(95) == 20.0
+    assert history.get_timeout(30) == 60.0
+    assert history.get_timeout(30, factor=1) == 30
+
+
+def test_get_latency_history():
+    history = get_latency_history("192.168.1.1", "ifreload")
+
+    assert get_latency_history("192.168.1.1", "ifreload") is history
+    assert get_latency_history("192.168.1.1", "ifup") is not history
+    assert get_latency_history("192.168.1.2", "ifreload") is not history
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from cloudshell.cumulus.linux.command_actions.system import SystemActions
+from cloudshell.cumulus.linux.command_templates import CommandError
+from cloudshell.cumulus.linux.utils.metrics import (
+    InMemoryMetricsSink,
+    MetricsSink,
+    get_metrics_sink,
+    set_metrics_sink,
+)
+
+from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
+
+
+@pytest.fixture()
+def metrics_sink():
+    metrics_sink = InMemoryMetricsSink()
+    set_metrics_sink(metrics_sink)
+    yield metrics_sink
+    set_metrics_sink(MetricsSink())
+
+
+def test_default_metrics_sink():
+    assert not get_metrics_sink().enabled
+
+
+def test_commands_recorded(cli_emu: CliEmu, logger, metrics_sink):
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("ifreload -a"),
+        Output("", Prompt.ROOT),
+        Input("ifreload -a"),
+        Output("error: swp1: failed", Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(cli_service, logger)
+        sys_actions.if_reload()
+        with pytest.raises(CommandError):
+            sys_actions.if_reload()
+    cli_emu.validate_all_ios_executed()
+
+    stats = metrics_sink.snapshot()["ifreload -a"]
+    assert stats["count"] == 2
+    assert stats["bytes_sent"] == 2 * len("ifreload -a\n")
+    assert stats["errors"] == {"CommandError": 1}
+    assert sum(stats["buckets"]) == 2
+
+    assert json.loads(metrics_sink.export_json())["ifreload -a"]["count"] == 2
+    text = metrics_sink.export_text()
+    assert (
+        'cumulus_command_duration_seconds_bucket{command="ifreload -a",le="+Inf"} 2'
+        in text
+    )
+    assert (
+        'cumulus_command_errors_total{command="ifreload -a",error="CommandError"} 1'
+        in text
+    )
@@ -0,0 +1,102 @@
+from cloudshell.cumulus.linux.command_actions.snmp import BaseSnmpActions
+from cloudshell.cumulus.linux.command_actions.system import SystemActions
+from cloudshell.cumulus.linux.utils.counters import CounterName, counters
+from cloudshell.cumulus.linux.utils.read_cache import ReadCache
+
+from tests.cumulus.linux.conftest import ENTER_ROOT_MODE, CliEmu, Input, Output, Prompt
+
+
+def test_read_cache(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        "cloudshell.cumulus.linux.utils.read_cache.time.monotonic", lambda: now[0]
+    )
+    counters.reset()
+    read_cache = ReadCache(ttl=10)
+    values = iter(range(10))
+
+    def read():
+        return next(values)
+
+    assert read_cache.read("1.1.1.1", "a", read) == 0
+    assert read_cache.read("1.1.1.1", "a", read) == 0
+    assert read_cache.read("1.1.1.2", "a", read) == 1
+    assert read_cache.read("1.1.1.1", "a", read, refresh=True) == 2
+    now[0] = 11
+    assert read_cache.read("1.1.1.1", "a", read) == 3
+    read_cache.invalidate("1.1.1.1")
+    assert read_cache.read("1.1.1.1", "a", read) == 4
+    assert read_cache.read("1.1.1.2", "a", read) == 5
+    assert counters.get(CounterName.READ_CACHE_HIT) == 1
+    assert counters.get(CounterName.READ_CACHE_MISS) == 5
+
+
+def test_system_actions_read_cache(cli_emu: CliEmu, logger):
+    snmp_status = "Current Status  active (running)"
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/snmp/snmpd.conf && echo"),
+        Output("agentaddress udp:161", Prompt.ROOT),
+        Input("net show snmp-server status"),
+        Output(snmp_status, Prompt.ROOT),
+        Input('printf "agentaddress udp:162" > /etc/snmp/snmpd.conf'),
+        Output("", Prompt.ROOT),
+        Input("cat /etc/snmp/snmpd.conf && echo"),
+        Output("agentaddress udp:162", Prompt.ROOT),
+        Input("service snmpd restart"),
+        Output("", Prompt.ROOT),
+        Input("net show snmp-server status"),
+        Output(snmp_status, Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+    read_cache = ReadCache()
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(
+            cli_service, logger, "192.168.1.1", read_cache=read_cache
+        )
+        snmp_actions = BaseSnmpActions(cli_service, logger, "192.168.1.1", read_cache)
+        for _ in range(2):
+            assert sys_actions.get_snmp_conf() == "agentaddress udp:161"
+            assert snmp_actions.is_snmp_running()
+
+        sys_actions.upload_snmp_conf("agentaddress udp:162")
+        assert sys_actions.get_snmp_conf() == "agentaddress udp:162"
+        assert snmp_actions.is_snmp_running()
+        sys_actions.restart_snmp_server()
+        assert snmp_actions.is_snmp_running()
+    cli_emu.validate_all_ios_executed()
+
+
+def test_system_actions_read_cache_iface_conf(cli_emu: CliEmu, logger):
+    journal_dir = "/etc/network/.cloudshell_journal"
+    recover_cmd = (
+        f"if test -d {journal_dir}; then cp -rp {journal_dir}/. / && "
+        f"rm -rf {journal_dir} && echo recovered; fi"
+    )
+    ios = [
+        *ENTER_ROOT_MODE,
+        Input("cat /etc/network/interfaces && echo"),
+        Output("auto lo", Prompt.ROOT),
+        Input(recover_cmd),
+        Output("", Prompt.ROOT),
+        Input("cat /etc/network/interfaces && echo"),
+        Output("auto swp1", Prompt.ROOT),
+        Input(recover_cmd),
+        Output("recovered", Prompt.ROOT),
+        Input("cat /etc/network/interfaces && echo"),
+        Output("auto swp2", Prompt.ROOT),
+    ]
+    cli = cli_emu.create_cli(ios)
+
+    with cli.root_mode_service() as cli_service:
+        sys_actions = SystemActions(
+            cli_service, logger, "192.168.1.1", read_cache=ReadCache()
+        )
+        assert sys_actions.get_iface_conf() == "auto lo"
+        assert not sys_actions.recover_journal()
+        assert sys_actions.get_iface_conf() == "auto lo"
+        assert sys_actions.get_iface_conf(refresh=True) == "auto swp1"
+        assert sys_actions.recover_journal()
+        assert sys_actions.get_iface_conf() == "auto swp2"
+    cli_emu.validate_all_ios_executed()
@@ -0,0 +1,25 @@
+import pytest
+
+from cloudshell.cumulus.linux.utils.text_patch import get_sed_args, get_sed_expressions
+
+
+@pytest.mark.parametrize(
+    ("old_text", "new_text", "expected_expressions"),
+    (
+        ("a\nb\nc", "a\nb\nc\n", []),
+        ("a\nb\nc", "a\nB\nc", ["2c\\B"]),
+        ("a\nb\nc\nd", "a\nd", ["2,3d"]),
+        ("a\nb", "a\nb\n\nc\\d", ["2c\\b\\n\\nc\\\\d"]),
+        ("a\nb", "x\na\nb", ["1c\\x\\na"]),
+        ("a\nb", "a\n\nb", ["2c\\\\nb"]),
+        ("a", "", None),
+    ),
+)
+def test_get_sed_expressions(old_text, new_text, expected_expressions):
+    assert get_sed_expressions(old_text, new_text) == expected_expressions
+
+
+def test_get_sed_args():
+    expressions = ["2c\\    it's", "3d"]
+
+    assert get_sed_args(expressions) == "-e '2c\\    it'\\''s' -e '3d'"